@@ -0,0 +1,59 @@
+"""Compare session backends on the runtime's event append and replay path.
+
+Run with the shared package on the path:
+
+    PYTHONPATH=packages/buddy-shared/src python benchmarks/bench_session_backends.py
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from buddy.session_backend import SessionBackend, SessionBackendKind, open_session_backend
+
+
+def _delta_payload(index: int) -> dict[str, object]:
+    return {
+        "kind": "artifact-update",
+        "contextId": "bench-ctx",
+        "taskId": "bench-task",
+        "append": True,
+        "artifact": {
+            "artifactId": "bench-artifact",
+            "name": "output_delta",
+            "parts": [{"kind": "text", "text": f"token-{index} "}],
+        },
+    }
+
+
+def _run(store: SessionBackend, events: int, batch_size: int) -> tuple[float, float]:
+    start = perf_counter()
+    for offset in range(0, events, batch_size):
+        count = min(batch_size, events - offset)
+        first = store.allocate_event_indexes("bench-ctx", count)
+        store.append_events("bench-ctx", [(first + i, _delta_payload(first + i)) for i in range(count)])
+    append_rate = events / (perf_counter() - start)
+    start = perf_counter()
+    loaded = store.load_events("bench-ctx")
+    read_rate = len(loaded) / (perf_counter() - start)
+    return append_rate, read_rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    kinds: tuple[SessionBackendKind, ...] = ("sqlite", "log")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind in kinds:
+            store = open_session_backend(kind, Path(tmp_dir) / kind)
+            append_rate, read_rate = _run(store, args.events, args.batch_size)
+            store.close()
+            print(f"{kind:<7} append {append_rate:>10,.0f} events/s   read {read_rate:>10,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
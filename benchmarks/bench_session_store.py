@@ -0,0 +1,60 @@
+"""Microbenchmark for `SessionStore.append_event` throughput.
+
+Compares the pooled per-thread connection against the previous
+connect-per-call behaviour. Run with the shared package on the path:
+
+    PYTHONPATH=packages/buddy-shared/src python benchmarks/bench_session_store.py
+"""
+
+import argparse
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from buddy.session_store import SessionStore
+
+
+class _ConnectPerCallStore(SessionStore):
+    def _connect(self) -> sqlite3.Connection:
+        return self._open_connection()
+
+
+def _delta_payload(index: int) -> dict[str, object]:
+    return {
+        "kind": "artifact-update",
+        "contextId": "bench-ctx",
+        "taskId": "bench-task",
+        "append": True,
+        "artifact": {
+            "artifactId": "bench-artifact",
+            "name": "output_delta",
+            "parts": [{"kind": "text", "text": f"token-{index} "}],
+        },
+    }
+
+
+def _events_per_second(store: SessionStore, events: int) -> float:
+    start = perf_counter()
+    for index in range(events):
+        store.append_event("bench-ctx", index, _delta_payload(index))
+    return events / (perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        before = _events_per_second(_ConnectPerCallStore(Path(tmp_dir) / "before.db"), args.events)
+        after_store = SessionStore(Path(tmp_dir) / "after.db")
+        after = _events_per_second(after_store, args.events)
+        after_store.close()
+
+    print(f"connect-per-call: {before:,.0f} events/s")
+    print(f"pooled:           {after:,.0f} events/s ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import json
 import logging
 from collections.abc import Callable, Mapping
 from dataclasses import asdict
@@ -6,6 +5,8 @@ from datetime import UTC, datetime
 from pathlib import Path
 from time import perf_counter
 
+from buddy.shared import fast_json
+
 
 def load_json_registry[RecordT](
     registry_path: Path,
@@ -16,7 +17,7 @@ def load_json_registry[RecordT](
         return {}
 
     raw = registry_path.read_text(encoding="utf-8")
-    data = json.loads(raw) if raw else {}
+    data = fast_json.loads(raw) if raw else {}
     if not isinstance(data, dict):
         return {}
 
@@ -32,7 +33,7 @@ def load_json_registry[RecordT](
 
 def save_json_registry(registry_path: Path, records: Mapping[str, object]) -> None:
     payload = {record_id: asdict(record) for record_id, record in records.items()}
-    registry_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    registry_path.write_text(fast_json.dumps(payload, indent=True), encoding="utf-8")
 
 
 def emit_operation_event(
@@ -1,9 +1,31 @@
 from buddy.control_plane.server_state import ServerState
+from buddy.session_transfer import encode_ndjson
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from starlette.concurrency import run_in_threadpool
 
 
+class SessionsDeleteRequest(BaseModel):
+    session_ids: list[str] = Field(min_length=1, max_length=10_000)
+
+
+class SessionForkRequest(BaseModel):
+    message_index: int | None = Field(default=None, ge=0)
+    event_index: int | None = Field(default=None, ge=0)
+
+
+def _optional_int_param(request: Request, name: str, *, minimum: int | None = 0) -> int | None:
+    value = request.query_params.get(name)
+    if value is None or value == "":
+        return None
+    digits = value.removeprefix("-") if minimum is None else value
+    if not digits.isdigit() or (minimum is not None and int(value) < minimum):
+        bound = f" >= {minimum}" if minimum is not None else ""
+        raise HTTPException(status_code=400, detail=f"Query parameter '{name}' must be an integer{bound}")
+    return int(value)
+
+
 def build_sessions_router(state: ServerState) -> APIRouter:
     router = APIRouter()
 
@@ -14,19 +36,98 @@ def build_sessions_router(state: ServerState) -> APIRouter:
         sessions = await run_in_threadpool(state.session_store.list_sessions, limit)
         return JSONResponse({"sessions": sessions})
 
+    @router.get("/sessions/search")
+    async def search_sessions(request: Request) -> JSONResponse:
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise HTTPException(status_code=400, detail="Query parameter 'q' is required")
+        limit = _optional_int_param(request, "limit", minimum=1) or 20
+        result = await run_in_threadpool(
+            state.session_store.search,
+            query,
+            min(limit, 100),
+            _optional_int_param(request, "cursor"),
+        )
+        return JSONResponse(result)
+
+    @router.get("/sessions/export")
+    async def export_sessions(request: Request) -> StreamingResponse:
+        session_ids = request.query_params.getlist("session_id") or None
+        compress = request.query_params.get("gzip", "false").lower() == "true"
+        # Starlette advances the synchronous generator in a worker thread.
+        body = encode_ndjson(state.session_store.export_records(session_ids), compress=compress)
+        filename = "sessions.ndjson.gz" if compress else "sessions.ndjson"
+        return StreamingResponse(
+            body,
+            media_type="application/gzip" if compress else "application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    @router.post("/sessions/delete")
+    async def delete_sessions(payload: SessionsDeleteRequest) -> JSONResponse:
+        deleted = await run_in_threadpool(state.session_store.delete_sessions, payload.session_ids)
+        return JSONResponse({"deleted": deleted})
+
+    @router.get("/sessions/blobs/{digest}")
+    async def get_session_blob(digest: str) -> JSONResponse:
+        try:
+            content = await run_in_threadpool(state.session_store.load_blob, digest)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+        except FileNotFoundError as error:
+            raise HTTPException(status_code=404, detail="Blob not found") from error
+        return JSONResponse({"digest": digest, "content": content})
+
     @router.get("/sessions/{session_id}")
-    async def get_session(session_id: str) -> JSONResponse:
+    async def get_session(session_id: str, request: Request) -> JSONResponse:
         if not session_id:
             raise HTTPException(status_code=400, detail="Missing session id")
-        session = await run_in_threadpool(state.session_store.get_session, session_id)
-        if session is None:
+        view = request.query_params.get("view", "full")
+        if view not in {"full", "compact"}:
+            raise HTTPException(status_code=400, detail="Query parameter 'view' must be 'full' or 'compact'")
+        snapshot = await run_in_threadpool(
+            state.session_store.load_session_snapshot,
+            session_id,
+            events_after_index=_optional_int_param(request, "after_index"),
+            events_after_seq=_optional_int_param(request, "after_seq", minimum=None),
+            events_limit=_optional_int_param(request, "limit", minimum=1),
+            messages_after_id=_optional_int_param(request, "messages_after"),
+            messages_limit=_optional_int_param(request, "messages_limit", minimum=1),
+            view=view,
+            resolve_blobs=request.query_params.get("resolve_blobs", "true").lower() != "false",
+        )
+        if snapshot is None:
             raise HTTPException(status_code=404, detail="Session not found")
-        messages = await run_in_threadpool(state.session_store.load_chat_messages, session_id)
-        events = await run_in_threadpool(state.session_store.load_events, session_id)
         return JSONResponse({
-            "session": session,
-            "messages": messages,
-            "events": events,
+            "session": snapshot["session"],
+            "messages": snapshot["messages"],
+            "events": snapshot["events"],
+            "cursors": {
+                "after_index": snapshot["next_events_after_index"],
+                "after_seq": snapshot["next_events_after_seq"],
+                "messages_after": snapshot["next_messages_after_id"],
+            },
         })
 
+    @router.post("/sessions/{session_id}/fork")
+    async def fork_session(session_id: str, payload: SessionForkRequest) -> JSONResponse:
+        try:
+            fork_id = await run_in_threadpool(
+                state.session_store.fork_session,
+                session_id,
+                message_index=payload.message_index,
+                event_index=payload.event_index,
+            )
+        except ValueError as error:
+            raise HTTPException(status_code=404, detail=str(error)) from error
+        session = await run_in_threadpool(state.session_store.get_session, fork_id)
+        return JSONResponse({"session": session}, status_code=201)
+
+    @router.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str) -> JSONResponse:
+        deleted = await run_in_threadpool(state.session_store.delete_sessions, [session_id])
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return JSONResponse({"deleted": deleted})
+
     return router
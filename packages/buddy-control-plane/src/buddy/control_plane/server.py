@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -10,7 +12,7 @@ from buddy.control_plane.routes.agents import build_agents_router
 from buddy.control_plane.routes.proxy import build_proxy_router
 from buddy.control_plane.routes.sessions import build_sessions_router
 from buddy.control_plane.server_state import ServerState
-from buddy.session_store import SessionStore
+from buddy.session_store import RetentionPolicy, SessionStore
 from buddy.shared.logging import configure_logging, emit_event, get_logger, request_logging_context
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Response
@@ -46,9 +48,14 @@ def create_app() -> FastAPI:
     @asynccontextmanager
     async def _lifespan(_app: FastAPI):
         await _startup_control_plane(managed_agent_manager)
+        retention_task = _start_session_retention()
         try:
             yield
         finally:
+            if retention_task is not None:
+                retention_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await retention_task
             await _shutdown_control_plane(managed_agent_manager)
 
     app = FastAPI(lifespan=_lifespan)
@@ -135,6 +142,58 @@ def _managed_agent_autostart_enabled() -> bool:
     }
 
 
+def _optional_env_float(name: str) -> float | None:
+    value = os.environ.get(name, "").strip()
+    return float(value) if value else None
+
+
+def _session_retention_policy() -> RetentionPolicy | None:
+    max_age_days = _optional_env_float("BUDDY_SESSION_MAX_AGE_DAYS")
+    max_sessions = _optional_env_float("BUDDY_SESSION_MAX_COUNT")
+    max_bytes = _optional_env_float("BUDDY_SESSION_MAX_BYTES")
+    delta_retention_hours = _optional_env_float("BUDDY_SESSION_DELTA_RETENTION_HOURS")
+    policy = RetentionPolicy(
+        max_age_s=max_age_days * 86400 if max_age_days is not None else None,
+        max_sessions=int(max_sessions) if max_sessions is not None else None,
+        max_bytes_per_session=int(max_bytes) if max_bytes is not None else None,
+        delta_retention_s=delta_retention_hours * 3600 if delta_retention_hours is not None else None,
+    )
+    return None if policy == RetentionPolicy() else policy
+
+
+def _start_session_retention() -> asyncio.Task[None] | None:
+    policy = _session_retention_policy()
+    if policy is None:
+        return None
+    interval_s = float(os.environ.get("BUDDY_SESSION_RETENTION_INTERVAL_S", "3600"))
+    return asyncio.create_task(_run_session_retention(policy, interval_s))
+
+
+async def _run_session_retention(policy: RetentionPolicy, interval_s: float) -> None:
+    while True:
+        start_time = perf_counter()
+        try:
+            counts = await run_in_threadpool(session_store.enforce_retention, policy)
+            await run_in_threadpool(session_store.incremental_vacuum)
+        except Exception as error:
+            emit_event(
+                logger,
+                "session_retention_failed",
+                level="error",
+                outcome="error",
+                error_type=type(error).__name__,
+                error_message=str(error),
+            )
+        else:
+            emit_event(
+                logger,
+                "session_retention_completed",
+                duration_ms=round((perf_counter() - start_time) * 1000, 3),
+                **counts,
+            )
+        await asyncio.sleep(interval_s)
+
+
 async def _startup_control_plane(managed_agent_manager: ManagedAgentManager) -> None:
     auto_start_enabled = _managed_agent_autostart_enabled()
     started_count = 0
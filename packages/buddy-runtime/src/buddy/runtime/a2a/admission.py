@@ -0,0 +1,122 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from time import monotonic
+
+
+class AdmissionRejected(Exception):
+    """Raised when every execution slot is busy and the wait queue is full."""
+
+
+@dataclass(eq=False)
+class AdmissionTicket:
+    moved: asyncio.Event = field(default_factory=asyncio.Event)
+    admitted: bool = False
+    withdrawn: bool = False
+
+
+class AdmissionController:
+    """Caps concurrent executions and queues the overflow in arrival order.
+
+    ``max_active`` of 0 admits everything immediately. Otherwise up to
+    ``max_queued`` callers wait for a slot and are told their position every
+    time it changes; anyone arriving beyond that is rejected at once. A
+    released slot is handed straight to the first waiter.
+    """
+
+    def __init__(self, *, max_active: int = 0, max_queued: int = 0) -> None:
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self._active = 0
+        self._waiters: deque[AdmissionTicket] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.withdrawn = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    @property
+    def limited(self) -> bool:
+        return self.max_active > 0
+
+    def ticket(self) -> AdmissionTicket:
+        return AdmissionTicket()
+
+    async def acquire(self, ticket: AdmissionTicket, on_position: Callable[[int], Awaitable[None]]) -> bool:
+        """Wait for a slot, reporting queue positions (1 = next) through ``on_position``.
+
+        Returns False when ``ticket`` was withdrawn while waiting. Raises
+        :class:`AdmissionRejected` when the queue is full.
+        """
+        if not self.limited or (self._active < self.max_active and not self._waiters):
+            self._active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queued:
+            self.rejected += 1
+            raise AdmissionRejected(f"Runtime is at capacity ({self.max_active} running, {self.max_queued} queued)")
+        self._waiters.append(ticket)
+        started = monotonic()
+        try:
+            while not (ticket.admitted or ticket.withdrawn):
+                ticket.moved.clear()
+                await on_position(self._waiters.index(ticket) + 1)
+                if not (ticket.admitted or ticket.withdrawn):
+                    await ticket.moved.wait()
+        except BaseException:
+            if ticket.admitted:
+                self.release()
+            else:
+                self._remove(ticket)
+            raise
+        waited = monotonic() - started
+        self.total_wait_s += waited
+        self.max_wait_s = max(self.max_wait_s, waited)
+        if ticket.withdrawn:
+            self.withdrawn += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def withdraw(self, ticket: AdmissionTicket) -> None:
+        """Drop a waiting ticket, e.g. because its task was canceled; its ``acquire`` returns False."""
+        if ticket.admitted or ticket.withdrawn:
+            return
+        ticket.withdrawn = True
+        self._remove(ticket)
+
+    def release(self) -> None:
+        if not self._waiters:
+            self._active -= 1
+            return
+        ticket = self._waiters.popleft()
+        ticket.admitted = True
+        ticket.moved.set()
+        self._notify_waiters()
+
+    def stats(self) -> dict[str, object]:
+        finished_waits = self.admitted + self.withdrawn
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "withdrawn": self.withdrawn,
+            "avg_wait_ms": round(self.total_wait_s / finished_waits * 1000, 3) if finished_waits else 0.0,
+            "max_wait_ms": round(self.max_wait_s * 1000, 3),
+        }
+
+    def _remove(self, ticket: AdmissionTicket) -> None:
+        try:
+            self._waiters.remove(ticket)
+        except ValueError:
+            return
+        ticket.moved.set()
+        self._notify_waiters()
+
+    def _notify_waiters(self) -> None:
+        for waiter in self._waiters:
+            waiter.moved.set()
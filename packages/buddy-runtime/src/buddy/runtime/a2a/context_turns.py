@@ -0,0 +1,99 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+
+def _new_outcome() -> asyncio.Future[str]:
+    return asyncio.get_running_loop().create_future()
+
+
+@dataclass(eq=False)
+class Turn:
+    task_id: str
+    queries: list[str]
+    # Tasks whose queued messages this turn answers as well.
+    merged_task_ids: list[str] = field(default_factory=list)
+    merged_into: "Turn | None" = None
+    withdrawn: bool = False
+    # Final task state of this turn, which merged turns report as their own.
+    outcome: asyncio.Future[str] = field(default_factory=_new_outcome)
+
+    @property
+    def query(self) -> str:
+        return "\n\n".join(self.queries)
+
+    def finish(self, state: str) -> None:
+        if not self.outcome.done():
+            self.outcome.set_result(state)
+
+
+@dataclass
+class _ContextState:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    waiting: list[Turn] = field(default_factory=list)
+    users: int = 0
+
+
+class ContextTurns:
+    """Runs the turns of one conversation strictly one after another.
+
+    Different contexts never wait for each other. With ``coalesce`` a turn
+    that starts also takes over the messages of every turn queued behind it
+    in the same context; those turns are marked ``merged_into`` and have
+    nothing left to run once they get their own slot, by which time the
+    absorbing turn's ``outcome`` is settled. A turn that leaves without
+    calling :meth:`Turn.finish` counts as failed (canceled if it was canceled).
+    """
+
+    def __init__(self, *, coalesce: bool = False) -> None:
+        self.coalesce = coalesce
+        self._contexts: dict[str, _ContextState] = {}
+        self.merged = 0
+
+    @asynccontextmanager
+    async def run(self, context_id: str, turn: Turn) -> AsyncIterator[Turn]:
+        state = self._contexts.get(context_id)
+        if state is None:
+            state = self._contexts[context_id] = _ContextState()
+        state.waiting.append(turn)
+        state.users += 1
+        try:
+            async with state.lock:
+                if turn in state.waiting:
+                    state.waiting.remove(turn)
+                if self.coalesce and turn.merged_into is None and not turn.withdrawn:
+                    for queued in state.waiting:
+                        queued.merged_into = turn
+                        turn.queries.extend(queued.queries)
+                        turn.merged_task_ids.append(queued.task_id)
+                        self.merged += 1
+                    state.waiting.clear()
+                try:
+                    yield turn
+                except asyncio.CancelledError:
+                    turn.finish("canceled")
+                    raise
+                finally:
+                    turn.finish("failed")
+        finally:
+            if turn in state.waiting:
+                state.waiting.remove(turn)
+            state.users -= 1
+            if state.users == 0:
+                del self._contexts[context_id]
+
+    def withdraw(self, context_id: str, turn: Turn) -> None:
+        """Keep a queued ``turn`` from being merged into another, e.g. because it was canceled."""
+        turn.withdrawn = True
+        state = self._contexts.get(context_id)
+        if state is not None and turn in state.waiting:
+            state.waiting.remove(turn)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "busy_contexts": len(self._contexts),
+            "waiting_turns": sum(state.users - (1 if state.lock.locked() else 0) for state in self._contexts.values()),
+            "merged": self.merged,
+            "coalesce": self.coalesce,
+        }
@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from time import monotonic
+
+
+@dataclass
+class PendingDelta:
+    artifact_id: str
+    name: str
+    chunks: list[str] = field(default_factory=list)
+    chars: int = 0
+    started_at: float = field(default_factory=monotonic)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+
+class DeltaCoalescer:
+    """Merges consecutive text deltas of one streamed artifact.
+
+    Deltas are held until ``window_s`` has passed since the first of them or
+    ``max_chars`` characters have accumulated, whichever comes first. A delta
+    for a different artifact releases the held one. Callers drain the
+    coalescer before emitting anything else so ordering is preserved. With
+    neither limit set every delta is released immediately.
+    """
+
+    def __init__(self, *, window_s: float = 0.0, max_chars: int = 0) -> None:
+        self.window_s = window_s
+        self.max_chars = max_chars
+        self._pending: PendingDelta | None = None
+        self.received = 0
+        self.emitted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_s > 0 or self.max_chars > 0
+
+    def add(self, artifact_id: str, name: str, text: str) -> list[PendingDelta]:
+        """Buffer ``text`` and return the deltas that are ready to emit, oldest first."""
+        self.received += 1
+        ready: list[PendingDelta] = []
+        pending = self._pending
+        if pending is not None and pending.artifact_id != artifact_id:
+            ready.append(self._release(pending))
+            pending = None
+        if pending is None:
+            pending = self._pending = PendingDelta(artifact_id, name)
+        pending.chunks.append(text)
+        pending.chars += len(text)
+        if not self.enabled or (self.max_chars > 0 and pending.chars >= self.max_chars) or self.time_left() == 0:
+            ready.append(self._release(pending))
+        return ready
+
+    def time_left(self) -> float | None:
+        """Seconds until the held delta is due, or ``None`` when nothing time-bound is held."""
+        if self._pending is None or self.window_s <= 0:
+            return None
+        return max(self.window_s - (monotonic() - self._pending.started_at), 0.0)
+
+    def drain(self) -> PendingDelta | None:
+        return self._release(self._pending) if self._pending is not None else None
+
+    def _release(self, pending: PendingDelta) -> PendingDelta:
+        self._pending = None
+        self.emitted += 1
+        return pending
@@ -1,15 +1,57 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import monotonic
 from uuid import uuid4
 
 from a2a.types import TaskState
-from buddy.session_store import SessionStore
+from buddy.session_backend import SessionBackend
+
+# A single worker keeps batches for one context landing in submission order.
+_FLUSH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="buddy-event-writer")
 
 
 class SessionEventWriter:
-    def __init__(self, *, session_store: SessionStore, context_id: str, task_id: str) -> None:
+    """Persists A2A task events for one context/task pair.
+
+    With ``batch_size`` of 1 every event is written synchronously. Larger
+    batch sizes buffer events and flush them in one transaction on a
+    background thread once the batch is full, once ``flush_interval_s`` has
+    elapsed since the oldest pending event (on a timer when created inside a
+    running event loop, otherwise on the next append), and always on final
+    status updates. Await :meth:`aflush` when durability matters.
+
+    Final status updates also compact the task's streamed artifacts and, when
+    ``delta_retention_s`` is set, prune raw deltas compacted longer ago. That
+    work always runs on the background thread, even with ``batch_size`` of 1.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_store: SessionBackend,
+        context_id: str,
+        task_id: str,
+        batch_size: int = 1,
+        flush_interval_s: float | None = None,
+        compact_on_final: bool = True,
+        delta_retention_s: float | None = None,
+    ) -> None:
         self._store = session_store
         self._context_id = context_id
         self._task_id = task_id
-        self._event_index = self._store.next_event_index(context_id)
+        self._batch_size = max(batch_size, 1)
+        self._flush_interval_s = flush_interval_s
+        self._compact_on_final = compact_on_final
+        self._delta_retention_s = delta_retention_s
+        self._pending: list[tuple[int, dict[str, object]]] = []
+        self._inflight: list[Future[object]] = []
+        self._first_pending = 0.0
+        self._flush_timer: asyncio.TimerHandle | None = None
+
+    @property
+    def buffered(self) -> bool:
+        return self._batch_size > 1
 
     def append_status_update(self, state: TaskState, message_text: str | None = None, final: bool = False) -> None:
         status_payload: dict[str, object] = {
@@ -30,6 +72,10 @@ class SessionEventWriter:
             "final": final,
             "status": status_payload,
         })
+        if final:
+            self._submit_pending()
+            if self._compact_on_final:
+                self._submit(self._compact, background=True)
 
     def append_artifact_text(self, *, artifact_id: str, name: str, text: str, append: bool = False) -> None:
         payload = {
@@ -63,6 +109,57 @@ class SessionEventWriter:
             payload["append"] = True
         self._append(payload)
 
+    def flush(self) -> None:
+        """Write all pending events and block until they are persisted."""
+        self._submit_pending()
+        inflight, self._inflight = self._inflight, []
+        for future in inflight:
+            future.result()
+
+    async def aflush(self) -> None:
+        """Write all pending events without blocking the event loop."""
+        self._submit_pending()
+        inflight, self._inflight = self._inflight, []
+        for future in inflight:
+            await asyncio.wrap_future(future)
+
     def _append(self, payload: dict[str, object]) -> None:
-        self._store.append_event(self._context_id, self._event_index, payload)
-        self._event_index += 1
+        if not self._pending:
+            self._first_pending = monotonic()
+            self._schedule_flush()
+        self._pending.append((self._store.allocate_event_indexes(self._context_id), payload))
+        if not self.buffered or len(self._pending) >= self._batch_size or self._flush_interval_elapsed():
+            self._submit_pending()
+
+    def _flush_interval_elapsed(self) -> bool:
+        return self._flush_interval_s is not None and monotonic() - self._first_pending >= self._flush_interval_s
+
+    def _schedule_flush(self) -> None:
+        if not self.buffered or self._flush_interval_s is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_timer = loop.call_later(self._flush_interval_s, self._submit_pending)
+
+    def _submit_pending(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._submit(self._store.append_events, self._context_id, batch)
+
+    def _submit(self, write: Callable[..., object], *args: object, background: bool = False) -> None:
+        if not (self.buffered or background):
+            write(*args)
+            return
+        self._inflight = [future for future in self._inflight if not future.done() or future.exception()]
+        self._inflight.append(_FLUSH_EXECUTOR.submit(write, *args))
+
+    def _compact(self) -> None:
+        self._store.compact_task(self._context_id, self._task_id)
+        if self._delta_retention_s is not None:
+            self._store.prune_compacted_events(self._delta_retention_s)
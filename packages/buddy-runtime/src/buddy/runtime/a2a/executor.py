@@ -7,12 +7,17 @@ import anyio
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
 from a2a.server.tasks import TaskUpdater
-from a2a.types import TaskState
+from a2a.types import Task, TaskState
 from a2a.utils import new_agent_text_message, new_task
+from buddy.runtime.a2a.admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from buddy.runtime.a2a.context_turns import ContextTurns, Turn
+from buddy.runtime.a2a.delta_coalescer import DeltaCoalescer, PendingDelta
 from buddy.runtime.a2a.event_writer import SessionEventWriter
+from buddy.runtime.a2a.history_cache import MessageHistoryCache
 from buddy.runtime.a2a.utils import simple_data_part, simple_text_part
-from buddy.session_store import SessionStore
-from devtools import pprint
+from buddy.runtime.tools.todo_store import todo_scope
+from buddy.session_backend import SessionBackend
+from buddy.shared.logging import SampledTrace, get_logger
 from langfuse import get_client
 from pydantic_ai import (
     Agent,
@@ -28,6 +33,9 @@ from pydantic_ai import (
     ToolCallPart,
     ToolReturnPart,
 )
+from pydantic_core import to_jsonable_python
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -39,17 +47,78 @@ class ActiveExecution:
     cancellation_requested: bool = False
     cancellation_status_emitted: bool = False
     cancellation_transcript_written: bool = False
+    admission_ticket: AdmissionTicket | None = None
+    turn: Turn | None = None
 
 
 class PyAIAgentExecutor(AgentExecutor):
     def __init__(
         self,
         agent: Agent,
-        session_store: SessionStore,
+        session_store: SessionBackend,
+        *,
+        event_batch_size: int = 1,
+        event_flush_interval_s: float | None = None,
+        delta_retention_s: float | None = None,
+        history_cache: MessageHistoryCache | None = None,
+        delta_window_s: float = 0.0,
+        delta_max_chars: int = 0,
+        event_trace_sample_rate: float | None = None,
+        admission: AdmissionController | None = None,
+        context_turns: ContextTurns | None = None,
+        event_buffer_size: int = 64,
     ) -> None:
         self.agent = agent
         self.session_store = session_store
+        self.event_batch_size = event_batch_size
+        self.event_flush_interval_s = event_flush_interval_s
+        self.delta_retention_s = delta_retention_s
+        self.history_cache = history_cache or MessageHistoryCache()
+        self.delta_window_s = delta_window_s
+        self.delta_max_chars = delta_max_chars
+        self.admission = admission or AdmissionController()
+        self.context_turns = context_turns or ContextTurns()
+        self.event_trace = SampledTrace(logger, "agent_stream_event", sample_rate=event_trace_sample_rate)
         self._active_executions: dict[str, ActiveExecution] = {}
+        self.event_buffer_size = event_buffer_size
+        self._deltas_received = 0
+        self._deltas_emitted = 0
+        self._event_buffer_high_water = 0
+        self._event_buffer_full_sends = 0
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "active_executions": len(self._active_executions),
+            "history_cache": self.history_cache.stats(),
+            "deltas": {"received": self._deltas_received, "emitted": self._deltas_emitted},
+            "event_buffer": {
+                "size": self.event_buffer_size,
+                "high_water": self._event_buffer_high_water,
+                "full_sends": self._event_buffer_full_sends,
+            },
+            "admission": self.admission.stats(),
+            "context_turns": self.context_turns.stats(),
+        }
+
+    def _load_history(self, context_id: str) -> list[Any]:
+        version = self.session_store.messages_version(context_id)
+        cached = self.history_cache.get(context_id, version)
+        if cached is not None:
+            return cached
+        messages = self.session_store.load_messages(context_id)
+        if messages:
+            self.history_cache.put(context_id, messages, self.session_store.messages_size(context_id), version)
+        return messages
+
+    def _create_writer(self, context_id: str, task_id: str) -> SessionEventWriter:
+        return SessionEventWriter(
+            session_store=self.session_store,
+            context_id=context_id,
+            task_id=task_id,
+            batch_size=self.event_batch_size,
+            flush_interval_s=self.event_flush_interval_s,
+            delta_retention_s=self.delta_retention_s,
+        )
 
     async def _emit_cancellation_status(self, execution: ActiveExecution) -> None:
         if execution.cancellation_status_emitted:
@@ -62,6 +131,7 @@ class PyAIAgentExecutor(AgentExecutor):
             pass
         execution.writer.append_status_update(TaskState.canceled, cancel_message, final=True)
         execution.cancellation_status_emitted = True
+        await execution.writer.aflush()
 
     def _append_cancellation_transcript(self, execution: ActiveExecution) -> None:
         if execution.cancellation_transcript_written:
@@ -81,7 +151,7 @@ class PyAIAgentExecutor(AgentExecutor):
         task = context.current_task or new_task(message)
 
         updater = TaskUpdater(event_queue, task.id, context_id)
-        writer = SessionEventWriter(session_store=self.session_store, context_id=context_id, task_id=task.id)
+        writer = self._create_writer(context_id, task.id)
         execution = ActiveExecution(
             run_task=None,
             context_id=context_id,
@@ -90,11 +160,77 @@ class PyAIAgentExecutor(AgentExecutor):
         )
         self._active_executions[task.id] = execution
 
-        msg_history = self.session_store.load_messages(context_id)
+        await event_queue.enqueue_event(task)
+        turn = execution.turn = Turn(task.id, [query])
+        try:
+            async with self.context_turns.run(context_id, turn):
+                execution.turn = None
+                if execution.cancellation_requested:
+                    # Canceled while an earlier turn of this context was running.
+                    turn.finish(TaskState.canceled.value)
+                    self._append_cancellation_transcript(execution)
+                    return
+                if turn.merged_into is not None:
+                    await self._finish_merged_turn(turn.merged_into, execution)
+                    return
+                if not await self._admit(execution):
+                    turn.finish((TaskState.canceled if execution.cancellation_requested else TaskState.rejected).value)
+                    return
+                if execution.cancellation_requested:
+                    # Canceled after the slot was handed over but before this task resumed.
+                    self.admission.release()
+                    turn.finish(TaskState.canceled.value)
+                    self._append_cancellation_transcript(execution)
+                    return
+                try:
+                    await self._run_execution(turn, task, execution)
+                finally:
+                    self.admission.release()
+                turn.finish((TaskState.canceled if execution.cancellation_requested else TaskState.completed).value)
+        finally:
+            self._active_executions.pop(task.id, None)
 
-        self.session_store.append_chat_message(context_id, "user", query)
+    async def _finish_merged_turn(self, absorbing: Turn, execution: ActiveExecution) -> None:
+        state = TaskState(absorbing.outcome.result()) if absorbing.outcome.done() else TaskState.failed
+        if state == TaskState.completed:
+            status_text = f"Answered together with task {absorbing.task_id}."
+        else:
+            status_text = f"Task {absorbing.task_id}, which also carried this message, ended as {state.value}."
+        await execution.updater.update_status(state, message=new_agent_text_message(status_text), final=True)
+        execution.writer.append_status_update(state, status_text, final=True)
+        await execution.writer.aflush()
+
+    async def _admit(self, execution: ActiveExecution) -> bool:
+        async def report_position(position: int) -> None:
+            status_text = f"Waiting for a free slot, position {position} in queue"
+            await execution.updater.update_status(TaskState.submitted, message=new_agent_text_message(status_text))
+            execution.writer.append_status_update(TaskState.submitted, status_text)
+
+        ticket = execution.admission_ticket = self.admission.ticket()
+        try:
+            admitted = await self.admission.acquire(ticket, report_position)
+        except AdmissionRejected as error:
+            await execution.updater.reject(new_agent_text_message(str(error)))
+            execution.writer.append_status_update(TaskState.rejected, str(error), final=True)
+            await execution.writer.aflush()
+            return False
+        execution.admission_ticket = None
+        if not admitted:
+            # Canceled while queued; cancel() already emitted the status.
+            self._append_cancellation_transcript(execution)
+        return admitted
+
+    async def _run_execution(self, turn: Turn, task: Task, execution: ActiveExecution) -> None:
+        context_id = execution.context_id
+        updater = execution.updater
+        writer = execution.writer
+        query = turn.query
+
+        msg_history = self._load_history(context_id)
+
+        for turn_query in turn.queries:
+            self.session_store.append_chat_message(context_id, "user", turn_query)
 
-        await event_queue.enqueue_event(task)
         await updater.update_status(
             TaskState.working, message=new_agent_text_message(f"Recieved new task with query: {query}")
         )
@@ -105,6 +241,7 @@ class PyAIAgentExecutor(AgentExecutor):
         cur_artifact_id = None
         thinking_artifact_id = None
         tool_calls: dict[str, dict[str, object | None]] = {}
+        coalescer = DeltaCoalescer(window_s=self.delta_window_s, max_chars=self.delta_max_chars)
         langfuse = None
         trace_span = None
         try:
@@ -115,29 +252,81 @@ class PyAIAgentExecutor(AgentExecutor):
                 session_id=context_id,
                 input=query,
             )
-            send_stream, receive_stream = anyio.create_memory_object_stream()
+            send_stream, receive_stream = anyio.create_memory_object_stream[Any](self.event_buffer_size)
 
             async def event_stream_handler(_ctx, events):
                 async for event in events:
                     if isinstance(event, PartEndEvent) and isinstance(event.part, TextPart):
                         trace_span.update_trace(output=event.part.content)
+                    # A full buffer means the agent run waits on artifact emission and persistence.
+                    if send_stream.statistics().current_buffer_used >= self.event_buffer_size:
+                        self._event_buffer_full_sends += 1
                     await send_stream.send(event)
+                    self._event_buffer_high_water = max(
+                        self._event_buffer_high_water, send_stream.statistics().current_buffer_used
+                    )
 
             async def run_agent():
                 async with send_stream:
                     agent_with_deps = cast(Any, self.agent)
-                    return await agent_with_deps.run(
-                        query,
-                        message_history=msg_history,
-                        event_stream_handler=event_stream_handler,
-                    )
+                    with todo_scope(context_id):
+                        return await agent_with_deps.run(
+                            query,
+                            message_history=msg_history,
+                            event_stream_handler=event_stream_handler,
+                        )
+
+            async def emit_delta(delta: PendingDelta) -> None:
+                text = delta.text
+                await updater.add_artifact(
+                    [simple_text_part(text)],
+                    name=delta.name,
+                    append=True,
+                    artifact_id=delta.artifact_id,
+                )
+                writer.append_artifact_text(
+                    artifact_id=delta.artifact_id,
+                    name=delta.name,
+                    text=text,
+                    append=True,
+                )
+
+            async def flush_deltas() -> None:
+                pending = coalescer.drain()
+                if pending is not None:
+                    await emit_delta(pending)
+
+            async def next_event() -> Any | None:
+                # Wake up when held deltas are due even if the model goes quiet.
+                time_left = coalescer.time_left()
+                if time_left is None:
+                    return await receive_stream.receive()
+                with anyio.move_on_after(time_left):
+                    return await receive_stream.receive()
+                return None
 
             run_task = asyncio.create_task(run_agent())
             execution.run_task = run_task
 
             async with receive_stream:
-                async for event in receive_stream:
-                    pprint(event)
+                while True:
+                    try:
+                        event = await next_event()
+                    except anyio.EndOfStream:
+                        break
+                    if event is None:
+                        await flush_deltas()
+                        continue
+                    if self.event_trace.sample():
+                        self.event_trace.emit(
+                            context_id=context_id,
+                            task_id=task.id,
+                            event_kind=type(event).__name__,
+                            payload=to_jsonable_python(event, fallback=str),
+                        )
+
+                    if not isinstance(event, PartDeltaEvent):
+                        await flush_deltas()
 
                     if isinstance(event, PartStartEvent):
                         part = event.part
@@ -169,21 +358,12 @@ class PyAIAgentExecutor(AgentExecutor):
                         delta = event.delta
 
                         if isinstance(delta, TextPartDelta):
-                            await updater.add_artifact(
-                                [simple_text_part(delta.content_delta)],
-                                name="output_delta",
-                                append=True,
-                                artifact_id=cur_artifact_id,
-                            )
-                            writer.append_artifact_text(
-                                artifact_id=cur_artifact_id,
-                                name="output_delta",
-                                text=delta.content_delta,
-                                append=True,
-                            )
+                            for ready in coalescer.add(cur_artifact_id, "output_delta", delta.content_delta):
+                                await emit_delta(ready)
                         if isinstance(delta, ThinkingPartDelta):
                             content_delta = delta.content_delta if delta.content_delta else ""
                             if thinking_artifact_id is None:
+                                await flush_deltas()
                                 thinking_artifact_id = str(uuid4())
                                 await updater.add_artifact(
                                     [simple_text_part(content_delta)],
@@ -196,18 +376,8 @@ class PyAIAgentExecutor(AgentExecutor):
                                     text=content_delta,
                                 )
                             else:
-                                await updater.add_artifact(
-                                    [simple_text_part(content_delta)],
-                                    name="thinking_delta",
-                                    append=True,
-                                    artifact_id=thinking_artifact_id,
-                                )
-                                writer.append_artifact_text(
-                                    artifact_id=thinking_artifact_id,
-                                    name="thinking_delta",
-                                    text=content_delta,
-                                    append=True,
-                                )
+                                for ready in coalescer.add(thinking_artifact_id, "thinking_delta", content_delta):
+                                    await emit_delta(ready)
 
                     if isinstance(event, PartEndEvent):
                         part = event.part
@@ -320,6 +490,8 @@ class PyAIAgentExecutor(AgentExecutor):
                         )
                         writer.append_status_update(TaskState.working, "Agent thinking ...")
 
+                await flush_deltas()
+
             res = await run_task
         except asyncio.CancelledError:
             if execution.cancellation_requested:
@@ -334,9 +506,12 @@ class PyAIAgentExecutor(AgentExecutor):
             error_text = str(error)
             await updater.failed(new_agent_text_message(error_text))
             writer.append_status_update(TaskState.failed, error_text, final=True)
+            await writer.aflush()
             raise RuntimeError(error_text) from error
         finally:
             self._active_executions.pop(task.id, None)
+            self._deltas_received += coalescer.received
+            self._deltas_emitted += coalescer.emitted
 
         if res is None:
             raise ValueError("Agent produced no result")
@@ -349,7 +524,8 @@ class PyAIAgentExecutor(AgentExecutor):
         msgs = all_messages() if callable(all_messages) else []
         msgs_list = list(msgs) if isinstance(msgs, list) else []
 
-        self.session_store.save_messages(context_id, msgs_list)
+        history_size = self.session_store.save_messages(context_id, msgs_list)
+        self.history_cache.put(context_id, msgs_list, history_size, self.session_store.messages_version(context_id))
 
         writer.append_artifact_text(artifact_id=str(uuid4()), name="full_output", text=output)
 
@@ -364,6 +540,7 @@ class PyAIAgentExecutor(AgentExecutor):
 
         await updater.update_status(TaskState.completed)
         writer.append_status_update(TaskState.completed, final=True)
+        await writer.aflush()
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         task_id = context.task_id
@@ -388,11 +565,7 @@ class PyAIAgentExecutor(AgentExecutor):
                 run_task=None,
                 context_id=context_id,
                 updater=TaskUpdater(event_queue, task_id, context_id),
-                writer=SessionEventWriter(
-                    session_store=self.session_store,
-                    context_id=context_id,
-                    task_id=task_id,
-                ),
+                writer=self._create_writer(context_id, task_id),
                 cancellation_requested=True,
             )
             await self._emit_cancellation_status(fallback_execution)
@@ -400,6 +573,10 @@ class PyAIAgentExecutor(AgentExecutor):
             return
 
         execution.cancellation_requested = True
+        if execution.turn is not None:
+            self.context_turns.withdraw(context_id, execution.turn)
+        if execution.admission_ticket is not None:
+            self.admission.withdraw(execution.admission_ticket)
         if execution.run_task is not None:
             execution.run_task.cancel()
         await self._emit_cancellation_status(execution)
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class _CacheEntry:
+    messages: list[Any]
+    size_bytes: int
+    version: str | None
+
+
+class MessageHistoryCache:
+    """Bounded LRU of validated pydantic-ai histories keyed by context id.
+
+    Entries are evicted least-recently-used first once either the entry count
+    or the approximate serialized size exceeds its limit. A ``max_entries`` of
+    0 disables caching. Each entry remembers the store's ``messages_version``
+    it was read or written at, and :meth:`get` drops it once the store reports
+    another one, e.g. after the session was deleted or rewritten elsewhere.
+    """
+
+    def __init__(self, *, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def get(self, context_id: str, version: str | None = None) -> list[Any] | None:
+        entry = self._entries.get(context_id)
+        if entry is not None and entry.version != version:
+            self.invalidate(context_id)
+            self.stale += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(context_id)
+        self.hits += 1
+        return list(entry.messages)
+
+    def put(self, context_id: str, messages: list[Any], size_bytes: int, version: str | None = None) -> None:
+        self.invalidate(context_id)
+        if self.max_entries <= 0 or size_bytes > self.max_bytes:
+            return
+        self._entries[context_id] = _CacheEntry(messages=list(messages), size_bytes=size_bytes, version=version)
+        self._size_bytes += size_bytes
+        while len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size_bytes -= evicted.size_bytes
+            self.evictions += 1
+
+    def invalidate(self, context_id: str) -> None:
+        entry = self._entries.pop(context_id, None)
+        if entry is not None:
+            self._size_bytes -= entry.size_bytes
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale": self.stale,
+        }
@@ -1,22 +1,36 @@
 import os
-from pathlib import Path
 
 from a2a.server.apps import A2AFastAPIApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCapabilities, AgentCard
+from buddy.runtime.a2a.admission import AdmissionController
+from buddy.runtime.a2a.context_turns import ContextTurns
 from buddy.runtime.a2a.executor import PyAIAgentExecutor
-from buddy.shared.runtime_config import runtime_agent_card_path, runtime_extended_card_path, runtime_rpc_path
-from buddy.session_store import SessionStore
-from devtools import pprint
+from buddy.runtime.a2a.history_cache import MessageHistoryCache
+from buddy.session_backend import default_session_backend
+from buddy.shared.logging import configure_logging, emit_event, get_logger
+from buddy.shared.runtime_config import (
+    runtime_agent_card_path,
+    runtime_extended_card_path,
+    runtime_rpc_path,
+    runtime_stats_path,
+)
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from pydantic_ai import Agent
 
 load_dotenv()
 
 
-session_store = SessionStore(Path("sessions.db"))
+session_store = default_session_backend()
+logger = get_logger(__name__)
+
+
+def _delta_retention_s() -> float | None:
+    retention_hours = os.environ.get("BUDDY_SESSION_DELTA_RETENTION_HOURS")
+    return float(retention_hours) * 3600 if retention_hours else None
 
 
 def _create_agent_card(name: str, url: str) -> AgentCard:
@@ -40,28 +54,54 @@ def _create_a2a_runtime_app(
     card_url: str,
     mount_path: str,
 ) -> FastAPI:
-    request_handler = DefaultRequestHandler(
-        agent_executor=PyAIAgentExecutor(
-            agent=agent,
-            session_store=session_store,
+    agent_executor = PyAIAgentExecutor(
+        agent=agent,
+        session_store=session_store,
+        event_batch_size=int(os.environ.get("BUDDY_EVENT_WRITER_BATCH_SIZE", "1")),
+        event_flush_interval_s=float(os.environ.get("BUDDY_EVENT_WRITER_FLUSH_INTERVAL_MS", "250")) / 1000,
+        delta_retention_s=_delta_retention_s(),
+        history_cache=MessageHistoryCache(
+            max_entries=int(os.environ.get("BUDDY_HISTORY_CACHE_MAX_ENTRIES", "128")),
+            max_bytes=int(os.environ.get("BUDDY_HISTORY_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        ),
+        admission=AdmissionController(
+            max_active=int(os.environ.get("BUDDY_RUNTIME_MAX_CONCURRENT_EXECUTIONS", "0")),
+            max_queued=int(os.environ.get("BUDDY_RUNTIME_MAX_QUEUED_EXECUTIONS", "64")),
+        ),
+        context_turns=ContextTurns(
+            coalesce=os.environ.get("BUDDY_RUNTIME_COALESCE_QUEUED_MESSAGES", "").strip().lower()
+            in {"1", "true", "yes"}
         ),
+        event_buffer_size=int(os.environ.get("BUDDY_AGENT_EVENT_BUFFER_SIZE", "64")),
+        delta_window_s=float(os.environ.get("BUDDY_STREAM_DELTA_WINDOW_MS", "0")) / 1000,
+        delta_max_chars=int(os.environ.get("BUDDY_STREAM_DELTA_MAX_CHARS", "0")),
+    )
+    request_handler = DefaultRequestHandler(
+        agent_executor=agent_executor,
         task_store=InMemoryTaskStore(),
     )
 
     agent_card = _create_agent_card(card_name, card_url)
-    pprint(agent_card)
+    emit_event(logger, "runtime_agent_card", level="debug", agent_card=agent_card.model_dump(mode="json"))
     a2a_app = A2AFastAPIApplication(agent_card=agent_card, http_handler=request_handler)
 
-    return a2a_app.build(
+    app = a2a_app.build(
         agent_card_url=runtime_agent_card_path(mount_path),
         rpc_url=runtime_rpc_path(mount_path),
         extended_agent_card_url=runtime_extended_card_path(mount_path),
     )
 
+    @app.get(runtime_stats_path(mount_path))
+    async def runtime_stats() -> JSONResponse:
+        return JSONResponse(agent_executor.stats())
+
+    return app
+
 
 def create_runtime_app(agents: dict[str, Agent], *, port: int, mount_path: str) -> FastAPI:
     if not agents:
         raise RuntimeError("Runtime app requires at least one configured agent")
+    configure_logging("buddy-runtime")
 
     normalized_mount_path = runtime_rpc_path(mount_path)
     public_url = os.environ.get("BUDDY_PUBLIC_URL")
@@ -1,7 +1,10 @@
-from pathlib import Path
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Literal, TypedDict, cast
 
-from buddy.session_store import SessionStore
+from buddy.session_backend import SessionBackend, default_session_backend
 
 
 class TodoItem(TypedDict):
@@ -23,21 +26,34 @@ class TodoUpdateResult(TypedDict):
     todos: list[TodoItem]
 
 
-_STORE = SessionStore(Path("sessions.db"))
-_SCOPE = "default"
+# Todos are scoped to the A2A context running the tool; the executor sets it
+# for each agent run. Calls outside a run share the "default" scope.
+_SCOPE: ContextVar[str] = ContextVar("todo_scope", default="default")
 _ALLOWED_STATUS = {"pending", "in_progress", "completed", "cancelled"}
 _ALLOWED_PRIORITY = {"low", "medium", "high"}
 _REQUIRED_FIELDS = {"content", "status", "priority", "id"}
 
 
+def _store() -> SessionBackend:
+    return default_session_backend()
+
+
+@contextmanager
+def todo_scope(scope: str) -> Iterator[None]:
+    """Route todo tool calls made inside the block to ``scope``."""
+    token = _SCOPE.set(scope)
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
 def get_todos() -> list[TodoItem]:
-    todos = _STORE.load_todos(_SCOPE)
-    filtered = [todo for todo in todos if isinstance(todo, dict)]
-    return cast(list[TodoItem], filtered)
+    return cast(list[TodoItem], _store().load_todos(_SCOPE.get()))
 
 
 def set_todos(todos: list[TodoItem]) -> None:
-    _STORE.save_todos(_SCOPE, [dict(todo) for todo in todos])
+    _store().save_todos(_SCOPE.get(), [dict(todo) for todo in todos])
 
 
 def validate_todo_item(item: TodoItem, index: int) -> None:
@@ -85,8 +101,8 @@ def validate_todo_patch(patch: TodoPatch) -> None:
 
 
 def validate_unique_ids(todos: list[TodoItem]) -> None:
-    ids = [todo["id"] for todo in todos]
-    duplicates = sorted({todo_id for todo_id in ids if ids.count(todo_id) > 1})
+    counts = Counter(todo["id"] for todo in todos)
+    duplicates = sorted(todo_id for todo_id, count in counts.items() if count > 1)
     if duplicates:
         msg = f"Duplicate todo id(s): {', '.join(duplicates)}"
         raise ValueError(msg)
@@ -119,10 +135,8 @@ def add_todos(todos: list[TodoItem]) -> list[TodoItem]:
         used_ids.add(normalized_id)
         normalized_new_todos.append(normalized_item)
 
-    updated = [*current, *normalized_new_todos]
-    validate_unique_ids(updated)
-    set_todos(updated)
-    return updated
+    _store().append_todos(_SCOPE.get(), [dict(todo) for todo in normalized_new_todos])
+    return [*current, *normalized_new_todos]
 
 
 def _next_available_id(base_id: str, used_ids: set[str]) -> str:
@@ -140,47 +154,28 @@ def _next_available_id(base_id: str, used_ids: set[str]) -> str:
 def update_todo(todo_id: str, patch: TodoPatch) -> TodoUpdateResult:
     validate_todo_patch(patch)
 
-    current = get_todos()
-    updated: list[TodoItem] = []
-    before_item: TodoItem | None = None
-    after_item: TodoItem | None = None
-    found = False
-
-    for item in current:
-        if item["id"] != todo_id:
-            updated.append(item)
-            continue
-
-        found = True
-        before_item = {
-            "id": item["id"],
-            "content": item["content"],
-            "status": item["status"],
-            "priority": item["priority"],
-        }
-        next_item: TodoItem = {
-            "id": item["id"],
-            "content": patch.get("content", item["content"]),
-            "status": patch.get("status", item["status"]),
-            "priority": patch.get("priority", item["priority"]),
-        }
-        validate_todo_item(next_item, 0)
-        after_item = next_item
-        updated.append(next_item)
-
-    if not found:
+    scope = _SCOPE.get()
+    stored = _store().load_todo(scope, todo_id)
+    if stored is None:
         msg = f"Todo with id '{todo_id}' not found"
         raise ValueError(msg)
 
-    set_todos(updated)
-    if before_item is None or after_item is None:
+    before_item = cast(TodoItem, stored)
+    after_item: TodoItem = {
+        "id": before_item["id"],
+        "content": patch.get("content", before_item["content"]),
+        "status": patch.get("status", before_item["status"]),
+        "priority": patch.get("priority", before_item["priority"]),
+    }
+    validate_todo_item(after_item, 0)
+    if not _store().update_todo(scope, todo_id, dict(patch)):
         msg = f"Todo with id '{todo_id}' not found"
         raise ValueError(msg)
 
     return {
         "before": before_item,
         "after": after_item,
-        "todos": updated,
+        "todos": get_todos(),
     }
 
 
@@ -200,6 +195,5 @@ def delete_todos(ids: list[str]) -> list[TodoItem]:
         msg = f"Todo id(s) not found: {', '.join(missing)}"
         raise ValueError(msg)
 
-    updated = [item for item in current if item["id"] not in unique_ids]
-    set_todos(updated)
-    return updated
+    _store().delete_todos(_SCOPE.get(), sorted(unique_ids))
+    return [item for item in current if item["id"] not in unique_ids]
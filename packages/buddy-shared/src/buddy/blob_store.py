@@ -0,0 +1,73 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+BLOB_REF_KEY = "$buddy_blob"
+BLOB_REF_MARKER = f'"{BLOB_REF_KEY}"'
+
+
+class BlobStore:
+    """Content-addressed files keyed by the sha256 of their bytes.
+
+    Writing the same content twice is a no-op, so repeated payloads across
+    sessions are stored once.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return self._path(digest).read_bytes()
+
+    def delete(self, digest: str) -> None:
+        self._path(digest).unlink(missing_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        if len(digest) != 64 or not all(char in "0123456789abcdef" for char in digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self._root / digest[:2] / digest[2:]
+
+
+def externalize_large_strings(value: Any, blob_store: BlobStore, threshold: int, digests: set[str]) -> Any:
+    """Return ``value`` with strings longer than ``threshold`` replaced by blob references."""
+    if isinstance(value, str):
+        if len(value) <= threshold:
+            return value
+        digest = blob_store.put(value.encode("utf-8"))
+        digests.add(digest)
+        return {BLOB_REF_KEY: digest, "size": len(value)}
+    if isinstance(value, dict):
+        return {key: externalize_large_strings(item, blob_store, threshold, digests) for key, item in value.items()}
+    if isinstance(value, list):
+        return [externalize_large_strings(item, blob_store, threshold, digests) for item in value]
+    return value
+
+
+def resolve_blob_refs(value: Any, blob_store: BlobStore) -> Any:
+    """Inverse of :func:`externalize_large_strings`."""
+    if isinstance(value, dict):
+        digest = value.get(BLOB_REF_KEY)
+        if isinstance(digest, str) and len(value) == 2 and "size" in value:
+            return blob_store.get(digest).decode("utf-8")
+        return {key: resolve_blob_refs(item, blob_store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_blob_refs(item, blob_store) for item in value]
+    return value
@@ -0,0 +1,228 @@
+import os
+from collections.abc import Callable
+from datetime import datetime
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Literal
+
+from buddy.blob_store import BLOB_REF_KEY
+from buddy.session_store import SessionStore
+from buddy.session_summary import TOOL_CALL_ARTIFACT
+from buddy.shared import fast_json
+
+AnalyticsFormat = Literal["parquet", "arrow"]
+
+TOOL_RESULT_ARTIFACT = "tool_result"
+_STATE_FILE = "_state.json"
+
+
+def _pyarrow() -> Any:
+    try:
+        return import_module("pyarrow")
+    except ImportError as error:
+        raise RuntimeError("Analytics export needs pyarrow: install buddy-shared[analytics]") from error
+
+
+def _timestamp(value: object) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _result_chars(result: object) -> int:
+    if isinstance(result, dict) and BLOB_REF_KEY in result:
+        return int(result.get("size", 0))
+    return len(result) if isinstance(result, str) else len(fast_json.dumps(result))
+
+
+class _EventFlattener:
+    """Turns status updates and tool artifacts into flat rows, skipping everything else.
+
+    Tool latency is the gap between the persisted call and result events of
+    one export run; results whose call was exported earlier get no latency.
+    """
+
+    def __init__(self) -> None:
+        self._call_times: dict[tuple[str, str], datetime] = {}
+
+    def __call__(self, row: dict[str, Any]) -> dict[str, Any] | None:
+        payload = row["payload"]
+        created_at = _timestamp(row["created_at"])
+        flat: dict[str, Any] = {
+            "event_id": row["id"],
+            "session_id": row["session_id"],
+            "task_id": row["task_id"],
+            "event_index": row["event_index"],
+            "created_at": created_at,
+        }
+        if payload.get("kind") == "status-update":
+            status = payload.get("status") or {}
+            return {**flat, "kind": "status", "state": status.get("state"), "final": bool(payload.get("final"))}
+        artifact = payload.get("artifact") or {}
+        if artifact.get("name") not in {TOOL_CALL_ARTIFACT, TOOL_RESULT_ARTIFACT}:
+            return None
+        parts = artifact.get("parts") or [{}]
+        data = parts[0].get("data") or {}
+        call_key = (row["session_id"], str(data.get("toolCallId")))
+        flat |= {
+            "kind": artifact["name"],
+            "tool_name": data.get("toolName"),
+            "tool_call_id": data.get("toolCallId"),
+            "args_json": fast_json.dumps(data.get("args")),
+        }
+        if artifact["name"] == TOOL_CALL_ARTIFACT:
+            if created_at is not None:
+                self._call_times[call_key] = created_at
+            return flat
+        called_at = self._call_times.pop(call_key, None)
+        return flat | {
+            "ok": bool(data.get("ok")),
+            "result_chars": _result_chars(data.get("result")),
+            "latency_ms": (created_at - called_at).total_seconds() * 1000 if created_at and called_at else None,
+        }
+
+
+def _flatten_model_response(row: dict[str, Any]) -> dict[str, Any] | None:
+    payload = row["payload"]
+    if payload.get("kind") != "response":
+        return None
+    usage = payload.get("usage") or {}
+    return {
+        "message_id": row["id"],
+        "session_id": row["session_id"],
+        "message_index": row["message_index"],
+        "created_at": _timestamp(payload.get("timestamp")) or _timestamp(row["created_at"]),
+        "model_name": payload.get("model_name"),
+        "finish_reason": payload.get("finish_reason"),
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens"),
+        "cache_read_tokens": usage.get("cache_read_tokens"),
+        "cache_write_tokens": usage.get("cache_write_tokens"),
+    }
+
+
+def _schemas(pa: Any) -> dict[str, Any]:
+    timestamp = pa.timestamp("us", tz="UTC")
+    return {
+        "events": pa.schema([
+            ("event_id", pa.int64()),
+            ("session_id", pa.string()),
+            ("task_id", pa.string()),
+            ("event_index", pa.int64()),
+            ("created_at", timestamp),
+            ("kind", pa.string()),
+            ("state", pa.string()),
+            ("final", pa.bool_()),
+            ("tool_name", pa.string()),
+            ("tool_call_id", pa.string()),
+            ("args_json", pa.string()),
+            ("ok", pa.bool_()),
+            ("result_chars", pa.int64()),
+            ("latency_ms", pa.float64()),
+        ]),
+        "model_responses": pa.schema([
+            ("message_id", pa.int64()),
+            ("session_id", pa.string()),
+            ("message_index", pa.int64()),
+            ("created_at", timestamp),
+            ("model_name", pa.string()),
+            ("finish_reason", pa.string()),
+            ("input_tokens", pa.int64()),
+            ("output_tokens", pa.int64()),
+            ("cache_read_tokens", pa.int64()),
+            ("cache_write_tokens", pa.int64()),
+        ]),
+    }
+
+
+class _PartWriter:
+    """Writes one part file per dataset and run, renamed into place on close."""
+
+    def __init__(self, pa: Any, path: Path, schema: Any, file_format: AnalyticsFormat) -> None:
+        self._pa = pa
+        self._path = path
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        self._schema = schema
+        self._format = file_format
+        self._writer: Any = None
+        self._sink: Any = None
+        self.rows = 0
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        if self._writer is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            if self._format == "parquet":
+                parquet = import_module("pyarrow.parquet")
+                self._writer = parquet.ParquetWriter(self._tmp_path, self._schema)
+            else:
+                self._sink = self._pa.OSFile(str(self._tmp_path), "wb")
+                self._writer = self._pa.ipc.new_file(self._sink, self._schema)
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+        self.rows += len(rows)
+
+    def close(self, *, commit: bool) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        if commit:
+            os.replace(self._tmp_path, self._path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def export_analytics(
+    store: SessionStore,
+    output_dir: Path,
+    *,
+    file_format: AnalyticsFormat = "parquet",
+    batch_size: int = 10_000,
+) -> dict[str, int]:
+    """Append rows stored since the previous run to columnar datasets under ``output_dir``.
+
+    ``events/`` holds status updates and tool calls/results, ``model_responses/``
+    per-response token usage. Each run adds at most one part file per dataset,
+    written ``batch_size`` source rows per record batch. The high-water marks
+    are saved to ``_state.json`` only after all parts are in place, so a failed
+    run is simply repeated. Returns the number of rows written per dataset.
+    """
+    pa = _pyarrow()
+    schemas = _schemas(pa)
+    state_path = output_dir / _STATE_FILE
+    state = fast_json.loads(state_path.read_text()) if state_path.exists() else {}
+    extension = "parquet" if file_format == "parquet" else "arrow"
+    sources: dict[str, tuple[Callable[[int, int], list[dict[str, Any]]], Callable[..., dict[str, Any] | None]]] = {
+        "events": (store.scan_events, _EventFlattener()),
+        "model_responses": (store.scan_messages, _flatten_model_response),
+    }
+    written: dict[str, int] = {}
+    writers: list[_PartWriter] = []
+    try:
+        for dataset, (scan, flatten) in sources.items():
+            after_id = int(state.get(dataset, 0))
+            writer = _PartWriter(
+                pa, output_dir / dataset / f"part-{after_id + 1:012d}.{extension}", schemas[dataset], file_format
+            )
+            writers.append(writer)
+            while rows := scan(after_id, batch_size):
+                writer.write([flat for row in rows if (flat := flatten(row)) is not None])
+                after_id = rows[-1]["id"]
+            state[dataset] = after_id
+            written[dataset] = writer.rows
+    except BaseException:
+        for writer in writers:
+            writer.close(commit=False)
+        raise
+    for writer in writers:
+        writer.close(commit=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tmp_state = state_path.with_name(f".{_STATE_FILE}.tmp")
+    tmp_state.write_text(fast_json.dumps(state))
+    os.replace(tmp_state, state_path)
+    return written
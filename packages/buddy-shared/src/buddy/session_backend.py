@@ -0,0 +1,85 @@
+import os
+from functools import cache
+from pathlib import Path
+from typing import Any, Literal, Protocol, cast, get_args
+
+from buddy.session_log import SegmentedLogStore
+from buddy.session_store import SessionStore
+
+SessionBackendKind = Literal["sqlite", "log"]
+
+_DEFAULT_PATHS: dict[SessionBackendKind, Path] = {
+    "sqlite": Path("sessions.db"),
+    "log": Path("sessions-log"),
+}
+
+
+class SessionBackend(Protocol):
+    """Storage used by the agent runtime for conversation state.
+
+    :class:`~buddy.session_store.SessionStore` (SQLite) implements it along
+    with the query, search, fork and export APIs the control plane needs;
+    :class:`~buddy.session_log.SegmentedLogStore` implements only this
+    surface, trading those for append-only writes.
+    """
+
+    def close(self) -> None: ...
+
+    def append_chat_message(self, session_id: str, role: str, content: str) -> None: ...
+
+    def load_chat_messages(self, session_id: str) -> list[dict[str, str]]: ...
+
+    def load_messages(self, session_id: str) -> list[Any]: ...
+
+    def messages_size(self, session_id: str) -> int: ...
+
+    def messages_version(self, session_id: str) -> str | None: ...
+
+    def save_messages(self, session_id: str, messages: list[Any] | object) -> int: ...
+
+    def allocate_event_indexes(self, session_id: str, count: int = 1) -> int: ...
+
+    def append_events(self, session_id: str, events: list[tuple[int, dict[str, Any]]]) -> None: ...
+
+    def load_events(
+        self, session_id: str, *, after_index: int | None = None, limit: int | None = None
+    ) -> list[dict[str, Any]]: ...
+
+    def compact_task(self, session_id: str, task_id: str) -> int: ...
+
+    def prune_compacted_events(self, older_than_s: float) -> int: ...
+
+    def load_todos(self, scope: str) -> list[dict[str, Any]]: ...
+
+    def load_todo(self, scope: str, todo_id: str) -> dict[str, Any] | None: ...
+
+    def save_todos(self, scope: str, todos: list[dict[str, Any]]) -> None: ...
+
+    def append_todos(self, scope: str, todos: list[dict[str, Any]]) -> None: ...
+
+    def update_todo(self, scope: str, todo_id: str, fields: dict[str, Any]) -> bool: ...
+
+    def delete_todos(self, scope: str, todo_ids: list[str]) -> int: ...
+
+
+def open_session_backend(kind: str, path: Path | None = None) -> SessionBackend:
+    """Open the ``kind`` backend at ``path`` (``sessions.db`` or ``sessions-log/`` by default)."""
+    kinds = get_args(SessionBackendKind)
+    if kind not in kinds:
+        raise ValueError(f"Unknown session backend '{kind}'; expected one of: {', '.join(kinds)}")
+    path = path or _DEFAULT_PATHS[cast(SessionBackendKind, kind)]
+    if kind == "log":
+        return SegmentedLogStore(path)
+    return SessionStore(path)
+
+
+@cache
+def default_session_backend() -> SessionBackend:
+    """Return the process-wide backend chosen by ``BUDDY_SESSION_BACKEND`` and ``BUDDY_SESSION_PATH``.
+
+    Every component of one process shares this instance; the log backend
+    in particular must not be opened twice on the same directory.
+    """
+    kind = os.environ.get("BUDDY_SESSION_BACKEND", "sqlite")
+    path = os.environ.get("BUDDY_SESSION_PATH")
+    return open_session_backend(kind, Path(path) if path else None)
@@ -0,0 +1,125 @@
+import json
+import zlib
+
+# Stored payloads are either plain JSON text (TEXT column value) or a BLOB whose
+# first byte names the encoding. Never change a dictionary in place: add a new
+# prefix so rows written with the old one stay readable.
+_ZLIB_DICT_V1_PREFIX = b"\x01"
+_ZLIB_DICT_V2_PREFIX = b"\x02"
+_COMPRESSION_LEVEL = 3
+_MIN_COMPRESS_SIZE = 96
+
+_DICTIONARY_SAMPLES: tuple[object, ...] = (
+    {
+        "parts": [
+            {
+                "content": "",
+                "timestamp": "2025-01-01T00:00:00.000000Z",
+                "dynamic_ref": None,
+                "part_kind": "system-prompt",
+            },
+            {"content": "", "timestamp": "2025-01-01T00:00:00.000000Z", "part_kind": "user-prompt"},
+        ],
+        "instructions": None,
+        "kind": "request",
+    },
+    {
+        "parts": [
+            {"tool_name": "", "args": {}, "tool_call_id": "", "part_kind": "tool-call"},
+            {"content": "", "id": None, "signature": None, "provider_name": None, "part_kind": "thinking"},
+            {"content": "", "id": None, "part_kind": "text"},
+        ],
+        "usage": {
+            "input_tokens": 0,
+            "cache_write_tokens": 0,
+            "cache_read_tokens": 0,
+            "output_tokens": 0,
+            "input_audio_tokens": 0,
+            "cache_audio_read_tokens": 0,
+            "output_audio_tokens": 0,
+            "details": {},
+        },
+        "model_name": "",
+        "timestamp": "2025-01-01T00:00:00.000000Z",
+        "kind": "response",
+        "provider_name": "",
+        "provider_details": None,
+        "provider_response_id": "",
+        "finish_reason": "stop",
+    },
+    {
+        "parts": [
+            {
+                "tool_name": "",
+                "content": "",
+                "tool_call_id": "",
+                "metadata": None,
+                "timestamp": "2025-01-01T00:00:00.000000Z",
+                "part_kind": "tool-return",
+            }
+        ],
+        "kind": "request",
+    },
+    {
+        "kind": "status-update",
+        "contextId": "",
+        "taskId": "",
+        "final": False,
+        "status": {
+            "state": "working",
+            "message": {"kind": "message", "messageId": "", "role": "agent", "parts": [{"kind": "text", "text": ""}]},
+        },
+    },
+    {
+        "kind": "artifact-update",
+        "contextId": "",
+        "taskId": "",
+        "artifact": {
+            "artifactId": "",
+            "name": "tool_result",
+            "parts": [
+                {
+                    "kind": "data",
+                    "data": {"toolName": "", "toolCallId": "", "args": {}, "result": "", "ok": True},
+                }
+            ],
+        },
+    },
+    {
+        "kind": "artifact-update",
+        "contextId": "",
+        "taskId": "",
+        "artifact": {"artifactId": "", "name": "output_delta", "parts": [{"kind": "text", "text": ""}]},
+        "append": True,
+    },
+)
+
+# zlib favours matches near the end of the dictionary, so the hottest shape
+# (streamed deltas) goes last.
+ZLIB_DICT_V1 = "".join(json.dumps(sample) for sample in _DICTIONARY_SAMPLES).encode("utf-8")
+# Same samples in the compact form written by ``buddy.shared.fast_json``.
+ZLIB_DICT_V2 = "".join(
+    json.dumps(sample, separators=(",", ":"), ensure_ascii=False) for sample in _DICTIONARY_SAMPLES
+).encode("utf-8")
+
+_DICTIONARIES = {_ZLIB_DICT_V1_PREFIX: ZLIB_DICT_V1, _ZLIB_DICT_V2_PREFIX: ZLIB_DICT_V2}
+
+
+def encode_payload(payload_json: str, *, compress: bool) -> str | bytes:
+    """Return the column value to store for ``payload_json``."""
+    if not compress or len(payload_json) < _MIN_COMPRESS_SIZE:
+        return payload_json
+    compressor = zlib.compressobj(_COMPRESSION_LEVEL, zdict=ZLIB_DICT_V2)
+    encoded = compressor.compress(payload_json.encode("utf-8")) + compressor.flush()
+    return _ZLIB_DICT_V2_PREFIX + encoded
+
+
+def decode_payload(value: str | bytes) -> str:
+    """Return the JSON text for a stored column value in any supported encoding."""
+    if isinstance(value, str):
+        return value
+    dictionary = _DICTIONARIES.get(value[:1])
+    if dictionary is not None:
+        decompressor = zlib.decompressobj(zdict=dictionary)
+        return (decompressor.decompress(value[1:]) + decompressor.flush()).decode("utf-8")
+    raise ValueError(f"Unknown session payload encoding: {value[:1]!r}")
@@ -0,0 +1,340 @@
+import mmap
+import threading
+from bisect import bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from importlib import import_module
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from buddy.shared import fast_json
+from buddy.shared.logging import emit_event, get_logger
+
+_SEGMENT_BYTES = 64 * 1024 * 1024
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".jsonl"
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class _Location:
+    segment: int
+    offset: int
+    length: int
+
+
+@dataclass(slots=True)
+class _LogMessage:
+    location: _Location
+    content_hash: str
+    size: int
+
+
+@dataclass(slots=True)
+class _LogSession:
+    chat: list[_Location] = field(default_factory=list)
+    messages: list[_LogMessage] = field(default_factory=list)
+    # (event_index, location), kept sorted by index.
+    events: list[tuple[int, _Location]] = field(default_factory=list)
+    next_event_index: int = 0
+
+
+def _event_key(entry: tuple[int, _Location]) -> int:
+    return entry[0]
+
+
+class SegmentedLogStore:
+    """Append-only session storage in JSONL segment files.
+
+    Every write appends one line per record to the newest ``segment-*.jsonl``
+    file under ``root``, starting a new segment once ``segment_bytes`` is
+    exceeded. Opening the store replays all segments into an in-memory index
+    of record locations, and reads slice memory-mapped segments. Records are
+    never rewritten, so there is no compaction, blob externalization, search
+    or forking; use :class:`~buddy.session_store.SessionStore` for those.
+    """
+
+    def __init__(self, root: Path, *, segment_bytes: int = _SEGMENT_BYTES) -> None:
+        self._root = root
+        self._segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._sessions: dict[str, _LogSession] = {}
+        # Insertion order of each scope's dict is the todo order.
+        self._todos: dict[str, dict[str, dict[str, Any]]] = {}
+        self._maps: dict[int, mmap.mmap] = {}
+        self._file: BinaryIO | None = None
+        root.mkdir(parents=True, exist_ok=True)
+        segments = sorted(
+            int(path.name[len(_SEGMENT_PREFIX) : -len(_SEGMENT_SUFFIX)])
+            for path in root.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}")
+        )
+        for segment in segments:
+            self._replay(segment)
+        self._segment = segments[-1] if segments else 1
+        self._offset = self._segment_path(self._segment).stat().st_size if segments else 0
+
+    def close(self) -> None:
+        """Close the open segment and unmap all segments; later calls reopen them."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps = {}
+
+    def append_chat_message(self, session_id: str, role: str, content: str) -> None:
+        self._append([{"op": "chat", "session": session_id, "role": role, "content": content, "at": _now()}])
+
+    def load_chat_messages(self, session_id: str) -> list[dict[str, str]]:
+        with self._lock:
+            locations = list(self._session(session_id).chat)
+        messages = []
+        for position, location in enumerate(locations, start=1):
+            record = self._read(location)
+            messages.append({"id": str(position), "role": record["role"], "content": record["content"]})
+        return messages
+
+    def load_messages(self, session_id: str) -> list[Any]:
+        with self._lock:
+            locations = [message.location for message in self._session(session_id).messages]
+        if not locations:
+            return []
+        pydantic_ai = import_module("pydantic_ai")
+        return pydantic_ai.ModelMessagesTypeAdapter.validate_python([
+            self._read(location)["message"] for location in locations
+        ])
+
+    def messages_size(self, session_id: str) -> int:
+        with self._lock:
+            return sum(message.size for message in self._session(session_id).messages)
+
+    def messages_version(self, session_id: str) -> str | None:
+        """Return a marker that changes whenever the stored history changes, or None without one."""
+        with self._lock:
+            messages = self._session(session_id).messages
+            if not messages:
+                return None
+            last = messages[-1].location
+            return f"{len(messages)}:{last.segment}:{last.offset}"
+
+    def save_messages(self, session_id: str, messages: list[Any] | object) -> int:
+        """Append the part of ``messages`` that differs from the stored history.
+
+        A ``message`` record at index ``i`` supersedes everything stored from
+        ``i`` on, so only the new suffix is written. Returns the serialized
+        size of the saved history in bytes.
+        """
+        pydantic_core = import_module("pydantic_core")
+        payloads = pydantic_core.to_jsonable_python(messages)
+        message_payloads = [item for item in payloads if isinstance(item, dict)] if isinstance(payloads, list) else []
+        message_jsons = [fast_json.dumps(item) for item in message_payloads]
+        content_hashes = [
+            fast_json.content_hash(payload, message_json)
+            for payload, message_json in zip(message_payloads, message_jsons, strict=True)
+        ]
+        with self._lock:
+            stored = [message.content_hash for message in self._session(session_id).messages]
+        kept = 0
+        for stored_hash, content_hash in zip(stored, content_hashes, strict=False):
+            if stored_hash != content_hash:
+                break
+            kept += 1
+        records: list[dict[str, Any]] = [
+            {
+                "op": "message",
+                "session": session_id,
+                "index": index,
+                "hash": content_hashes[index],
+                "size": len(message_jsons[index]),
+                "message": message_payloads[index],
+            }
+            for index in range(kept, len(message_payloads))
+        ]
+        if not records and kept < len(stored):
+            records.append({"op": "truncate_messages", "session": session_id, "keep": kept})
+        self._append(records)
+        return sum(len(message_json) for message_json in message_jsons)
+
+    def allocate_event_indexes(self, session_id: str, count: int = 1) -> int:
+        with self._lock:
+            session = self._session(session_id)
+            start = session.next_event_index
+            session.next_event_index += count
+        return start
+
+    def append_events(self, session_id: str, events: list[tuple[int, dict[str, Any]]]) -> None:
+        now = _now()
+        self._append([
+            {"op": "event", "session": session_id, "index": event_index, "at": now, "payload": payload}
+            for event_index, payload in events
+        ])
+
+    def append_event(self, session_id: str, event_index: int, payload: dict[str, Any]) -> None:
+        self.append_events(session_id, [(event_index, payload)])
+
+    def load_events(
+        self, session_id: str, *, after_index: int | None = None, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            events = self._session(session_id).events
+            start = bisect_right(events, after_index, key=_event_key) if after_index is not None else 0
+            stop = start + limit if limit is not None else len(events)
+            locations = [location for _, location in events[start:stop]]
+        return [self._read(location)["payload"] for location in locations]
+
+    def compact_task(self, session_id: str, task_id: str) -> int:
+        """Streamed artifacts are kept as logged; there is nothing to materialize."""
+        return 0
+
+    def prune_compacted_events(self, older_than_s: float) -> int:
+        return 0
+
+    def load_todos(self, scope: str) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(todo) for todo in self._todos.get(scope, {}).values()]
+
+    def load_todo(self, scope: str, todo_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            todo = self._todos.get(scope, {}).get(todo_id)
+            return dict(todo) if todo is not None else None
+
+    def save_todos(self, scope: str, todos: list[dict[str, Any]]) -> None:
+        self._append([{"op": "todos", "scope": scope, "todos": [_todo_item(todo) for todo in todos]}])
+
+    def append_todos(self, scope: str, todos: list[dict[str, Any]]) -> None:
+        self._append([{"op": "todo", "scope": scope, "todo": _todo_item(todo)} for todo in todos])
+
+    def update_todo(self, scope: str, todo_id: str, fields: dict[str, Any]) -> bool:
+        changes = {key: fields[key] for key in ("content", "status", "priority") if key in fields}
+        # Read and append under one lock so concurrent updates see each other's changes.
+        with self._lock:
+            todo = self._todos.get(scope, {}).get(todo_id)
+            if todo is None:
+                return False
+            self._append_locked([{"op": "todo", "scope": scope, "todo": todo | changes}])
+        return True
+
+    def delete_todos(self, scope: str, todo_ids: list[str]) -> int:
+        with self._lock:
+            existing = [todo_id for todo_id in todo_ids if todo_id in self._todos.get(scope, {})]
+            if existing:
+                self._append_locked([{"op": "todo_delete", "scope": scope, "ids": existing}])
+        return len(existing)
+
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        lines = _encode(records)
+        with self._lock:
+            self._write(records, lines)
+
+    def _append_locked(self, records: list[dict[str, Any]]) -> None:
+        self._write(records, _encode(records))
+
+    def _write(self, records: list[dict[str, Any]], lines: list[bytes]) -> None:
+        if not records:
+            return
+        if self._offset and self._offset + sum(len(line) for line in lines) > self._segment_bytes:
+            self._roll_segment()
+        if self._file is None:
+            self._file = self._segment_path(self._segment).open("ab")
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        offset = self._offset
+        for record, line in zip(records, lines, strict=True):
+            self._apply(record, _Location(self._segment, offset, len(line)))
+            offset += len(line)
+        self._offset = offset
+
+    def _roll_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._segment += 1
+        self._offset = 0
+
+    def _replay(self, segment: int) -> None:
+        path = self._segment_path(segment)
+        offset = 0
+        with path.open("rb") as lines:
+            for line in lines:
+                if not line.endswith(b"\n"):
+                    # A torn trailing line from a crash mid-write is dropped below.
+                    break
+                location = _Location(segment, offset, len(line))
+                offset += len(line)
+                try:
+                    record = fast_json.loads(line)
+                    self._apply(record, location)
+                except (ValueError, TypeError, KeyError) as error:
+                    emit_event(
+                        logger,
+                        "session_log_record_skipped",
+                        level="warning",
+                        segment=path.name,
+                        offset=location.offset,
+                        error_type=type(error).__name__,
+                    )
+        if offset < path.stat().st_size:
+            with path.open("r+b") as torn:
+                torn.truncate(offset)
+
+    def _apply(self, record: dict[str, Any], location: _Location) -> None:
+        op = record["op"]
+        if op in {"todos", "todo", "todo_delete"}:
+            todos = self._todos.setdefault(record["scope"], {})
+            if op == "todos":
+                todos.clear()
+                todos.update((todo["id"], todo) for todo in record["todos"])
+            elif op == "todo":
+                todos[record["todo"]["id"]] = record["todo"]
+            else:
+                for todo_id in record["ids"]:
+                    todos.pop(todo_id, None)
+            return
+        session = self._session(record["session"])
+        if op == "chat":
+            session.chat.append(location)
+        elif op == "message":
+            del session.messages[record["index"] :]
+            session.messages.append(_LogMessage(location, record["hash"], record["size"]))
+        elif op == "truncate_messages":
+            del session.messages[record["keep"] :]
+        elif op == "event":
+            insort(session.events, (record["index"], location), key=_event_key)
+            session.next_event_index = max(session.next_event_index, record["index"] + 1)
+
+    def _read(self, location: _Location) -> dict[str, Any]:
+        end = location.offset + location.length
+        with self._lock:
+            segment_map = self._maps.get(location.segment)
+            if segment_map is None or len(segment_map) < end:
+                # The active segment grew since it was mapped.
+                if segment_map is not None:
+                    segment_map.close()
+                with self._segment_path(location.segment).open("rb") as segment_file:
+                    segment_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[location.segment] = segment_map
+            data = segment_map[location.offset : end]
+        return fast_json.loads(data)
+
+    def _session(self, session_id: str) -> _LogSession:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _LogSession()
+        return session
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._root / f"{_SEGMENT_PREFIX}{segment:08d}{_SEGMENT_SUFFIX}"
+
+
+def _encode(records: list[dict[str, Any]]) -> list[bytes]:
+    return [fast_json.dumps_bytes(record) + b"\n" for record in records]
+
+
+def _todo_item(todo: dict[str, Any]) -> dict[str, Any]:
+    return {"id": todo["id"], "content": todo["content"], "status": todo["status"], "priority": todo["priority"]}
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
@@ -0,0 +1,368 @@
+import json
+import sqlite3
+from collections.abc import Callable
+
+from buddy.blob_store import BLOB_REF_MARKER
+from buddy.session_codec import decode_payload
+from buddy.session_search import (
+    SOURCE_ARTIFACT,
+    SOURCE_CHAT,
+    SOURCE_EVENT,
+    artifact_search_text,
+    index_documents,
+)
+from buddy.session_summary import is_tool_call, refresh_session_summaries, task_state
+from buddy.shared import fast_json
+
+Migration = Callable[[sqlite3.Connection], None]
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS sessions("
+        " session_id TEXT PRIMARY KEY,"
+        " created_at TEXT NOT NULL,"
+        " updated_at TEXT NOT NULL,"
+        " metadata_json TEXT NOT NULL"
+        ")"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS messages("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " session_id TEXT NOT NULL,"
+        " message_index INTEGER NOT NULL,"
+        " message_json TEXT NOT NULL,"
+        " created_at TEXT NOT NULL,"
+        " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
+        ")"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS events("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " session_id TEXT NOT NULL,"
+        " event_index INTEGER NOT NULL,"
+        " event_type TEXT NOT NULL,"
+        " payload_json TEXT NOT NULL,"
+        " created_at TEXT NOT NULL,"
+        " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
+        ")"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS chat_messages("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " session_id TEXT NOT NULL,"
+        " role TEXT NOT NULL,"
+        " content TEXT NOT NULL,"
+        " created_at TEXT NOT NULL,"
+        " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
+        ")"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS todo_lists("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " scope TEXT NOT NULL UNIQUE,"
+        " todos_json TEXT NOT NULL,"
+        " updated_at TEXT NOT NULL"
+        ")"
+    )
+
+
+def _add_session_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_session_event ON events(session_id, event_index)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_message ON messages(session_id, message_index)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_session_id ON chat_messages(session_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at)")
+
+
+def _add_message_content_hash(conn: sqlite3.Connection) -> None:
+    # Existing rows keep a NULL hash; the next save of that session rewrites them.
+    conn.execute("ALTER TABLE messages ADD COLUMN content_hash TEXT")
+    conn.execute("DROP INDEX IF EXISTS idx_messages_session_message")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_session_message ON messages(session_id, message_index, content_hash)"
+    )
+
+
+def _add_materialized_artifacts(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE events ADD COLUMN task_id TEXT")
+    conn.execute("ALTER TABLE events ADD COLUMN artifact_id TEXT")
+    conn.execute(
+        "UPDATE events SET"
+        " task_id = json_extract(payload_json, '$.taskId'),"
+        " artifact_id = json_extract(payload_json, '$.artifact.artifactId')"
+        " WHERE json_valid(payload_json)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_session_task ON events(session_id, task_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_session_artifact ON events(session_id, artifact_id)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS artifacts("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " session_id TEXT NOT NULL,"
+        " task_id TEXT NOT NULL,"
+        " artifact_id TEXT NOT NULL,"
+        " event_index INTEGER NOT NULL,"
+        " last_event_index INTEGER NOT NULL,"
+        " event_count INTEGER NOT NULL,"
+        " payload_json TEXT NOT NULL,"
+        " raw_pruned INTEGER NOT NULL DEFAULT 0,"
+        " created_at TEXT NOT NULL,"
+        " UNIQUE(session_id, artifact_id),"
+        " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
+        ")"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_pending_prune ON artifacts(raw_pruned, created_at)")
+
+
+def _add_blob_refs(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS blob_refs("
+        " session_id TEXT NOT NULL,"
+        " digest TEXT NOT NULL,"
+        " PRIMARY KEY(session_id, digest),"
+        " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
+        ")"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blob_refs_digest ON blob_refs(digest)")
+
+
+def _add_event_sequences(conn: sqlite3.Connection) -> None:
+    # No foreign key: indexes may be reserved before the session's first event creates its row.
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS event_sequences( session_id TEXT PRIMARY KEY, next_index INTEGER NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO event_sequences(session_id, next_index)"
+        " SELECT session_id, MAX(event_index) + 1 FROM events GROUP BY session_id"
+    )
+
+
+def _add_search_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS search_documents("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " session_id TEXT NOT NULL,"
+        " source TEXT NOT NULL,"
+        " ref INTEGER NOT NULL,"
+        " artifact_id TEXT,"
+        " label TEXT,"
+        " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
+        ")"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_search_documents_session ON search_documents(session_id, artifact_id)")
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(text, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Cascading session deletes fire this too, so the FTS rows never outlive their document.
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS search_documents_after_delete AFTER DELETE ON search_documents"
+        " BEGIN DELETE FROM search_index WHERE rowid = old.id; END"
+    )
+    index_documents(
+        conn,
+        [
+            (session_id, SOURCE_CHAT, message_id, None, role, content)
+            for message_id, session_id, role, content in conn.execute(
+                "SELECT id, session_id, role, content FROM chat_messages ORDER BY id"
+            )
+        ],
+    )
+    materialized = {
+        (session_id, artifact_id)
+        for session_id, artifact_id in conn.execute("SELECT session_id, artifact_id FROM artifacts")
+    }
+    documents = []
+    for session_id, event_index, artifact_id, payload_json in conn.execute(
+        "SELECT session_id, event_index, artifact_id, payload_json FROM events"
+        " WHERE artifact_id IS NOT NULL ORDER BY id"
+    ):
+        if (session_id, artifact_id) in materialized:
+            continue
+        payload = json.loads(decode_payload(payload_json))
+        name = payload["artifact"].get("name")
+        documents.append((session_id, SOURCE_EVENT, event_index, artifact_id, name, artifact_search_text(payload)))
+    for session_id, event_index, artifact_id, payload_json in conn.execute(
+        "SELECT session_id, event_index, artifact_id, payload_json FROM artifacts ORDER BY id"
+    ):
+        payload = json.loads(decode_payload(payload_json))
+        name = payload["artifact"].get("name")
+        documents.append((session_id, SOURCE_ARTIFACT, event_index, artifact_id, name, artifact_search_text(payload)))
+    index_documents(conn, documents)
+
+
+def _add_session_summaries(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE sessions ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE sessions ADD COLUMN event_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE sessions ADD COLUMN last_preview TEXT")
+    conn.execute("ALTER TABLE sessions ADD COLUMN last_task_state TEXT")
+    conn.execute("ALTER TABLE sessions ADD COLUMN tool_call_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE sessions ADD COLUMN byte_size INTEGER NOT NULL DEFAULT 0")
+    refresh_session_summaries(conn)
+    states: dict[str, str] = {}
+    tool_calls: dict[str, int] = {}
+    for session_id, payload_json in conn.execute(
+        "SELECT session_id, payload_json FROM events"
+        " WHERE event_type IN ('status-update', 'artifact-update') ORDER BY session_id, event_index, id"
+    ):
+        payload = json.loads(decode_payload(payload_json))
+        state = task_state(payload)
+        if state is not None:
+            states[session_id] = state
+        if is_tool_call(payload):
+            tool_calls[session_id] = tool_calls.get(session_id, 0) + 1
+    conn.executemany(
+        "UPDATE sessions SET last_task_state = ?, tool_call_count = ? WHERE session_id = ?",
+        [
+            (states.get(session_id), tool_calls.get(session_id, 0), session_id)
+            for session_id in states.keys() | tool_calls
+        ],
+    )
+
+
+def _add_session_forks(conn: sqlite3.Connection) -> None:
+    # A fork inherits its parent's messages below parent_message_index and
+    # events below parent_event_index; only its own rows are stored under it.
+    conn.execute("ALTER TABLE sessions ADD COLUMN parent_session_id TEXT")
+    conn.execute("ALTER TABLE sessions ADD COLUMN parent_message_index INTEGER")
+    conn.execute("ALTER TABLE sessions ADD COLUMN parent_event_index INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_parent ON sessions(parent_session_id)")
+
+
+def _add_todo_items(conn: sqlite3.Connection) -> None:
+    # One row per todo instead of one JSON list per scope, so updates touch a
+    # single row. ``position`` keeps the insertion order of the old lists.
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS todo_items("
+        " scope TEXT NOT NULL,"
+        " todo_id TEXT NOT NULL,"
+        " position INTEGER NOT NULL,"
+        " content TEXT NOT NULL,"
+        " status TEXT NOT NULL,"
+        " priority TEXT NOT NULL,"
+        " updated_at TEXT NOT NULL,"
+        " PRIMARY KEY(scope, todo_id)"
+        ") WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_todo_items_scope_position ON todo_items(scope, position)")
+    for scope, todos_json, updated_at in conn.execute(
+        "SELECT scope, todos_json, updated_at FROM todo_lists"
+    ).fetchall():
+        try:
+            todos = json.loads(todos_json)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(todos, list):
+            continue
+        conn.executemany(
+            "INSERT OR IGNORE INTO todo_items(scope, todo_id, position, content, status, priority, updated_at)"
+            " VALUES(?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    scope,
+                    str(todo["id"]),
+                    position,
+                    str(todo.get("content", "")),
+                    str(todo.get("status", "pending")),
+                    str(todo.get("priority", "medium")),
+                    updated_at,
+                )
+                for position, todo in enumerate(todos)
+                if isinstance(todo, dict) and todo.get("id")
+            ],
+        )
+    conn.execute("DROP TABLE todo_lists")
+
+
+def _rehash_messages_compact_json(conn: sqlite3.Connection) -> None:
+    # Message hashes are taken over the encoded JSON, which switched to the
+    # compact ``fast_json`` form (see ``fast_json.content_hash``); without this
+    # every stored history would be rewritten on its next save. Rows holding blob references cannot be
+    # re-encoded without the blob store and are rewritten on their next save.
+    last_id = 0
+    while rows := conn.execute(
+        "SELECT id, message_json FROM messages WHERE id > ? ORDER BY id LIMIT 500", (last_id,)
+    ).fetchall():
+        updates = []
+        for row_id, value in rows:
+            message_json = decode_payload(value)
+            if BLOB_REF_MARKER not in message_json:
+                updates.append((fast_json.content_hash(json.loads(message_json)), row_id))
+        conn.executemany("UPDATE messages SET content_hash = ? WHERE id = ?", updates)
+        last_id = rows[-1][0]
+
+
+# Append only: the schema version stored in ``PRAGMA user_version`` is the
+# number of entries applied, so existing databases upgrade in place.
+MIGRATIONS: tuple[Migration, ...] = (
+    _create_base_tables,
+    _add_session_indexes,
+    _add_message_content_hash,
+    _add_materialized_artifacts,
+    _add_blob_refs,
+    _add_event_sequences,
+    _add_search_index,
+    _add_session_summaries,
+    _add_session_forks,
+    _add_todo_items,
+    _rehash_messages_compact_json,
+)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("PRAGMA user_version").fetchone()
+    return int(row[0]) if row else 0
+
+
+def incremental_auto_vacuum_enabled(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("PRAGMA auto_vacuum").fetchone()
+    return row is not None and int(row[0]) == _AUTO_VACUUM_INCREMENTAL
+
+
+def enable_incremental_auto_vacuum(conn: sqlite3.Connection) -> bool:
+    """Switch the database to ``auto_vacuum=INCREMENTAL`` if it is not already.
+
+    Existing files need a full ``VACUUM`` for the mode change, which rewrites
+    the whole file, cannot run in a transaction and needs exclusive access, so
+    callers only do this on request (``buddy sessions vacuum``) or for a file
+    that has no tables yet. Returns whether the mode is active; it stays off
+    when another connection holds the file.
+    """
+    if incremental_auto_vacuum_enabled(conn):
+        return True
+    conn.execute(f"PRAGMA auto_vacuum = {_AUTO_VACUUM_INCREMENTAL}")
+    try:
+        conn.execute("VACUUM")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def _supported_schema_version(conn: sqlite3.Connection) -> int:
+    version = schema_version(conn)
+    if version > len(MIGRATIONS):
+        raise RuntimeError(
+            f"Session database schema version {version} is newer than supported version {len(MIGRATIONS)}"
+        )
+    return version
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations, one transaction per version.
+
+    ``BEGIN IMMEDIATE`` serializes concurrent processes opening the same file;
+    the version is re-read under the lock so each migration runs exactly once.
+    """
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = _supported_schema_version(conn)
+            if version == len(MIGRATIONS):
+                conn.commit()
+                return version
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
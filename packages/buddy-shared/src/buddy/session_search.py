@@ -0,0 +1,64 @@
+import sqlite3
+from typing import Any
+
+from buddy.blob_store import BLOB_REF_KEY
+
+# Each indexed piece of text is one ``search_documents`` row; ``search_index``
+# is an FTS5 table sharing its rowid. Streamed artifacts are indexed per event
+# and replaced by a single document once the task is compacted.
+SOURCE_CHAT = "chat"
+SOURCE_EVENT = "event"
+SOURCE_ARTIFACT = "artifact"
+
+SearchDocument = tuple[str, str, int, str | None, str | None, str]
+
+
+def artifact_search_text(payload: dict[str, Any]) -> str:
+    """Return the searchable text of an ``artifact-update`` payload.
+
+    Text parts are taken as-is; data parts (tool calls and results)
+    contribute their string values. Blob references are skipped.
+    """
+    artifact = payload.get("artifact")
+    if payload.get("kind") != "artifact-update" or not isinstance(artifact, dict):
+        return ""
+    chunks: list[str] = []
+    for part in artifact.get("parts", []):
+        if not isinstance(part, dict):
+            continue
+        if part.get("kind") == "text":
+            chunks.append(str(part.get("text", "")))
+        elif part.get("kind") == "data":
+            _collect_strings(part.get("data"), chunks)
+    return " ".join(chunk for chunk in chunks if chunk)
+
+
+def _collect_strings(value: Any, chunks: list[str]) -> None:
+    if isinstance(value, str):
+        chunks.append(value)
+    elif isinstance(value, dict):
+        if BLOB_REF_KEY in value:
+            return
+        for item in value.values():
+            _collect_strings(item, chunks)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_strings(item, chunks)
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching all terms, each as a literal phrase."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def index_documents(conn: sqlite3.Connection, documents: list[SearchDocument]) -> None:
+    """Insert ``(session_id, source, ref, artifact_id, label, text)`` documents."""
+    for session_id, source, ref, artifact_id, label, text in documents:
+        if not text:
+            continue
+        cursor = conn.execute(
+            "INSERT INTO search_documents(session_id, source, ref, artifact_id, label) VALUES(?, ?, ?, ?, ?)",
+            (session_id, source, ref, artifact_id, label),
+        )
+        conn.execute("INSERT INTO search_index(rowid, text) VALUES(?, ?)", (cursor.lastrowid, text))
@@ -1,58 +1,363 @@
-import json
+import os
 import sqlite3
-from datetime import UTC, datetime
+import threading
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from functools import wraps
 from importlib import import_module
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal, cast
+from uuid import uuid4
 
+from buddy.blob_store import BLOB_REF_MARKER, BlobStore, externalize_large_strings, resolve_blob_refs
 from buddy.data_dirs import buddy_data_dir
+from buddy.session_codec import decode_payload, encode_payload
+from buddy.session_migrations import (
+    apply_migrations,
+    enable_incremental_auto_vacuum,
+    incremental_auto_vacuum_enabled,
+)
+from buddy.session_search import (
+    SOURCE_ARTIFACT,
+    SOURCE_CHAT,
+    SOURCE_EVENT,
+    artifact_search_text,
+    fts_query,
+    index_documents,
+)
+from buddy.session_summary import PREVIEW_CHARS, is_tool_call, refresh_session_summaries, task_state
+from buddy.session_writer import BatchableConnection, SessionWriteQueue
+from buddy.shared import fast_json
+from buddy.shared.logging import emit_event, get_logger
+
+logger = get_logger(__name__)
+
+_STATEMENT_CACHE_SIZE = 256
+# Sorts after every event row sharing an index, for cursors given without a seq.
+_MAX_SEQ = 2**63 - 1
+_DEFAULT_BLOB_THRESHOLD = 64 * 1024
+_EVENT_INDEX_BLOCK_SIZE = 64
+EXPORT_FORMAT = "buddy-sessions"
+EXPORT_VERSION = 1
+_SESSION_COLUMNS = (
+    "session_id, created_at, updated_at, message_count, event_count, last_preview, last_task_state,"
+    " tool_call_count, byte_size, parent_session_id, parent_message_index, parent_event_index"
+)
+
+
+def _lineage_cte(fork_column: str) -> str:
+    """Recursive CTE ``lineage(session_id, parent_id, lo, hi)`` for the session bound to ``?``.
+
+    Each row is the session itself or an ancestor together with the index
+    range ``[lo, hi)`` it contributes (``hi`` is NULL for the session itself).
+    """
+    return (
+        "WITH RECURSIVE lineage(session_id, parent_id, lo, hi) AS ("
+        f" SELECT session_id, parent_session_id, COALESCE({fork_column}, 0), NULL FROM sessions WHERE session_id = ?"
+        " UNION ALL"
+        f" SELECT s.session_id, s.parent_session_id, COALESCE(s.{fork_column}, 0), MIN(l.lo, COALESCE(l.hi, l.lo))"
+        " FROM sessions AS s JOIN lineage AS l ON s.session_id = l.parent_id"
+        ") "
+    )
+
+
+_MESSAGE_LINEAGE = _lineage_cte("parent_message_index")
+_EVENT_LINEAGE = _lineage_cte("parent_event_index")
+_LINEAGE_MESSAGES = (
+    " FROM lineage AS l JOIN messages AS m ON m.session_id = l.session_id"
+    " WHERE m.message_index >= l.lo AND (l.hi IS NULL OR m.message_index < l.hi)"
+)
+
+
+class _PooledConnection(BatchableConnection):
+    """Weak-referenceable connection so dead threads release their handle."""
+
+
+EventView = Literal["full", "compact"]
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limits enforced by :meth:`SessionStore.enforce_retention`; ``None`` disables a limit."""
+
+    max_age_s: float | None = None
+    max_sessions: int | None = None
+    max_bytes_per_session: int | None = None
+    delta_retention_s: float | None = None
+
+
+class _FoldedArtifact:
+    """Accumulates an artifact stream following A2A append semantics."""
+
+    def __init__(self, event_index: int, payload: dict[str, Any]) -> None:
+        self.first_event_index = event_index
+        self.last_event_index = event_index
+        self.event_count = 1
+        artifact = payload.get("artifact", {})
+        self.payload: dict[str, Any] = {
+            key: value for key, value in payload.items() if key not in {"append", "lastChunk", "artifact"}
+        }
+        self.payload["artifact"] = {**artifact, "parts": [dict(part) for part in artifact.get("parts", [])]}
+
+    def fold(self, event_index: int, payload: dict[str, Any]) -> None:
+        self.last_event_index = event_index
+        self.event_count += 1
+        artifact = payload.get("artifact", {})
+        folded_artifact = self.payload["artifact"]
+        folded_artifact.update({key: value for key, value in artifact.items() if key != "parts"})
+        parts = [dict(part) for part in artifact.get("parts", [])]
+        if not payload.get("append"):
+            folded_artifact["parts"] = parts
+            return
+        folded_parts = folded_artifact["parts"]
+        for part in parts:
+            previous = folded_parts[-1] if folded_parts else None
+            if previous is not None and previous.get("kind") == "text" and part.get("kind") == "text":
+                previous["text"] = previous.get("text", "") + part.get("text", "")
+            else:
+                folded_parts.append(part)
+
+
+def _artifact_id(payload: dict[str, Any]) -> str | None:
+    artifact = payload.get("artifact")
+    if not isinstance(artifact, dict):
+        return None
+    artifact_id = artifact.get("artifactId")
+    return artifact_id if isinstance(artifact_id, str) else None
+
+
+def _todo_from_row(row: tuple[Any, ...]) -> dict[str, Any]:
+    return {"id": row[0], "content": row[1], "status": row[2], "priority": row[3]}
+
+
+def _compression_from_env() -> bool:
+    return os.environ.get("BUDDY_SESSION_COMPRESSION", "none").strip().lower() == "zlib"
+
+
+def _blob_threshold_from_env() -> int | None:
+    threshold = int(os.environ.get("BUDDY_SESSION_BLOB_THRESHOLD_BYTES", str(_DEFAULT_BLOB_THRESHOLD)))
+    return threshold if threshold > 0 else None
+
+
+def _single_writer_from_env() -> bool:
+    return os.environ.get("BUDDY_SESSION_SINGLE_WRITER", "").strip().lower() in {"1", "true", "yes"}
+
+
+# Names of write methods that run their own transactions.
+_EXCLUSIVE_WRITES: set[str] = set()
+
+
+def _write[**P, R](*, exclusive: bool = False) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Route a write method through the store's writer thread when one is enabled.
+
+    ``exclusive`` marks methods that run their own transactions.
+    """
+
+    def decorate(method: Callable[P, R]) -> Callable[P, R]:
+        @wraps(method)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            store = cast("SessionStore", args[0])
+            writer = store._write_queue()
+            if writer is None or writer.on_writer_thread():
+                return method(*args, **kwargs)
+            return writer.submit(method, *args, exclusive=exclusive, **kwargs).result()
+
+        if exclusive:
+            _EXCLUSIVE_WRITES.add(method.__name__)
+        return wrapper
+
+    return decorate
 
 
 class SessionStore:
-    def __init__(self, db_path: Path) -> None:
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        compress: bool | None = None,
+        blob_threshold: int | None = -1,
+        blob_store: BlobStore | None = None,
+        single_writer: bool | None = None,
+    ) -> None:
+        """Open (and migrate) the session database at ``db_path``.
+
+        String values longer than ``blob_threshold`` characters inside stored
+        messages and events are moved into a content-addressed ``blob_store``
+        (default: ``blobs/`` next to the database) and resolved again on read.
+        ``None`` disables this; the default reads ``BUDDY_SESSION_BLOB_THRESHOLD_BYTES``.
+
+        With ``single_writer`` (default: ``BUDDY_SESSION_SINGLE_WRITER``) every
+        write runs on one dedicated thread that groups concurrent writes into
+        shared transactions; reads stay on the calling threads' connections.
+        """
         if not db_path.is_absolute():
             db_path = buddy_data_dir() / db_path
         self._db_path = db_path
+        self._compress = compress if compress is not None else _compression_from_env()
+        self._blob_threshold = _blob_threshold_from_env() if blob_threshold == -1 else blob_threshold
+        self._blob_store = blob_store or BlobStore(db_path.parent / "blobs")
+        self._local = threading.local()
+        self._connections: weakref.WeakSet[_PooledConnection] = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._event_index_blocks: dict[str, tuple[int, int]] = {}
+        self._event_index_lock = threading.Lock()
+        self._single_writer = single_writer if single_writer is not None else _single_writer_from_env()
+        self._writer: SessionWriteQueue | None = None
+        self._writer_lock = threading.Lock()
         self._ensure_parent()
         self._init_schema()
 
-    def list_sessions(self, limit: int = 20) -> list[dict[str, str]]:
+    def close(self) -> None:
+        """Finish queued writes, then close every pooled connection opened by this store.
+
+        Threads that use the store again afterwards transparently reconnect.
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.stop()
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def submit_write[R](self, write: Callable[..., R], *args: Any, **kwargs: Any) -> Future[R]:
+        """Queue ``write``, a write method of this store, and return a future for its result.
+
+        The future resolves once the write's transaction has committed. Without
+        a writer thread the write runs immediately and the future is already done.
+        """
+        writer = self._write_queue()
+        if writer is not None and not writer.on_writer_thread():
+            return writer.submit(write, *args, exclusive=getattr(write, "__name__", "") in _EXCLUSIVE_WRITES, **kwargs)
+        future: Future[R] = Future()
+        try:
+            future.set_result(write(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def list_sessions(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Return the most recently updated sessions with their maintained summaries."""
         with self._connect() as conn:
             rows = conn.execute(
-                "SELECT session_id, created_at, updated_at FROM sessions ORDER BY updated_at DESC LIMIT ?",
+                f"SELECT {_SESSION_COLUMNS} FROM sessions ORDER BY updated_at DESC LIMIT ?",
                 (limit,),
             ).fetchall()
-        return [
-            {"session_id": session_id, "created_at": created_at, "updated_at": updated_at}
-            for session_id, created_at, updated_at in rows
-        ]
+        return [self._session_from_row(row) for row in rows]
 
-    def get_session(self, session_id: str) -> dict[str, str] | None:
+    def get_session(self, session_id: str) -> dict[str, Any] | None:
         with self._connect() as conn:
-            row = conn.execute(
-                "SELECT session_id, created_at, updated_at FROM sessions WHERE session_id = ?",
-                (session_id,),
-            ).fetchone()
-        if row is None:
-            return None
-        return {"session_id": row[0], "created_at": row[1], "updated_at": row[2]}
+            return self._select_session(conn, session_id)
+
+    def load_session_snapshot(
+        self,
+        session_id: str,
+        *,
+        events_after_index: int | None = None,
+        events_after_seq: int | None = None,
+        events_limit: int | None = None,
+        messages_after_id: int | None = None,
+        messages_limit: int | None = None,
+        view: EventView = "full",
+        resolve_blobs: bool = True,
+    ) -> dict[str, Any] | None:
+        """Read a session, a page of its chat messages and a page of its events.
 
-    def load_chat_messages(self, session_id: str) -> list[dict[str, str]]:
+        All three reads share one read transaction so the page is consistent
+        even while the runtime keeps appending. ``next_events_after_index``
+        with ``next_events_after_seq``, and ``next_messages_after_id``, are the
+        cursors for the following page, or ``None`` once the end has been
+        reached. Event indexes are not unique (compacted artifacts and older
+        databases share them), so an index without a ``seq`` skips every
+        event at that index. ``view="compact"`` replaces
+        streamed artifact events with their materialized form. With
+        ``resolve_blobs=False`` large values stay as blob references that can
+        be fetched through :meth:`load_blob`.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            session = self._select_session(conn, session_id)
+            if session is None:
+                return None
+            messages = self._select_chat_messages(conn, session_id, messages_after_id, messages_limit)
+            events = self._select_events(
+                conn, session_id, events_after_index, events_after_seq, events_limit, view, resolve_blobs
+            )
+        finally:
+            conn.commit()
+        event_cursor = self._next_cursor([(event[:2], event) for event in events], events_limit)
+        return {
+            "session": session,
+            "messages": [message for _, message in messages[:messages_limit]],
+            "events": [event for _, _, event in events[:events_limit]],
+            "next_messages_after_id": self._next_cursor(messages, messages_limit),
+            "next_events_after_index": event_cursor[0] if event_cursor is not None else None,
+            "next_events_after_seq": event_cursor[1] if event_cursor is not None else None,
+        }
+
+    def load_chat_messages(
+        self, session_id: str, *, after_id: int | None = None, limit: int | None = None
+    ) -> list[dict[str, str]]:
         with self._connect() as conn:
-            rows = conn.execute(
-                "SELECT id, role, content FROM chat_messages WHERE session_id = ? ORDER BY id",
-                (session_id,),
-            ).fetchall()
-        return [{"id": str(message_id), "role": role, "content": content} for message_id, role, content in rows]
+            rows = self._select_chat_messages(conn, session_id, after_id, limit)
+        return [message for _, message in rows[:limit]]
 
+    @_write()
     def append_chat_message(self, session_id: str, role: str, content: str) -> None:
         now = self._now()
         with self._connect() as conn:
-            self._upsert_session(conn, session_id, now)
-            conn.execute(
+            self._upsert_session(
+                conn,
+                session_id,
+                now,
+                messages=1,
+                size=len(content),
+                preview=content[:PREVIEW_CHARS] if role == "assistant" else None,
+            )
+            cursor = conn.execute(
                 "INSERT INTO chat_messages(session_id, role, content, created_at) VALUES(?, ?, ?, ?)",
                 (session_id, role, content, now),
             )
+            index_documents(conn, [(session_id, SOURCE_CHAT, int(cursor.lastrowid or 0), None, role, content)])
+
+    def search(self, query: str, limit: int = 20, cursor: int | None = None) -> dict[str, Any]:
+        """Rank chat messages and artifact text matching every term of ``query``.
+
+        ``cursor`` is the ``next_cursor`` of the previous page (``None`` once
+        exhausted). Snippets mark matches with ``[`` and ``]``.
+        """
+        match = fts_query(query)
+        if not match:
+            return {"results": [], "next_cursor": None}
+        offset = cursor or 0
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.session_id, d.source, d.ref, d.artifact_id, d.label,"
+                " snippet(search_index, 0, '[', ']', '…', 16), search_index.rank"
+                " FROM search_index JOIN search_documents AS d ON d.id = search_index.rowid"
+                " WHERE search_index MATCH ? ORDER BY search_index.rank LIMIT ? OFFSET ?",
+                (match, limit + 1, offset),
+            ).fetchall()
+        results = [
+            {
+                "session_id": session_id,
+                "source": source,
+                "ref": ref,
+                "artifact_id": artifact_id,
+                "label": label,
+                "snippet": snippet,
+                "score": -rank,
+            }
+            for session_id, source, ref, artifact_id, label, snippet, rank in rows[:limit]
+        ]
+        return {"results": results, "next_cursor": offset + limit if len(rows) > limit else None}
 
     def load_messages(self, session_id: str) -> list[Any]:
         pydantic_ai = import_module("pydantic_ai")
@@ -66,145 +371,1166 @@ class SessionStore:
     def load_messages_payload(self, session_id: str) -> list[dict[str, Any]]:
         with self._connect() as conn:
             rows = conn.execute(
-                "SELECT message_json FROM messages WHERE session_id = ? ORDER BY message_index",
+                f"{_MESSAGE_LINEAGE}SELECT m.message_json{_LINEAGE_MESSAGES} ORDER BY m.message_index",
                 (session_id,),
             ).fetchall()
-        return [json.loads(item[0]) for item in rows]
+        return [self._decode(item[0]) for item in rows]
+
+    def load_blob(self, digest: str) -> str:
+        return self._blob_store.get(digest).decode("utf-8")
+
+    def messages_size(self, session_id: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"{_MESSAGE_LINEAGE}SELECT COALESCE(SUM(LENGTH(m.message_json)), 0){_LINEAGE_MESSAGES}",
+                (session_id,),
+            ).fetchone()
+        return int(row[0]) if row else 0
 
-    def save_messages(self, session_id: str, messages: list[Any] | object) -> None:
+    def messages_version(self, session_id: str) -> str | None:
+        """Return a marker that changes whenever the stored history changes, or None without one.
+
+        Saves and deletes insert or remove message rows, whose ids are never
+        reused, so the row count and highest id identify a history without
+        reading any payloads.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                f"{_MESSAGE_LINEAGE}SELECT COUNT(*), MAX(m.id){_LINEAGE_MESSAGES}", (session_id,)
+            ).fetchone()
+        if row is None or not row[0]:
+            return None
+        return f"{row[0]}:{row[1]}"
+
+    @_write()
+    def save_messages(self, session_id: str, messages: list[Any] | object) -> int:
+        """Persist the full pydantic-ai history for a session.
+
+        Rows whose index and content hash already match the stored prefix are
+        kept; only the remainder is (re)written, so appending a turn costs
+        writes proportional to the new messages rather than the whole history.
+        Returns the serialized size of the saved history in bytes.
+        """
         pydantic_core = import_module("pydantic_core")
         to_jsonable_python = pydantic_core.to_jsonable_python
 
         payloads = to_jsonable_python(messages)
         if not isinstance(payloads, list):
             payloads = []
-        payloads = [item for item in payloads if isinstance(item, dict)]
+        message_payloads = [item for item in payloads if isinstance(item, dict)]
+        message_jsons = [fast_json.dumps(item) for item in message_payloads]
+        content_hashes = [
+            fast_json.content_hash(payload, message_json)
+            for payload, message_json in zip(message_payloads, message_jsons, strict=True)
+        ]
         now = self._now()
         with self._connect() as conn:
             self._upsert_session(conn, session_id, now)
-            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            stored = conn.execute(
+                f"{_MESSAGE_LINEAGE}SELECT m.message_index, m.content_hash{_LINEAGE_MESSAGES} ORDER BY m.message_index",
+                (session_id,),
+            ).fetchall()
+            kept = 0
+            for (message_index, stored_hash), content_hash in zip(stored, content_hashes, strict=False):
+                if message_index != kept or stored_hash != content_hash:
+                    break
+                kept += 1
+            # A fork diverging inside its inherited prefix simply inherits less.
+            conn.execute(
+                "UPDATE sessions SET parent_message_index = ? WHERE session_id = ? AND parent_message_index > ?",
+                (kept, session_id, kept),
+            )
+            removed_size = 0
+            if kept < len(stored):
+                removed_size = conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(message_json)), 0) FROM messages"
+                    " WHERE session_id = ? AND message_index >= ?",
+                    (session_id, kept),
+                ).fetchone()[0]
+                conn.execute(
+                    "DELETE FROM messages WHERE session_id = ? AND message_index >= ?",
+                    (session_id, kept),
+                )
+            rows = [
+                (
+                    session_id,
+                    index,
+                    self._serialize(conn, session_id, message_payloads[index], message_jsons[index]),
+                    content_hashes[index],
+                    now,
+                )
+                for index in range(kept, len(message_jsons))
+            ]
             conn.executemany(
-                "INSERT INTO messages(session_id, message_index, message_json, created_at) VALUES(?, ?, ?, ?)",
-                [(session_id, index, json.dumps(message), now) for index, message in enumerate(payloads)],
+                "INSERT INTO messages(session_id, message_index, message_json, content_hash, created_at)"
+                " VALUES(?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "UPDATE sessions SET byte_size = byte_size + ? WHERE session_id = ?",
+                (sum(len(row[2]) for row in rows) - removed_size, session_id),
             )
+        return sum(len(message_json) for message_json in message_jsons)
+
+    def load_events(
+        self,
+        session_id: str,
+        *,
+        after_index: int | None = None,
+        after_seq: int | None = None,
+        limit: int | None = None,
+        view: EventView = "full",
+        resolve_blobs: bool = True,
+    ) -> list[dict[str, Any]]:
+        with self._connect() as conn:
+            rows = self._select_events(conn, session_id, after_index, after_seq, limit, view, resolve_blobs)
+        return [event for _, _, event in rows[:limit]]
 
-    def load_events(self, session_id: str) -> list[dict[str, Any]]:
+    def load_todos(self, scope: str) -> list[dict[str, Any]]:
         with self._connect() as conn:
             rows = conn.execute(
-                "SELECT payload_json FROM events WHERE session_id = ? ORDER BY event_index",
-                (session_id,),
+                "SELECT todo_id, content, status, priority FROM todo_items WHERE scope = ? ORDER BY position",
+                (scope,),
             ).fetchall()
-        return [json.loads(item[0]) for item in rows]
+        return [_todo_from_row(row) for row in rows]
 
-    def load_todos(self, scope: str) -> list[dict[str, Any]]:
+    def load_todo(self, scope: str, todo_id: str) -> dict[str, Any] | None:
         with self._connect() as conn:
             row = conn.execute(
-                "SELECT todos_json FROM todo_lists WHERE scope = ?",
-                (scope,),
+                "SELECT todo_id, content, status, priority FROM todo_items WHERE scope = ? AND todo_id = ?",
+                (scope, todo_id),
             ).fetchone()
-        if row is None:
-            return []
-        todos = json.loads(row[0])
-        return todos if isinstance(todos, list) else []
+        return _todo_from_row(row) if row is not None else None
 
+    @_write()
     def save_todos(self, scope: str, todos: list[dict[str, Any]]) -> None:
+        """Replace the todo list of ``scope``."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM todo_items WHERE scope = ?", (scope,))
+            self._insert_todos(conn, scope, todos, first_position=0)
+
+    @_write()
+    def append_todos(self, scope: str, todos: list[dict[str, Any]]) -> None:
+        """Add ``todos`` after the existing items of ``scope``; ids must be new."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(position) FROM todo_items WHERE scope = ?", (scope,)).fetchone()
+            self._insert_todos(conn, scope, todos, first_position=(row[0] + 1) if row[0] is not None else 0)
+
+    @_write()
+    def update_todo(self, scope: str, todo_id: str, fields: dict[str, Any]) -> bool:
+        """Set ``content``/``status``/``priority`` of one todo; returns whether it exists."""
+        columns = [column for column in ("content", "status", "priority") if column in fields]
+        assignments = "".join(f"{column} = ?, " for column in columns)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE todo_items SET {assignments}updated_at = ? WHERE scope = ? AND todo_id = ?",
+                (*(fields[column] for column in columns), self._now(), scope, todo_id),
+            )
+        return cursor.rowcount > 0
+
+    @_write()
+    def delete_todos(self, scope: str, todo_ids: list[str]) -> int:
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                "DELETE FROM todo_items WHERE scope = ? AND todo_id = ?",
+                [(scope, todo_id) for todo_id in todo_ids],
+            )
+        return cursor.rowcount
+
+    def _insert_todos(
+        self, conn: sqlite3.Connection, scope: str, todos: list[dict[str, Any]], *, first_position: int
+    ) -> None:
+        now = self._now()
+        conn.executemany(
+            "INSERT INTO todo_items(scope, todo_id, position, content, status, priority, updated_at)"
+            " VALUES(?, ?, ?, ?, ?, ?, ?)",
+            [
+                (scope, todo["id"], first_position + offset, todo["content"], todo["status"], todo["priority"], now)
+                for offset, todo in enumerate(todos)
+            ],
+        )
+
+    def allocate_event_indexes(self, session_id: str, count: int = 1) -> int:
+        """Reserve ``count`` consecutive event indexes and return the first.
+
+        Indexes come from an in-memory block per session; the ``event_sequences``
+        counter row is only touched to reserve the next block, so concurrent
+        writers in one process never share an index. Unused reservations leave
+        gaps, which readers ignore since they only order by index.
+        """
+        with self._event_index_lock:
+            start, end = self._event_index_blocks.get(session_id, (0, 0))
+            if end - start < count:
+                start = self._reserve_event_indexes(session_id, max(count, _EVENT_INDEX_BLOCK_SIZE))
+                end = start + max(count, _EVENT_INDEX_BLOCK_SIZE)
+            self._event_index_blocks[session_id] = (start + count, end)
+        return start
+
+    def append_event(self, session_id: str, event_index: int, payload: dict[str, Any]) -> None:
+        self.append_events(session_id, [(event_index, payload)])
+
+    @_write()
+    def append_events(self, session_id: str, events: list[tuple[int, dict[str, Any]]]) -> None:
+        if not events:
+            return
         now = self._now()
-        payload = json.dumps(todos)
+        states = [state for _, payload in events if (state := task_state(payload)) is not None]
+        with self._connect() as conn:
+            self._upsert_session(
+                conn,
+                session_id,
+                now,
+                events=len(events),
+                tool_calls=sum(1 for _, payload in events if is_tool_call(payload)),
+                state=states[-1] if states else None,
+            )
+            rows = [
+                (
+                    session_id,
+                    event_index,
+                    payload.get("kind", "unknown"),
+                    payload.get("taskId"),
+                    _artifact_id(payload),
+                    self._serialize(conn, session_id, payload),
+                    now,
+                )
+                for event_index, payload in events
+            ]
+            conn.execute(
+                "UPDATE sessions SET byte_size = byte_size + ? WHERE session_id = ?",
+                (sum(len(row[5]) for row in rows), session_id),
+            )
+            index_documents(
+                conn,
+                [
+                    (
+                        session_id,
+                        SOURCE_EVENT,
+                        event_index,
+                        _artifact_id(payload),
+                        payload["artifact"].get("name"),
+                        artifact_search_text(payload),
+                    )
+                    for event_index, payload in events
+                    # Appended deltas are covered by the artifact's end event and materialized text.
+                    if _artifact_id(payload) is not None and not payload.get("append")
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO events(session_id, event_index, event_type, task_id, artifact_id, payload_json, created_at)"
+                " VALUES(?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # Keep the counter ahead of explicitly indexed writes in the same transaction.
+            conn.execute(
+                "INSERT INTO event_sequences(session_id, next_index) VALUES(?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET next_index = MAX(next_index, excluded.next_index)",
+                (session_id, max(event_index for event_index, _ in events) + 1),
+            )
+
+    @_write()
+    def compact_task(self, session_id: str, task_id: str) -> int:
+        """Fold each streamed artifact of a finished task into one materialized row.
+
+        Artifacts that were sent as a single event are left alone. Returns the
+        number of artifacts materialized. Raw events stay in place until
+        :meth:`prune_compacted_events` removes them.
+        """
         with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT event_index, payload_json FROM events"
+                " WHERE session_id = ? AND task_id = ? AND artifact_id IS NOT NULL"
+                " ORDER BY event_index, id",
+                (session_id, task_id),
+            ).fetchall()
+            pruned: set[str] = set()
+            stored_sizes: dict[str, int] = {}
+            for artifact_id, raw_pruned, size in conn.execute(
+                "SELECT artifact_id, raw_pruned, LENGTH(payload_json) FROM artifacts WHERE session_id = ? AND task_id = ?",
+                (session_id, task_id),
+            ):
+                if raw_pruned:
+                    pruned.add(artifact_id)
+                else:
+                    stored_sizes[artifact_id] = size
+            folded: dict[str, _FoldedArtifact] = {}
+            for event_index, payload_json in rows:
+                payload = self._decode(payload_json)
+                artifact_id = _artifact_id(payload)
+                if artifact_id is None or artifact_id in pruned:
+                    continue
+                current = folded.get(artifact_id)
+                if current is None:
+                    folded[artifact_id] = _FoldedArtifact(event_index, payload)
+                else:
+                    current.fold(event_index, payload)
+            now = self._now()
+            materialized = [
+                (
+                    session_id,
+                    task_id,
+                    artifact_id,
+                    artifact.first_event_index,
+                    artifact.last_event_index,
+                    artifact.event_count,
+                    self._serialize(conn, session_id, artifact.payload),
+                    now,
+                )
+                for artifact_id, artifact in folded.items()
+                if artifact.event_count > 1
+            ]
+            conn.executemany(
+                "INSERT INTO artifacts(session_id, task_id, artifact_id, event_index, last_event_index, event_count,"
+                " payload_json, created_at) VALUES(?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(session_id, artifact_id) DO UPDATE SET"
+                " event_index=excluded.event_index, last_event_index=excluded.last_event_index,"
+                " event_count=excluded.event_count, payload_json=excluded.payload_json, created_at=excluded.created_at"
+                " WHERE artifacts.raw_pruned = 0",
+                materialized,
+            )
+            # Raw events stay, so only the size changes: by what re-materializing replaced.
             conn.execute(
-                "INSERT INTO todo_lists(scope, todos_json, updated_at) VALUES(?, ?, ?)"
-                " ON CONFLICT(scope) DO UPDATE SET todos_json=excluded.todos_json, updated_at=excluded.updated_at",
-                (scope, payload, now),
+                "UPDATE sessions SET byte_size = byte_size + ? WHERE session_id = ?",
+                (sum(len(row[6]) - stored_sizes.get(row[2], 0) for row in materialized), session_id),
+            )
+            # Replace the artifact's start/end search documents with one for the folded text.
+            conn.executemany(
+                "DELETE FROM search_documents WHERE session_id = ? AND artifact_id = ?",
+                [(session_id, row[2]) for row in materialized],
+            )
+            index_documents(
+                conn,
+                [
+                    (
+                        session_id,
+                        SOURCE_ARTIFACT,
+                        folded[row[2]].first_event_index,
+                        row[2],
+                        folded[row[2]].payload["artifact"].get("name"),
+                        artifact_search_text(folded[row[2]].payload),
+                    )
+                    for row in materialized
+                ],
             )
+        return len(materialized)
 
-    def next_event_index(self, session_id: str) -> int:
+    @_write()
+    def prune_compacted_events(self, older_than_s: float) -> int:
+        """Delete raw events of artifacts materialized more than ``older_than_s`` ago."""
+        cutoff = (datetime.now(tz=UTC) - timedelta(seconds=older_than_s)).isoformat()
         with self._connect() as conn:
-            row = conn.execute(
-                "SELECT COALESCE(MAX(event_index) + 1, 0) FROM events WHERE session_id = ?",
-                (session_id,),
-            ).fetchone()
-        return int(row[0]) if row else 0
+            targets = conn.execute(
+                "SELECT id, session_id, artifact_id FROM artifacts WHERE raw_pruned = 0 AND created_at < ?",
+                (cutoff,),
+            ).fetchall()
+            deleted = 0
+            for _, session_id, artifact_id in targets:
+                cursor = conn.execute(
+                    "DELETE FROM events WHERE session_id = ? AND artifact_id = ?",
+                    (session_id, artifact_id),
+                )
+                deleted += cursor.rowcount
+            conn.executemany("UPDATE artifacts SET raw_pruned = 1 WHERE id = ?", [(item[0],) for item in targets])
+            refresh_session_summaries(conn, sorted({item[1] for item in targets}))
+        return deleted
 
-    def append_event(self, session_id: str, event_index: int, payload: dict[str, Any]) -> None:
-        payload_json = json.dumps(payload)
+    @_write()
+    def fork_session(
+        self,
+        parent_id: str,
+        *,
+        session_id: str | None = None,
+        message_index: int | None = None,
+        event_index: int | None = None,
+    ) -> str:
+        """Create a session that shares ``parent_id``'s history instead of copying it.
+
+        The fork sees the parent's model messages below ``message_index`` and
+        events below ``event_index`` (default: everything stored so far),
+        resolved through the parent chain on read; its own writes continue
+        from there. Chat transcripts are not inherited. Returns the new id.
+        """
+        fork_id = session_id or str(uuid4())
         now = self._now()
-        event_type = payload.get("kind", "unknown")
         with self._connect() as conn:
-            self._upsert_session(conn, session_id, now)
+            if self._select_session(conn, parent_id) is None:
+                raise ValueError(f"Session '{parent_id}' not found")
+            if self._select_session(conn, fork_id) is not None:
+                raise ValueError(f"Session '{fork_id}' already exists")
+            if message_index is None:
+                message_index = conn.execute(
+                    f"{_MESSAGE_LINEAGE}SELECT COALESCE(MAX(m.message_index) + 1, 0){_LINEAGE_MESSAGES}",
+                    (parent_id,),
+                ).fetchone()[0]
+            if event_index is None:
+                event_index = conn.execute(
+                    f"{_EVENT_LINEAGE}SELECT COALESCE(MAX(e.event_index) + 1, 0)"
+                    " FROM lineage AS l JOIN events AS e ON e.session_id = l.session_id"
+                    " WHERE e.event_index >= l.lo AND (l.hi IS NULL OR e.event_index < l.hi)",
+                    (parent_id,),
+                ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO sessions(session_id, created_at, updated_at, metadata_json,"
+                " parent_session_id, parent_message_index, parent_event_index) VALUES(?, ?, ?, ?, ?, ?, ?)",
+                (fork_id, now, now, "{}", parent_id, message_index, event_index),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO event_sequences(session_id, next_index) VALUES(?, ?)",
+                (fork_id, event_index),
+            )
+        return fork_id
+
+    @_write(exclusive=True)
+    def delete_sessions(self, session_ids: list[str]) -> int:
+        """Delete sessions with all their rows and any blobs no other session uses.
+
+        Surviving forks of a deleted session first get a copy of the rows
+        they inherit from it, so their history stays intact.
+        """
+        if not session_ids:
+            return 0
+        conn = self._connect()
+        # Holding the write lock while unlinking blobs keeps writers from
+        # re-referencing a digest between the orphan check and the unlink.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._detach_forks(conn, set(session_ids))
+            deleted = 0
+            digests: set[str] = set()
+            for offset in range(0, len(session_ids), 500):
+                chunk = session_ids[offset : offset + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                digests.update(
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT DISTINCT digest FROM blob_refs WHERE session_id IN ({placeholders})", chunk
+                    )
+                )
+                deleted += conn.execute(f"DELETE FROM sessions WHERE session_id IN ({placeholders})", chunk).rowcount
+                conn.execute(f"DELETE FROM event_sequences WHERE session_id IN ({placeholders})", chunk)
+                conn.execute(f"DELETE FROM todo_items WHERE scope IN ({placeholders})", chunk)
+            for digest in digests:
+                if conn.execute("SELECT 1 FROM blob_refs WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                    self._blob_store.delete(digest)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return deleted
+
+    def _detach_forks(self, conn: sqlite3.Connection, doomed: set[str]) -> None:
+        ids = sorted(doomed)
+        forks: list[str] = []
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset : offset + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            forks.extend(
+                row[0]
+                for row in conn.execute(
+                    f"SELECT session_id FROM sessions WHERE parent_session_id IN ({placeholders})", chunk
+                )
+            )
+        fork_query = (
+            "SELECT parent_session_id, COALESCE(parent_message_index, 0), COALESCE(parent_event_index, 0)"
+            " FROM sessions WHERE session_id = ?"
+        )
+        for fork_id in forks:
+            if fork_id in doomed:
+                continue
+            parent_id, message_index, event_index = conn.execute(fork_query, (fork_id,)).fetchone()
+            while parent_id in doomed:
+                # Take over the parent's own rows in the inherited range, then
+                # inherit from the grandparent what the parent inherited.
+                grandparent_id, parent_message_lo, parent_event_lo = conn.execute(fork_query, (parent_id,)).fetchone()
+                conn.execute(
+                    "INSERT INTO messages(session_id, message_index, message_json, content_hash, created_at)"
+                    " SELECT ?, message_index, message_json, content_hash, created_at FROM messages"
+                    " WHERE session_id = ? AND message_index >= ? AND message_index < ?",
+                    (fork_id, parent_id, parent_message_lo, message_index),
+                )
+                conn.execute(
+                    "INSERT INTO events(session_id, event_index, event_type, task_id, artifact_id, payload_json,"
+                    " created_at) SELECT ?, event_index, event_type, task_id, artifact_id, payload_json, created_at"
+                    " FROM events WHERE session_id = ? AND event_index >= ? AND event_index < ?",
+                    (fork_id, parent_id, parent_event_lo, event_index),
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO artifacts(session_id, task_id, artifact_id, event_index, last_event_index,"
+                    " event_count, payload_json, raw_pruned, created_at)"
+                    " SELECT ?, task_id, artifact_id, event_index, last_event_index, event_count, payload_json,"
+                    " raw_pruned, created_at FROM artifacts"
+                    " WHERE session_id = ? AND event_index >= ? AND event_index < ?"
+                    " AND (last_event_index < ? OR raw_pruned = 1)",
+                    (fork_id, parent_id, parent_event_lo, event_index, event_index),
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO blob_refs(session_id, digest) SELECT ?, digest FROM blob_refs"
+                    " WHERE session_id = ?",
+                    (fork_id, parent_id),
+                )
+                parent_id = grandparent_id
+                message_index = min(message_index, parent_message_lo)
+                event_index = min(event_index, parent_event_lo)
             conn.execute(
-                "INSERT INTO events(session_id, event_index, event_type, payload_json, created_at)"
+                "UPDATE sessions SET parent_session_id = ?, parent_message_index = ?, parent_event_index = ?"
+                " WHERE session_id = ?",
+                (
+                    parent_id,
+                    message_index if parent_id is not None else None,
+                    event_index if parent_id is not None else None,
+                    fork_id,
+                ),
+            )
+            refresh_session_summaries(conn, [fork_id])
+
+    @_write(exclusive=True)
+    def enforce_retention(self, policy: RetentionPolicy) -> dict[str, int]:
+        """Apply ``policy`` once and report how many rows each rule removed.
+
+        Sessions older than ``max_age_s`` or beyond the ``max_sessions`` most
+        recently updated are deleted. Sessions over ``max_bytes_per_session``
+        lose their oldest events (the model history is kept so they can
+        continue) until they fit.
+        """
+        expired: list[str] = []
+        with self._connect() as conn:
+            if policy.max_age_s is not None:
+                cutoff = (datetime.now(tz=UTC) - timedelta(seconds=policy.max_age_s)).isoformat()
+                expired.extend(
+                    row[0] for row in conn.execute("SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,))
+                )
+            if policy.max_sessions is not None:
+                expired.extend(
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                        (policy.max_sessions,),
+                    )
+                )
+        deleted_sessions = self.delete_sessions(sorted(set(expired)))
+        pruned_deltas = 0
+        if policy.delta_retention_s is not None:
+            pruned_deltas = self.prune_compacted_events(policy.delta_retention_s)
+        trimmed_events = 0
+        if policy.max_bytes_per_session is not None:
+            trimmed_events = self._trim_oversized_sessions(policy.max_bytes_per_session)
+        return {
+            "deleted_sessions": deleted_sessions,
+            "pruned_deltas": pruned_deltas,
+            "trimmed_events": trimmed_events,
+        }
+
+    @_write(exclusive=True)
+    def enable_incremental_vacuum(self) -> bool:
+        """Convert an existing database to ``auto_vacuum=INCREMENTAL``.
+
+        Runs a full ``VACUUM`` (see :func:`enable_incremental_auto_vacuum`), so
+        it is a maintenance step rather than something done on open. Returns
+        whether the mode is active.
+        """
+        return enable_incremental_auto_vacuum(self._connect())
+
+    @_write(exclusive=True)
+    def incremental_vacuum(self, max_pages: int | None = None) -> None:
+        """Return free pages to the filesystem (requires ``auto_vacuum=INCREMENTAL``)."""
+        # executescript steps the pragma to completion; execute() frees one page per call.
+        pages = "" if max_pages is None else f"({int(max_pages)})"
+        self._connect().executescript(f"PRAGMA incremental_vacuum{pages};")
+
+    def _trim_oversized_sessions(self, max_bytes: int) -> int:
+        trimmed = 0
+        with self._connect() as conn:
+            oversized = conn.execute(
+                "SELECT session_id, byte_size FROM sessions WHERE byte_size > ?",
+                (max_bytes,),
+            ).fetchall()
+            for session_id, total_size in oversized:
+                excess = total_size - max_bytes
+                freed = 0
+                boundary: tuple[int, int] | None = None
+                for row_id, event_index, size in conn.execute(
+                    "SELECT id, event_index, LENGTH(payload_json) FROM events WHERE session_id = ?"
+                    " ORDER BY event_index, id",
+                    (session_id,),
+                ):
+                    boundary = (event_index, row_id)
+                    freed += size
+                    if freed >= excess:
+                        break
+                if boundary is None:
+                    continue
+                trimmed += conn.execute(
+                    "DELETE FROM events WHERE session_id = ? AND (event_index, id) <= (?, ?)",
+                    (session_id, *boundary),
+                ).rowcount
+                # A materialized artifact the boundary splits loses its remaining raw
+                # events as well, so it is shown once, from its folded copy.
+                for (artifact_id,) in conn.execute(
+                    "SELECT artifact_id FROM artifacts WHERE session_id = ? AND raw_pruned = 0"
+                    " AND event_index <= ? AND last_event_index > ?",
+                    (session_id, boundary[0], boundary[0]),
+                ).fetchall():
+                    trimmed += conn.execute(
+                        "DELETE FROM events WHERE session_id = ? AND artifact_id = ?",
+                        (session_id, artifact_id),
+                    ).rowcount
+                conn.execute(
+                    "UPDATE artifacts SET raw_pruned = 1 WHERE session_id = ? AND event_index <= ?",
+                    (session_id, boundary[0]),
+                )
+                conn.execute(
+                    "DELETE FROM search_documents WHERE session_id = ? AND source = ? AND ref <= ?",
+                    (session_id, SOURCE_EVENT, boundary[0]),
+                )
+            refresh_session_summaries(conn, [row[0] for row in oversized])
+        return trimmed
+
+    def scan_events(self, after_id: int, limit: int) -> list[dict[str, Any]]:
+        """Return up to ``limit`` events stored after row ``after_id``, in insertion order.
+
+        Blob references are left unresolved; they carry the original ``size``.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, session_id, task_id, event_index, payload_json, created_at FROM events"
+                " WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [
+            {
+                "id": row_id,
+                "session_id": session_id,
+                "task_id": task_id,
+                "event_index": event_index,
+                "payload": self._decode(payload_json, resolve_blobs=False),
+                "created_at": created_at,
+            }
+            for row_id, session_id, task_id, event_index, payload_json, created_at in rows
+        ]
+
+    def scan_messages(self, after_id: int, limit: int) -> list[dict[str, Any]]:
+        """Like :meth:`scan_events` for model history rows."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, session_id, message_index, message_json, created_at FROM messages"
+                " WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [
+            {
+                "id": row_id,
+                "session_id": session_id,
+                "message_index": message_index,
+                "payload": self._decode(message_json, resolve_blobs=False),
+                "created_at": created_at,
+            }
+            for row_id, session_id, message_index, message_json, created_at in rows
+        ]
+
+    def export_records(self, session_ids: list[str] | None = None) -> Iterator[dict[str, Any]]:
+        """Yield a self-contained dump of sessions as plain dicts, one row at a time.
+
+        Reads run in one snapshot transaction on a dedicated connection whose
+        cursors are consumed lazily, so memory stays flat however large the
+        database is, and the generator may be advanced from any thread.
+        Payloads are decoded and blob references resolved. Ancestors of
+        requested forks are included. See :meth:`import_records`.
+        """
+        conn = self._open_connection()
+        try:
+            conn.execute("BEGIN")
+            selection = ""
+            if session_ids is not None:
+                conn.execute("CREATE TEMP TABLE export_ids(session_id TEXT PRIMARY KEY)")
+                conn.executemany("INSERT OR IGNORE INTO export_ids VALUES(?)", [(item,) for item in session_ids])
+                conn.execute(
+                    "INSERT OR IGNORE INTO export_ids WITH RECURSIVE ancestors(session_id) AS ("
+                    " SELECT parent_session_id FROM sessions WHERE session_id IN (SELECT session_id FROM export_ids)"
+                    " UNION SELECT s.parent_session_id FROM sessions AS s JOIN ancestors AS a"
+                    " ON s.session_id = a.session_id"
+                    ") SELECT session_id FROM ancestors WHERE session_id IS NOT NULL"
+                )
+                selection = " WHERE session_id IN (SELECT session_id FROM temp.export_ids)"
+            yield {"type": "header", "format": EXPORT_FORMAT, "version": EXPORT_VERSION}
+            for row in conn.execute(
+                "SELECT session_id, created_at, updated_at, metadata_json, parent_session_id, parent_message_index,"
+                f" parent_event_index, last_task_state, tool_call_count FROM sessions{selection} ORDER BY session_id"
+            ):
+                yield {
+                    "type": "session",
+                    "session_id": row[0],
+                    "created_at": row[1],
+                    "updated_at": row[2],
+                    "metadata": fast_json.loads(row[3]),
+                    "parent_session_id": row[4],
+                    "parent_message_index": row[5],
+                    "parent_event_index": row[6],
+                    "last_task_state": row[7],
+                    "tool_call_count": row[8],
+                }
+            for session_id, role, content, created_at in conn.execute(
+                f"SELECT session_id, role, content, created_at FROM chat_messages{selection} ORDER BY id"
+            ):
+                yield {
+                    "type": "chat_message",
+                    "session_id": session_id,
+                    "role": role,
+                    "content": content,
+                    "created_at": created_at,
+                }
+            for session_id, message_index, message_json, created_at in conn.execute(
+                "SELECT session_id, message_index, message_json, created_at FROM messages"
+                f"{selection} ORDER BY session_id, message_index"
+            ):
+                yield {
+                    "type": "message",
+                    "session_id": session_id,
+                    "message_index": message_index,
+                    "message": self._decode(message_json),
+                    "created_at": created_at,
+                }
+            for session_id, event_index, payload_json, created_at in conn.execute(
+                f"SELECT session_id, event_index, payload_json, created_at FROM events{selection} ORDER BY id"
+            ):
+                yield {
+                    "type": "event",
+                    "session_id": session_id,
+                    "event_index": event_index,
+                    "event": self._decode(payload_json),
+                    "created_at": created_at,
+                }
+            for row in conn.execute(
+                "SELECT session_id, task_id, artifact_id, event_index, last_event_index, event_count, payload_json,"
+                f" raw_pruned, created_at FROM artifacts{selection} ORDER BY id"
+            ):
+                yield {
+                    "type": "artifact",
+                    "session_id": row[0],
+                    "task_id": row[1],
+                    "artifact_id": row[2],
+                    "event_index": row[3],
+                    "last_event_index": row[4],
+                    "event_count": row[5],
+                    "artifact": self._decode(row[6]),
+                    "raw_pruned": bool(row[7]),
+                    "created_at": row[8],
+                }
+        finally:
+            conn.close()
+
+    @_write(exclusive=True)
+    def import_records(self, records: Iterable[dict[str, Any]], *, batch_size: int = 5000) -> dict[str, int]:
+        """Load records produced by :meth:`export_records`, ``batch_size`` rows per transaction.
+
+        Sessions that already exist are skipped together with all their rows.
+        Payloads are re-encoded with this store's compression and blob
+        settings. Returns the number of imported records per type.
+        """
+        counts = {"session": 0, "chat_message": 0, "message": 0, "event": 0, "artifact": 0}
+        skipped: set[str] = set()
+        imported: set[str] = set()
+        batch: list[dict[str, Any]] = []
+        for record in records:
+            record_type = record.get("type")
+            if record_type == "header":
+                if record.get("format") != EXPORT_FORMAT or record.get("version") != EXPORT_VERSION:
+                    raise ValueError(f"Unsupported session export: {record.get('format')} v{record.get('version')}")
+                continue
+            if record_type not in counts:
+                raise ValueError(f"Unknown session export record type: {record_type!r}")
+            if record["session_id"] in skipped:
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._import_batch(batch, counts, skipped, imported)
+                batch = []
+        if batch:
+            self._import_batch(batch, counts, skipped, imported)
+        with self._connect() as conn:
+            refresh_session_summaries(conn, sorted(imported))
+        return counts
+
+    def _import_batch(
+        self, batch: list[dict[str, Any]], counts: dict[str, int], skipped: set[str], imported: set[str]
+    ) -> None:
+        with self._connect() as conn:
+            for record in batch:
+                if record["type"] != "session":
+                    continue
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO sessions(session_id, created_at, updated_at, metadata_json,"
+                    " parent_session_id, parent_message_index, parent_event_index, last_task_state, tool_call_count)"
+                    " VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record["session_id"],
+                        record["created_at"],
+                        record["updated_at"],
+                        fast_json.dumps(record.get("metadata") or {}),
+                        record.get("parent_session_id"),
+                        record.get("parent_message_index"),
+                        record.get("parent_event_index"),
+                        record.get("last_task_state"),
+                        record.get("tool_call_count", 0),
+                    ),
+                )
+                if cursor.rowcount:
+                    imported.add(record["session_id"])
+                else:
+                    skipped.add(record["session_id"])
+            rows = [record for record in batch if record["session_id"] not in skipped]
+            for record in rows:
+                counts[record["type"]] += 1
+                if record["type"] == "chat_message":
+                    cursor = conn.execute(
+                        "INSERT INTO chat_messages(session_id, role, content, created_at) VALUES(?, ?, ?, ?)",
+                        (record["session_id"], record["role"], record["content"], record["created_at"]),
+                    )
+                    index_documents(
+                        conn,
+                        [
+                            (
+                                record["session_id"],
+                                SOURCE_CHAT,
+                                int(cursor.lastrowid or 0),
+                                None,
+                                record["role"],
+                                record["content"],
+                            )
+                        ],
+                    )
+            conn.executemany(
+                "INSERT INTO messages(session_id, message_index, message_json, content_hash, created_at)"
                 " VALUES(?, ?, ?, ?, ?)",
-                (session_id, event_index, event_type, payload_json, now),
+                [
+                    (
+                        record["session_id"],
+                        record["message_index"],
+                        self._serialize(conn, record["session_id"], record["message"], message_json),
+                        fast_json.content_hash(record["message"], message_json),
+                        record["created_at"],
+                    )
+                    for record in rows
+                    if record["type"] == "message"
+                    for message_json in [fast_json.dumps(record["message"])]
+                ],
+            )
+            events = [record for record in rows if record["type"] == "event"]
+            conn.executemany(
+                "INSERT INTO events(session_id, event_index, event_type, task_id, artifact_id, payload_json, created_at)"
+                " VALUES(?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        record["session_id"],
+                        record["event_index"],
+                        record["event"].get("kind", "unknown"),
+                        record["event"].get("taskId"),
+                        _artifact_id(record["event"]),
+                        self._serialize(conn, record["session_id"], record["event"]),
+                        record["created_at"],
+                    )
+                    for record in events
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO event_sequences(session_id, next_index) VALUES(?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET next_index = MAX(next_index, excluded.next_index)",
+                [(record["session_id"], record["event_index"] + 1) for record in events],
+            )
+            index_documents(
+                conn,
+                [
+                    (
+                        record["session_id"],
+                        SOURCE_EVENT,
+                        record["event_index"],
+                        _artifact_id(record["event"]),
+                        record["event"]["artifact"].get("name"),
+                        artifact_search_text(record["event"]),
+                    )
+                    for record in events
+                    # Same rule as append_events: appended deltas are not indexed.
+                    if _artifact_id(record["event"]) is not None and not record["event"].get("append")
+                ],
+            )
+            artifacts = [record for record in rows if record["type"] == "artifact"]
+            conn.executemany(
+                "INSERT OR IGNORE INTO artifacts(session_id, task_id, artifact_id, event_index, last_event_index,"
+                " event_count, payload_json, raw_pruned, created_at) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        record["session_id"],
+                        record["task_id"],
+                        record["artifact_id"],
+                        record["event_index"],
+                        record["last_event_index"],
+                        record["event_count"],
+                        self._serialize(conn, record["session_id"], record["artifact"]),
+                        int(record["raw_pruned"]),
+                        record["created_at"],
+                    )
+                    for record in artifacts
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM search_documents WHERE session_id = ? AND artifact_id = ?",
+                [(record["session_id"], record["artifact_id"]) for record in artifacts],
+            )
+            index_documents(
+                conn,
+                [
+                    (
+                        record["session_id"],
+                        SOURCE_ARTIFACT,
+                        record["event_index"],
+                        record["artifact_id"],
+                        record["artifact"].get("artifact", {}).get("name"),
+                        artifact_search_text(record["artifact"]),
+                    )
+                    for record in artifacts
+                ],
             )
 
+    @_write(exclusive=True)
+    def recompress(self, *, compress: bool, batch_size: int = 500) -> int:
+        """Re-encode every stored message, event and artifact payload.
+
+        One-shot migration between plain and compressed storage; rows already
+        in the target encoding are rewritten unchanged. Returns the number of
+        rows visited. Future writes use the same setting.
+        """
+        self._compress = compress
+        visited = 0
+        for table, column in (("messages", "message_json"), ("events", "payload_json"), ("artifacts", "payload_json")):
+            last_id = 0
+            while True:
+                with self._connect() as conn:
+                    rows = conn.execute(
+                        f"SELECT id, {column} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                        (last_id, batch_size),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    conn.executemany(
+                        f"UPDATE {table} SET {column} = ? WHERE id = ?",
+                        [(self._encode(decode_payload(value)), row_id) for row_id, value in rows],
+                    )
+                visited += len(rows)
+                last_id = rows[-1][0]
+        with self._connect() as conn:
+            refresh_session_summaries(conn)
+        return visited
+
+    def _encode(self, payload_json: str) -> str | bytes:
+        return encode_payload(payload_json, compress=self._compress)
+
+    def _serialize(
+        self, conn: sqlite3.Connection, session_id: str, payload: object, payload_json: str | None = None
+    ) -> str | bytes:
+        if payload_json is None:
+            payload_json = fast_json.dumps(payload)
+        # No string can exceed the threshold when the whole document does not.
+        if self._blob_threshold is not None and len(payload_json) > self._blob_threshold:
+            digests: set[str] = set()
+            payload = externalize_large_strings(payload, self._blob_store, self._blob_threshold, digests)
+            if digests:
+                payload_json = fast_json.dumps(payload)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO blob_refs(session_id, digest) VALUES(?, ?)",
+                    [(session_id, digest) for digest in digests],
+                )
+        return self._encode(payload_json)
+
+    def _decode(self, value: str | bytes, *, resolve_blobs: bool = True) -> Any:
+        payload_json = decode_payload(value)
+        payload = fast_json.loads(payload_json)
+        if resolve_blobs and BLOB_REF_MARKER in payload_json:
+            payload = resolve_blob_refs(payload, self._blob_store)
+        return payload
+
     def _ensure_parent(self) -> None:
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self._db_path)
+        """Return this thread's pooled connection, opening it on first use.
+
+        Connections are kept per thread so pragmas run once per connection and
+        sqlite's statement cache is reused across calls. Use the connection as a
+        context manager to scope a transaction.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return conn
+
+    def _write_queue(self) -> SessionWriteQueue | None:
+        if not self._single_writer:
+            return None
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = SessionWriteQueue(self._connect)
+            return self._writer
+
+    def _open_connection(self) -> _PooledConnection:
+        conn = sqlite3.connect(
+            self._db_path,
+            check_same_thread=False,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+            factory=_PooledConnection,
+        )
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA foreign_keys=ON")
         return conn
 
-    def _init_schema(self) -> None:
+    @_write()
+    def _reserve_event_indexes(self, session_id: str, count: int) -> int:
         with self._connect() as conn:
-            conn.execute(
-                "CREATE TABLE IF NOT EXISTS sessions("
-                " session_id TEXT PRIMARY KEY,"
-                " created_at TEXT NOT NULL,"
-                " updated_at TEXT NOT NULL,"
-                " metadata_json TEXT NOT NULL"
-                ")"
-            )
-            conn.execute(
-                "CREATE TABLE IF NOT EXISTS messages("
-                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
-                " session_id TEXT NOT NULL,"
-                " message_index INTEGER NOT NULL,"
-                " message_json TEXT NOT NULL,"
-                " created_at TEXT NOT NULL,"
-                " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
-                ")"
-            )
-            conn.execute(
-                "CREATE TABLE IF NOT EXISTS events("
-                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
-                " session_id TEXT NOT NULL,"
-                " event_index INTEGER NOT NULL,"
-                " event_type TEXT NOT NULL,"
-                " payload_json TEXT NOT NULL,"
-                " created_at TEXT NOT NULL,"
-                " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
-                ")"
-            )
-            conn.execute(
-                "CREATE TABLE IF NOT EXISTS chat_messages("
-                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
-                " session_id TEXT NOT NULL,"
-                " role TEXT NOT NULL,"
-                " content TEXT NOT NULL,"
-                " created_at TEXT NOT NULL,"
-                " FOREIGN KEY(session_id) REFERENCES sessions(session_id) ON DELETE CASCADE"
-                ")"
+            row = conn.execute(
+                "INSERT INTO event_sequences(session_id, next_index) VALUES(?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET next_index = next_index + excluded.next_index"
+                " RETURNING next_index",
+                (session_id, count),
+            ).fetchone()
+        return int(row[0]) - count
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is None:
+            # Converting a file without tables costs nothing.
+            enable_incremental_auto_vacuum(conn)
+        elif not incremental_auto_vacuum_enabled(conn):
+            emit_event(
+                logger,
+                "session_db_auto_vacuum_not_incremental",
+                level="warning",
+                db_path=str(self._db_path),
+                hint="Run 'buddy sessions vacuum' to convert it.",
             )
-            conn.execute(
-                "CREATE TABLE IF NOT EXISTS todo_lists("
-                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
-                " scope TEXT NOT NULL UNIQUE,"
-                " todos_json TEXT NOT NULL,"
-                " updated_at TEXT NOT NULL"
-                ")"
+        apply_migrations(conn)
+
+    @classmethod
+    def _select_session(cls, conn: sqlite3.Connection, session_id: str) -> dict[str, Any] | None:
+        row = conn.execute(f"SELECT {_SESSION_COLUMNS} FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return cls._session_from_row(row) if row is not None else None
+
+    @staticmethod
+    def _session_from_row(row: tuple[Any, ...]) -> dict[str, Any]:
+        session_id, created_at, updated_at, message_count, event_count, preview, state, tool_calls, size = row[:9]
+        parent_id, parent_message_index, parent_event_index = row[9:]
+        return {
+            "session_id": session_id,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "parent": (
+                {"session_id": parent_id, "message_index": parent_message_index, "event_index": parent_event_index}
+                if parent_id is not None
+                else None
+            ),
+            "summary": {
+                "message_count": message_count,
+                "event_count": event_count,
+                "last_preview": preview,
+                "last_task_state": state,
+                "tool_call_count": tool_calls,
+                "byte_size": size,
+            },
+        }
+
+    @staticmethod
+    def _select_chat_messages(
+        conn: sqlite3.Connection, session_id: str, after_id: int | None, limit: int | None
+    ) -> list[tuple[int, dict[str, str]]]:
+        # One extra row is fetched so callers can tell whether another page exists.
+        rows = conn.execute(
+            "SELECT id, role, content FROM chat_messages WHERE session_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (session_id, after_id if after_id is not None else 0, limit + 1 if limit is not None else -1),
+        ).fetchall()
+        return [
+            (message_id, {"id": str(message_id), "role": role, "content": content})
+            for message_id, role, content in rows
+        ]
+
+    def _select_events(
+        self,
+        conn: sqlite3.Connection,
+        session_id: str,
+        after_index: int | None,
+        after_seq: int | None,
+        limit: int | None,
+        view: EventView = "full",
+        resolve_blobs: bool = True,
+    ) -> list[tuple[int, int, dict[str, Any]]]:
+        # Rows are keyed by (event_index, seq): seq is the event's row id, or the
+        # negated artifact row id so materialized artifacts sort before later
+        # raw events sharing their first index. An inherited artifact that kept
+        # streaming after the fork point is shown as its raw events instead,
+        # unless those were pruned.
+        shown_artifact = "(l.hi IS NULL OR a.last_event_index < l.hi OR a.raw_pruned = 1)"
+        if view == "compact":
+            raw_filter = (
+                " AND NOT EXISTS (SELECT 1 FROM artifacts AS a"
+                f" WHERE a.session_id = e.session_id AND a.artifact_id = e.artifact_id AND {shown_artifact})"
             )
+            artifact_filter = f" AND {shown_artifact}"
+        else:
+            raw_filter = ""
+            artifact_filter = " AND a.raw_pruned = 1"
+        after = (after_index, after_seq if after_seq is not None else _MAX_SEQ) if after_index is not None else (-1, 0)
+        rows = conn.execute(
+            f"{_EVENT_LINEAGE}SELECT event_index, seq, payload_json FROM ("
+            " SELECT e.event_index, e.id AS seq, e.payload_json"
+            " FROM lineage AS l JOIN events AS e ON e.session_id = l.session_id"
+            " WHERE e.event_index >= l.lo AND (l.hi IS NULL OR e.event_index < l.hi)"
+            f" AND e.event_index >= ?{raw_filter}"
+            " UNION ALL"
+            " SELECT a.event_index, -a.id AS seq, a.payload_json"
+            " FROM lineage AS l JOIN artifacts AS a ON a.session_id = l.session_id"
+            " WHERE a.event_index >= l.lo AND (l.hi IS NULL OR a.event_index < l.hi)"
+            f" AND a.event_index >= ?{artifact_filter}"
+            ") WHERE (event_index, seq) > (?, ?) ORDER BY event_index, seq LIMIT ?",
+            (session_id, after[0], after[0], *after, limit + 1 if limit is not None else -1),
+        ).fetchall()
+        return [
+            (event_index, seq, self._decode(payload_json, resolve_blobs=resolve_blobs))
+            for event_index, seq, payload_json in rows
+        ]
+
+    @staticmethod
+    def _next_cursor[K](rows: list[tuple[K, Any]], limit: int | None) -> K | None:
+        if limit is None or limit <= 0 or len(rows) <= limit:
+            return None
+        return rows[limit - 1][0]
 
     @staticmethod
     def _now() -> str:
         return datetime.now(tz=UTC).isoformat()
 
     @staticmethod
-    def _upsert_session(conn: sqlite3.Connection, session_id: str, now: str) -> None:
+    def _upsert_session(
+        conn: sqlite3.Connection,
+        session_id: str,
+        now: str,
+        *,
+        messages: int = 0,
+        events: int = 0,
+        tool_calls: int = 0,
+        size: int = 0,
+        preview: str | None = None,
+        state: str | None = None,
+    ) -> None:
+        """Create or touch a session, adding the given increments to its summary."""
         conn.execute(
-            "INSERT INTO sessions(session_id, created_at, updated_at, metadata_json)"
-            " VALUES(?, ?, ?, ?)"
-            " ON CONFLICT(session_id) DO UPDATE SET updated_at=excluded.updated_at",
-            (session_id, now, now, "{}"),
+            "INSERT INTO sessions(session_id, created_at, updated_at, metadata_json, message_count, event_count,"
+            " tool_call_count, byte_size, last_preview, last_task_state)"
+            " VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(session_id) DO UPDATE SET updated_at=excluded.updated_at,"
+            " message_count = message_count + excluded.message_count,"
+            " event_count = event_count + excluded.event_count,"
+            " tool_call_count = tool_call_count + excluded.tool_call_count,"
+            " byte_size = byte_size + excluded.byte_size,"
+            " last_preview = COALESCE(excluded.last_preview, last_preview),"
+            " last_task_state = COALESCE(excluded.last_task_state, last_task_state)",
+            (session_id, now, now, "{}", messages, events, tool_calls, size, preview, state),
         )
@@ -0,0 +1,45 @@
+import sqlite3
+from typing import Any
+
+PREVIEW_CHARS = 200
+TOOL_CALL_ARTIFACT = "tool_call"
+
+# Columns every summary refresh recomputes from the session's rows. The task
+# state and tool call count are lifetime values maintained on append only.
+_REFRESH_SQL = (
+    "UPDATE sessions SET"
+    " message_count = (SELECT COUNT(*) FROM chat_messages AS c WHERE c.session_id = sessions.session_id),"
+    " event_count = (SELECT COUNT(*) FROM events AS e WHERE e.session_id = sessions.session_id),"
+    " last_preview = (SELECT SUBSTR(c.content, 1, ?) FROM chat_messages AS c"
+    "  WHERE c.session_id = sessions.session_id AND c.role = 'assistant' ORDER BY c.id DESC LIMIT 1),"
+    " byte_size ="
+    "  (SELECT COALESCE(SUM(LENGTH(content)), 0) FROM chat_messages AS c WHERE c.session_id = sessions.session_id)"
+    "  + (SELECT COALESCE(SUM(LENGTH(message_json)), 0) FROM messages AS m WHERE m.session_id = sessions.session_id)"
+    "  + (SELECT COALESCE(SUM(LENGTH(payload_json)), 0) FROM events AS e WHERE e.session_id = sessions.session_id)"
+    "  + (SELECT COALESCE(SUM(LENGTH(payload_json)), 0) FROM artifacts AS a WHERE a.session_id = sessions.session_id)"
+)
+
+
+def refresh_session_summaries(conn: sqlite3.Connection, session_ids: list[str] | None = None) -> None:
+    """Recompute counts, preview and byte size for ``session_ids`` (all sessions if ``None``)."""
+    if session_ids is None:
+        conn.execute(_REFRESH_SQL, (PREVIEW_CHARS,))
+        return
+    conn.executemany(
+        f"{_REFRESH_SQL} WHERE session_id = ?",
+        [(PREVIEW_CHARS, session_id) for session_id in session_ids],
+    )
+
+
+def task_state(payload: dict[str, Any]) -> str | None:
+    """Return the task state reported by a ``status-update`` payload."""
+    status = payload.get("status")
+    if payload.get("kind") != "status-update" or not isinstance(status, dict):
+        return None
+    state = status.get("state")
+    return state if isinstance(state, str) else None
+
+
+def is_tool_call(payload: dict[str, Any]) -> bool:
+    artifact = payload.get("artifact")
+    return isinstance(artifact, dict) and artifact.get("name") == TOOL_CALL_ARTIFACT
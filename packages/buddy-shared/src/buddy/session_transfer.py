@@ -0,0 +1,45 @@
+import gzip
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from buddy.shared import fast_json
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_CHUNK_SIZE = 64 * 1024
+
+
+def encode_ndjson(records: Iterable[dict[str, Any]], *, compress: bool = False) -> Iterator[bytes]:
+    """Frame ``records`` as NDJSON (optionally gzip) in chunks of roughly 64 KiB."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    buffer: list[bytes] = []
+    buffered = 0
+    for record in records:
+        line = fast_json.dumps_bytes(record) + b"\n"
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= _CHUNK_SIZE:
+            chunk = b"".join(buffer)
+            buffer, buffered = [], 0
+            if compressor is None:
+                yield chunk
+            elif compressed := compressor.compress(chunk):
+                yield compressed
+    chunk = b"".join(buffer)
+    if compressor is None:
+        if chunk:
+            yield chunk
+        return
+    yield compressor.compress(chunk) + compressor.flush()
+
+
+def read_ndjson(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield records from an NDJSON file, transparently un-gzipping it."""
+    with path.open("rb") as raw:
+        is_gzip = raw.read(2) == _GZIP_MAGIC
+    opener = gzip.open if is_gzip else open
+    with opener(path, "rt", encoding="utf-8") as lines:
+        for line in lines:
+            if line.strip():
+                yield fast_json.loads(line)
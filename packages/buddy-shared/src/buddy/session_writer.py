@@ -0,0 +1,133 @@
+import queue
+import sqlite3
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+_MAX_BATCH = 64
+_STOP = object()
+
+
+class BatchableConnection(sqlite3.Connection):
+    """Connection whose ``with`` blocks defer to an enclosing write group.
+
+    While ``batched`` is set the writer thread owns the transaction, so
+    leaving ``with conn`` neither commits nor rolls back.
+    """
+
+    batched = False
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> Any:
+        if self.batched:
+            return False
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+@dataclass
+class _WriteJob:
+    write: Callable[..., Any]
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    exclusive: bool
+    future: Future[Any] = field(default_factory=Future)
+
+
+class SessionWriteQueue:
+    """Runs session writes on one dedicated thread.
+
+    Queued writes are grouped, up to ``max_batch`` at a time, into a single
+    ``BEGIN IMMEDIATE`` transaction with a savepoint per write, so one failing
+    write is rolled back on its own and the others still commit. Exclusive
+    writes manage their own transactions and run alone. Each write's future
+    resolves once its transaction has committed.
+
+    ``connect`` must return the calling thread's connection; it is only ever
+    called on the writer thread.
+    """
+
+    def __init__(self, connect: Callable[[], BatchableConnection], *, max_batch: int = _MAX_BATCH) -> None:
+        self._connect = connect
+        self._max_batch = max_batch
+        self._jobs: queue.SimpleQueue[_WriteJob | object] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="buddy-session-writer", daemon=True)
+        self._thread.start()
+
+    def on_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, write: Callable[..., Any], *args: Any, exclusive: bool = False, **kwargs: Any) -> Future[Any]:
+        job = _WriteJob(write, args, kwargs, exclusive)
+        self._jobs.put(job)
+        return job.future
+
+    def stop(self) -> None:
+        """Finish every queued write, then end the writer thread."""
+        self._jobs.put(_STOP)
+        if not self.on_writer_thread():
+            self._thread.join()
+
+    def _run(self) -> None:
+        carry: _WriteJob | object | None = None
+        while True:
+            job = carry if carry is not None else self._jobs.get()
+            carry = None
+            if not isinstance(job, _WriteJob):
+                return
+            if job.exclusive:
+                self._run_exclusive(job)
+                continue
+            group = [job]
+            while len(group) < self._max_batch:
+                try:
+                    queued = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if not isinstance(queued, _WriteJob) or queued.exclusive:
+                    carry = queued
+                    break
+                group.append(queued)
+            self._run_group(group)
+            if carry is _STOP:
+                return
+
+    def _run_exclusive(self, job: _WriteJob) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            job.future.set_result(job.write(*job.args, **job.kwargs))
+        except BaseException as error:
+            job.future.set_exception(error)
+
+    def _run_group(self, group: list[_WriteJob]) -> None:
+        group = [job for job in group if job.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        outcomes: list[tuple[bool, Any]] = []
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.batched = True
+            for job in group:
+                conn.execute("SAVEPOINT session_write")
+                try:
+                    outcomes.append((True, job.write(*job.args, **job.kwargs)))
+                except Exception as error:
+                    conn.execute("ROLLBACK TO session_write")
+                    outcomes.append((False, error))
+                conn.execute("RELEASE session_write")
+            conn.batched = False
+            conn.commit()
+        except BaseException as error:
+            conn.batched = False
+            if conn.in_transaction:
+                conn.rollback()
+            for job in group:
+                job.future.set_exception(error)
+            return
+        for job, (ok, outcome) in zip(group, outcomes, strict=True):
+            if ok:
+                job.future.set_result(outcome)
+            else:
+                job.future.set_exception(outcome)
@@ -0,0 +1,104 @@
+"""JSON encoding shared by session persistence, structured logs and registries.
+
+Uses ``orjson`` when the ``fast-json`` extra is installed. The stdlib fallback
+is configured to write the same bytes: compact separators, UTF-8 instead of
+``\\u`` escapes, enums and UUIDs encoded by value, and datetimes and
+dataclasses handed to ``default`` in both. Floats are not byte-identical:
+orjson spells some exponents differently from ``repr`` (``2.5e-05`` comes out
+as ``0.000025``, ``1e-07`` as ``1e-7``), releases of orjson differ among
+themselves (``1e16`` vs ``1e+16``), and non-finite floats become ``null``.
+Hash stored content with :func:`content_hash`, which does not depend on the
+backend, rather than hashing :func:`dumps` output directly.
+"""
+
+import hashlib
+import json
+import re
+from collections.abc import Callable
+from enum import Enum
+from importlib import import_module
+from typing import Any
+from uuid import UUID
+
+try:
+    _orjson: Any = import_module("orjson")
+except ImportError:
+    _orjson = None
+
+Default = Callable[[Any], Any]
+
+# Floats in exponent notation are what the backends spell differently; a match
+# may also be plain string content, which only costs a second encode.
+_EXPONENT = re.compile(r"\d[eE][-+]?\d")
+
+
+def fast_json_available() -> bool:
+    return _orjson is not None
+
+
+def dumps(value: Any, *, sort_keys: bool = False, indent: bool = False, default: Default | None = None) -> str:
+    """Encode ``value`` as compact JSON text (two-space indented with ``indent``)."""
+    return dumps_bytes(value, sort_keys=sort_keys, indent=indent, default=default).decode("utf-8")
+
+
+def dumps_bytes(value: Any, *, sort_keys: bool = False, indent: bool = False, default: Default | None = None) -> bytes:
+    if _orjson is not None:
+        options = _orjson.OPT_NON_STR_KEYS | _orjson.OPT_PASSTHROUGH_DATETIME | _orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            options |= _orjson.OPT_SORT_KEYS
+        if indent:
+            options |= _orjson.OPT_INDENT_2
+        try:
+            return _orjson.dumps(value, default=default, option=options)
+        except _orjson.JSONEncodeError:
+            # Integers beyond 64 bits and other values orjson rejects.
+            pass
+    return _stdlib_dumps(value, sort_keys=sort_keys, indent=indent, default=default).encode("utf-8")
+
+
+def content_hash(value: Any, encoded: str | None = None) -> str:
+    """SHA-256 hex digest of ``value`` as compact JSON, the same with or without orjson.
+
+    ``encoded`` is ``dumps(value)`` when the caller already has it. Output
+    that may hold exponent floats is hashed in its stdlib spelling instead.
+    """
+    if encoded is None:
+        encoded = dumps(value)
+    if _orjson is not None and _EXPONENT.search(encoded):
+        encoded = _stdlib_dumps(value)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _stdlib_dumps(value: Any, *, sort_keys: bool = False, indent: bool = False, default: Default | None = None) -> str:
+    return json.dumps(
+        value,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=(",", ": ") if indent else (",", ":"),
+        ensure_ascii=False,
+        default=_stdlib_default(default),
+    )
+
+
+def _stdlib_default(default: Default | None) -> Default:
+    # Mirrors the types orjson encodes natively before deferring to ``default``.
+    def encode(value: Any) -> Any:
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, UUID):
+            return str(value)
+        if default is None:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        return default(value)
+
+    return encode
+
+
+def loads(data: str | bytes) -> Any:
+    if _orjson is not None:
+        try:
+            return _orjson.loads(data)
+        except _orjson.JSONDecodeError:
+            # NaN/Infinity literals written by older stdlib encoders.
+            pass
+    return json.loads(data)
@@ -1,12 +1,14 @@
-import json
 import logging
 import os
+import random
 from collections.abc import Iterator
 from contextlib import contextmanager
 from contextvars import ContextVar, Token
 from datetime import UTC, datetime
 from typing import Any
 
+from buddy.shared import fast_json
+
 _LOGGER_NAME = "buddy"
 _HANDLER_MARKER = "_buddy_structured_handler"
 _service_name = _LOGGER_NAME
@@ -72,7 +74,31 @@ def emit_event(
         if value is not None:
             payload[key] = value
 
-    logger.log(_resolve_level(level), json.dumps(payload, default=_json_default, sort_keys=True))
+    logger.log(_resolve_level(level), fast_json.dumps(payload, default=_json_default, sort_keys=True))
+
+
+class SampledTrace:
+    """Debug trace of a high-volume event stream, off unless asked for.
+
+    A trace only emits when ``logger`` is enabled for DEBUG and
+    ``sample_rate`` (default: ``BUDDY_TRACE_SAMPLE_RATE``, ``0``) is above
+    zero, and then only for that fraction of calls. Check :meth:`sample`
+    before building the fields so the disabled path costs one comparison.
+    """
+
+    def __init__(self, logger: logging.Logger, event: str, *, sample_rate: float | None = None) -> None:
+        self.logger = logger
+        self.event = event
+        rate = sample_rate if sample_rate is not None else float(os.environ.get("BUDDY_TRACE_SAMPLE_RATE", "0"))
+        self.sample_rate = min(max(rate, 0.0), 1.0)
+
+    def sample(self) -> bool:
+        if self.sample_rate <= 0 or not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def emit(self, **fields: Any) -> None:
+        emit_event(self.logger, self.event, level=logging.DEBUG, sample_rate=self.sample_rate, **fields)
 
 
 def _resolve_level(level: str | int) -> int:
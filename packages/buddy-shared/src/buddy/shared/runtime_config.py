@@ -165,3 +165,10 @@ def runtime_extended_card_path(mount_path: str) -> str:
     if normalized_mount_path == "/":
         return "/agent/authenticatedExtendedCard"
     return f"{normalized_mount_path}/agent/authenticatedExtendedCard"
+
+
+def runtime_stats_path(mount_path: str) -> str:
+    normalized_mount_path = runtime_rpc_path(mount_path)
+    if normalized_mount_path == "/":
+        return "/runtime/stats"
+    return f"{normalized_mount_path}/runtime/stats"
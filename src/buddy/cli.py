@@ -1,6 +1,8 @@
 import asyncio
 import sys
 import uuid
+from enum import StrEnum
+from pathlib import Path
 from typing import Any
 
 import typer
@@ -19,6 +21,24 @@ from a2a.utils.message import get_message_text
 from a2a.utils.parts import get_text_parts
 
 app = typer.Typer(no_args_is_help=True)
+sessions_app = typer.Typer(no_args_is_help=True, help="Maintain the local session database.")
+app.add_typer(sessions_app, name="sessions")
+
+_SESSION_DB_OPTION = typer.Option(
+    Path("sessions.db"), "--db", help="Session DB path; relative paths resolve under the Buddy data dir."
+)
+_EXPORT_OUTPUT_ARGUMENT = typer.Argument(..., help="Destination NDJSON file ('-' for stdout).")
+_EXPORT_SESSION_OPTION = typer.Option(None, "--session", help="Only export these session IDs (repeatable).")
+_ANALYTICS_OUTPUT_ARGUMENT = typer.Argument(..., help="Dataset directory; reruns append only newer rows.")
+_IMPORT_SOURCE_ARGUMENT = typer.Argument(..., help="NDJSON file written by 'buddy sessions export' (gzip detected).")
+
+
+class _AnalyticsFileFormat(StrEnum):
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+_ANALYTICS_FORMAT_OPTION = typer.Option(_AnalyticsFileFormat.parquet, "--format", help="Parquet or Arrow IPC files.")
 
 
 def _build_message(text: str, context_id: str, task_id: str | None = None) -> Message:
@@ -190,3 +210,85 @@ def ask(
         asyncio.run(_send_one_off(url, session_id, text))
     except KeyboardInterrupt:
         typer.echo("")
+
+
+@sessions_app.command("compress")
+def sessions_compress(
+    db: Path = _SESSION_DB_OPTION,
+    decompress: bool = typer.Option(False, help="Rewrite payloads as plain JSON instead."),
+) -> None:
+    from buddy.session_store import SessionStore
+
+    store = SessionStore(db, compress=not decompress)
+    rows = store.recompress(compress=not decompress)
+    store.close()
+    typer.echo(f"Re-encoded {rows} rows ({'plain JSON' if decompress else 'zlib'}).")
+
+
+@sessions_app.command("vacuum")
+def sessions_vacuum(db: Path = _SESSION_DB_OPTION) -> None:
+    from buddy.session_store import SessionStore
+
+    store = SessionStore(db)
+    enabled = store.enable_incremental_vacuum()
+    if enabled:
+        store.incremental_vacuum()
+    store.close()
+    if not enabled:
+        typer.echo("Database is in use; stop the servers using it and retry.", err=True)
+        raise typer.Exit(1)
+    typer.echo("Incremental auto-vacuum is enabled and free pages were returned.")
+
+
+@sessions_app.command("export")
+def sessions_export(
+    output: Path = _EXPORT_OUTPUT_ARGUMENT,
+    db: Path = _SESSION_DB_OPTION,
+    session: list[str] | None = _EXPORT_SESSION_OPTION,
+    gzip: bool = typer.Option(False, help="Gzip the output."),
+) -> None:
+    from buddy.session_store import SessionStore
+    from buddy.session_transfer import encode_ndjson
+
+    store = SessionStore(db)
+    chunks = encode_ndjson(store.export_records(session or None), compress=gzip)
+    if str(output) == "-":
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    else:
+        with output.open("wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+    store.close()
+
+
+@sessions_app.command("import")
+def sessions_import(
+    source: Path = _IMPORT_SOURCE_ARGUMENT,
+    db: Path = _SESSION_DB_OPTION,
+) -> None:
+    from buddy.session_store import SessionStore
+    from buddy.session_transfer import read_ndjson
+
+    store = SessionStore(db)
+    counts = store.import_records(read_ndjson(source))
+    store.close()
+    typer.echo("Imported " + ", ".join(f"{count} {kind}s" for kind, count in counts.items()) + ".")
+
+
+@sessions_app.command("analytics")
+def sessions_analytics(
+    output_dir: Path = _ANALYTICS_OUTPUT_ARGUMENT,
+    db: Path = _SESSION_DB_OPTION,
+    file_format: _AnalyticsFileFormat = _ANALYTICS_FORMAT_OPTION,
+    batch_size: int = typer.Option(10_000, help="Source rows per record batch."),
+) -> None:
+    from buddy.session_analytics import AnalyticsFormat, export_analytics
+    from buddy.session_store import SessionStore
+
+    resolved_format: AnalyticsFormat = "arrow" if file_format is _AnalyticsFileFormat.arrow else "parquet"
+    store = SessionStore(db)
+    written = export_analytics(store, output_dir, file_format=resolved_format, batch_size=batch_size)
+    store.close()
+    typer.echo("Exported " + ", ".join(f"{count} {dataset} rows" for dataset, count in written.items()) + ".")
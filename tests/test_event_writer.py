@@ -1,3 +1,6 @@
+import asyncio
+import threading
+
 from a2a.types import TaskState
 from buddy.runtime.a2a.event_writer import SessionEventWriter
 from buddy.session_store import SessionStore
@@ -16,3 +19,83 @@ def test_event_writer_persists_ordered_events(tmp_path) -> None:
     assert events[0]["kind"] == "status-update"
     assert events[1]["kind"] == "artifact-update"
     assert events[2]["status"]["state"] == TaskState.completed.value
+
+
+def test_unbuffered_event_writer_compacts_off_the_calling_thread(tmp_path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    compacted_on: list[str] = []
+    compact_task = store.compact_task
+
+    def record_compact(session_id: str, task_id: str) -> int:
+        compacted_on.append(threading.current_thread().name)
+        return compact_task(session_id, task_id)
+
+    store.compact_task = record_compact  # type: ignore[method-assign]
+    writer = SessionEventWriter(session_store=store, context_id="ctx-1", task_id="task-1")
+    writer.append_artifact_text(artifact_id="art-1", name="output_start", text="")
+    writer.append_artifact_text(artifact_id="art-1", name="output_delta", text="Hello", append=True)
+    writer.append_status_update(TaskState.completed, final=True)
+    assert len(store.load_events("ctx-1")) == 3
+
+    writer.flush()
+    assert len(compacted_on) == 1
+    assert compacted_on[0] != threading.current_thread().name
+    assert store.load_events("ctx-1", view="compact")[0]["artifact"]["parts"][0]["text"] == "Hello"
+
+
+def test_buffered_event_writer_flushes_on_batch_size_and_final(tmp_path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    writer = SessionEventWriter(session_store=store, context_id="ctx-1", task_id="task-1", batch_size=3)
+
+    writer.append_status_update(TaskState.working, "Working")
+    writer.append_artifact_text(artifact_id="art-1", name="output_delta", text="Hel", append=True)
+    assert store.load_events("ctx-1") == []
+
+    writer.append_artifact_text(artifact_id="art-1", name="output_delta", text="lo", append=True)
+    writer.append_status_update(TaskState.completed, final=True)
+    writer.flush()
+
+    events = store.load_events("ctx-1")
+    assert [event["kind"] for event in events] == [
+        "status-update",
+        "artifact-update",
+        "artifact-update",
+        "status-update",
+    ]
+    assert events[-1]["final"] is True
+
+
+def test_buffered_event_writer_flushes_after_interval_without_further_appends(tmp_path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+
+    async def run_test() -> None:
+        writer = SessionEventWriter(
+            session_store=store, context_id="ctx-1", task_id="task-1", batch_size=10, flush_interval_s=0.05
+        )
+        writer.append_status_update(TaskState.working, "Working")
+        writer.append_artifact_text(artifact_id="art-1", name="output_delta", text="Hel", append=True)
+        assert store.load_events("ctx-1") == []
+
+        for _ in range(100):
+            if len(store.load_events("ctx-1")) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert [event["kind"] for event in store.load_events("ctx-1")] == ["status-update", "artifact-update"]
+
+    asyncio.run(run_test())
+
+
+def test_concurrent_writers_in_one_context_get_distinct_indexes(tmp_path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_event("ctx-1", 0, {"kind": "status-update", "taskId": "earlier"})
+    first = SessionEventWriter(session_store=store, context_id="ctx-1", task_id="task-1")
+    second = SessionEventWriter(session_store=store, context_id="ctx-1", task_id="task-2")
+
+    first.append_status_update(TaskState.working, "one")
+    second.append_status_update(TaskState.working, "two")
+    first.append_status_update(TaskState.completed, final=True)
+
+    indexes = [row[0] for row in store._connect().execute("SELECT event_index FROM events ORDER BY id")]
+    assert len(set(indexes)) == len(indexes) == 4
+    assert indexes == sorted(indexes)
+    assert [event.get("taskId") for event in store.load_events("ctx-1")] == ["earlier", "task-1", "task-2", "task-1"]
@@ -0,0 +1,53 @@
+from datetime import UTC, datetime
+from enum import Enum
+
+import pytest
+from buddy.shared import fast_json
+
+
+class _Color(Enum):
+    RED = "red"
+
+
+_SAMPLES = [
+    {"b": [1, 2.5, None, True, 0.001, 2**70], "a": 'é\n"😀', "nested": {"z": {}, "y": []}},
+    {"b": [1, 2.5, None, True, 0.001, 2**60], "a": 'é\n"😀', "nested": {"z": {}, "y": []}},
+    {"when": datetime(2026, 1, 1, tzinfo=UTC), "color": _Color.RED, "tags": {"b", "a"}},
+]
+
+
+def _default(value: object) -> object:
+    return sorted(value) if isinstance(value, set) else str(value)
+
+
+def test_dumps_writes_compact_utf8_json() -> None:
+    assert fast_json.dumps({"b": 1, "a": "é"}, sort_keys=True) == '{"a":"é","b":1}'
+    assert fast_json.dumps({"a": [1]}, indent=True) == '{\n  "a": [\n    1\n  ]\n}'
+    assert fast_json.loads(b'{"a":NaN}')["a"] != 0
+
+
+@pytest.mark.parametrize("sample", _SAMPLES)
+@pytest.mark.parametrize("options", [{}, {"sort_keys": True}, {"indent": True}])
+def test_stdlib_fallback_matches_orjson(
+    sample: dict[str, object], options: dict[str, bool], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    orjson = pytest.importorskip("orjson")
+    monkeypatch.setattr(fast_json, "_orjson", orjson)
+    fast = fast_json.dumps_bytes(sample, default=_default, **options)
+    monkeypatch.setattr(fast_json, "_orjson", None)
+    assert fast_json.dumps_bytes(sample, default=_default, **options) == fast
+
+
+def test_content_hash_does_not_depend_on_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    orjson = pytest.importorskip("orjson")
+    message = {"parts": [{"content": "1e5 apples", "scores": [2.5e-05, 1.5e-07, 1e16, 1e-10, 0.0001]}]}
+    monkeypatch.setattr(fast_json, "_orjson", orjson)
+    fast = fast_json.dumps(message)
+    fast_hash = fast_json.content_hash(message, fast)
+    assert fast_json.content_hash(message) == fast_hash
+    monkeypatch.setattr(fast_json, "_orjson", None)
+    stdlib = fast_json.dumps(message)
+
+    assert fast != stdlib
+    assert fast_json.loads(fast) == fast_json.loads(stdlib) == message
+    assert fast_json.content_hash(message, stdlib) == fast_hash
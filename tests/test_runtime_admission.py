@@ -0,0 +1,155 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Message, MessageSendParams, Part, Role, TaskState, TextPart
+from buddy.runtime.a2a.admission import AdmissionController, AdmissionRejected
+from buddy.runtime.a2a.executor import PyAIAgentExecutor
+from buddy.session_store import SessionStore
+
+
+class _FakeTraceSpan:
+    def update_trace(self, **_kwargs: Any) -> None:
+        return
+
+    def end(self) -> None:
+        return
+
+
+class _FakeLangfuseClient:
+    def start_span(self, **_kwargs: Any) -> _FakeTraceSpan:
+        return _FakeTraceSpan()
+
+    def flush(self) -> None:
+        return
+
+
+class _BlockingAgent:
+    async def run(self, *_args: Any, **_kwargs: Any) -> Any:
+        await asyncio.sleep(60)
+        raise AssertionError("Cancellation should stop the run before it completes")
+
+
+def _build_context(context_id: str, task_id: str) -> RequestContext:
+    return RequestContext(
+        MessageSendParams(
+            message=Message(
+                messageId=f"message-{task_id}",
+                contextId=context_id,
+                taskId=task_id,
+                role=Role.user,
+                parts=[Part(root=TextPart(text="hello"))],
+            )
+        ),
+        task_id=task_id,
+        context_id=context_id,
+    )
+
+
+def test_admission_queues_in_order_and_rejects_overflow() -> None:
+    async def run_test() -> None:
+        admission = AdmissionController(max_active=1, max_queued=2)
+        positions: dict[str, list[int]] = {"b": [], "c": []}
+
+        def report(name: str) -> Callable[[int], Awaitable[None]]:
+            async def on_position(position: int) -> None:
+                positions[name].append(position)
+
+            return on_position
+
+        assert await admission.acquire(admission.ticket(), report("a"))
+        waiting_b = asyncio.create_task(admission.acquire(admission.ticket(), report("b")))
+        ticket_c = admission.ticket()
+        waiting_c = asyncio.create_task(admission.acquire(ticket_c, report("c")))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire(admission.ticket(), report("a"))
+        assert admission.stats()["queued"] == 2
+
+        admission.release()
+        assert await waiting_b
+        await asyncio.sleep(0)
+        admission.withdraw(ticket_c)
+        assert not await waiting_c
+        assert positions == {"b": [1], "c": [2, 1]}
+
+        stats = admission.stats()
+        assert {key: stats[key] for key in ("active", "queued", "admitted", "rejected", "withdrawn")} == {
+            "active": 1,
+            "queued": 0,
+            "admitted": 2,
+            "rejected": 1,
+            "withdrawn": 1,
+        }
+
+    asyncio.run(run_test())
+
+
+def test_execute_rejects_when_runtime_is_full(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("buddy.runtime.a2a.executor.get_client", lambda: _FakeLangfuseClient())
+
+    async def run_test() -> None:
+        store = SessionStore(tmp_path / "sessions.db")
+        executor = PyAIAgentExecutor(
+            cast(Any, _BlockingAgent()), store, admission=AdmissionController(max_active=1, max_queued=0)
+        )
+        running = _build_context("ctx-1", "task-1")
+        execute_task = asyncio.create_task(executor.execute(running, EventQueue()))
+        for _ in range(50):
+            if executor._active_executions.get("task-1") and executor._active_executions["task-1"].run_task:
+                break
+            await asyncio.sleep(0.01)
+
+        await executor.execute(_build_context("ctx-2", "task-2"), EventQueue())
+        events = store.load_events("ctx-2")
+        assert events[-1]["status"]["state"] == TaskState.rejected.value
+        assert store.load_chat_messages("ctx-2") == []
+        assert executor.stats()["admission"]["rejected"] == 1
+
+        await executor.cancel(running, EventQueue())
+        await execute_task
+        assert executor.stats()["admission"]["active"] == 0
+
+    asyncio.run(run_test())
+
+
+def test_execute_honors_cancel_between_slot_handoff_and_resume(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("buddy.runtime.a2a.executor.get_client", lambda: _FakeLangfuseClient())
+
+    class _RecordingAgent:
+        runs = 0
+
+        async def run(self, *_args: Any, **_kwargs: Any) -> Any:
+            self.runs += 1
+            raise AssertionError("A canceled task must not run")
+
+    async def run_test() -> None:
+        store = SessionStore(tmp_path / "sessions.db")
+        agent = _RecordingAgent()
+        admission = AdmissionController(max_active=1, max_queued=1)
+        executor = PyAIAgentExecutor(cast(Any, agent), store, admission=admission)
+
+        async def ignore_position(_position: int) -> None:
+            return
+
+        assert await admission.acquire(admission.ticket(), ignore_position)
+        queued = _build_context("ctx-1", "task-1")
+        execute_task = asyncio.create_task(executor.execute(queued, EventQueue()))
+        while admission.stats()["queued"] == 0:
+            await asyncio.sleep(0.01)
+
+        # Hand the slot over, then cancel before the queued task gets to run.
+        admission.release()
+        await executor.cancel(queued, EventQueue())
+        await execute_task
+
+        assert agent.runs == 0
+        assert admission.stats()["active"] == 0
+        assert store.load_events("ctx-1")[-1]["status"]["state"] == TaskState.canceled.value
+        assert [message["content"] for message in store.load_chat_messages("ctx-1")] == ["Request canceled."]
+
+    asyncio.run(run_test())
@@ -0,0 +1,148 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Message, MessageSendParams, Part, Role, TaskState, TextPart
+from buddy.runtime.a2a.context_turns import ContextTurns, Turn
+from buddy.runtime.a2a.executor import PyAIAgentExecutor
+from buddy.session_store import SessionStore
+
+
+class _FakeTraceSpan:
+    def update_trace(self, **_kwargs: Any) -> None:
+        return
+
+    def end(self) -> None:
+        return
+
+
+class _FakeLangfuseClient:
+    def start_span(self, **_kwargs: Any) -> _FakeTraceSpan:
+        return _FakeTraceSpan()
+
+    def flush(self) -> None:
+        return
+
+
+class _GatedAgent:
+    def __init__(self, fail_on: str | None = None) -> None:
+        self.gate = asyncio.Event()
+        self.queries: list[str] = []
+        self.fail_on = fail_on
+
+    async def run(self, query: str, **_kwargs: Any) -> Any:
+        self.queries.append(query)
+        await self.gate.wait()
+        if query == self.fail_on:
+            raise RuntimeError("model unavailable")
+        return SimpleNamespace(output=f"answer to {query}", all_messages=list)
+
+
+def _build_context(context_id: str, task_id: str, text: str) -> RequestContext:
+    return RequestContext(
+        MessageSendParams(
+            message=Message(
+                messageId=f"message-{task_id}",
+                contextId=context_id,
+                taskId=task_id,
+                role=Role.user,
+                parts=[Part(root=TextPart(text=text))],
+            )
+        ),
+        task_id=task_id,
+        context_id=context_id,
+    )
+
+
+def test_context_turns_serialize_per_context_only() -> None:
+    async def run_test() -> None:
+        turns = ContextTurns()
+        running: dict[str, int] = {}
+        peak: dict[str, int] = {}
+
+        async def take_turn(context_id: str, task_id: str) -> None:
+            async with turns.run(context_id, Turn(task_id, [task_id])):
+                running[context_id] = running.get(context_id, 0) + 1
+                peak[context_id] = max(peak.get(context_id, 0), running[context_id])
+                peak["all"] = max(peak.get("all", 0), sum(running.values()))
+                await asyncio.sleep(0.01)
+                running[context_id] -= 1
+
+        await asyncio.gather(*(take_turn(f"ctx-{index % 2}", f"task-{index}") for index in range(6)))
+        assert peak == {"ctx-0": 1, "ctx-1": 1, "all": 2}
+        assert turns.stats()["busy_contexts"] == 0
+
+    asyncio.run(run_test())
+
+
+def test_execute_coalesces_messages_queued_behind_a_running_turn(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("buddy.runtime.a2a.executor.get_client", lambda: _FakeLangfuseClient())
+
+    async def run_test() -> None:
+        store = SessionStore(tmp_path / "sessions.db")
+        agent = _GatedAgent()
+        executor = PyAIAgentExecutor(cast(Any, agent), store, context_turns=ContextTurns(coalesce=True))
+
+        first = asyncio.create_task(executor.execute(_build_context("ctx-1", "task-1", "one"), EventQueue()))
+        while not agent.queries:
+            await asyncio.sleep(0.01)
+        queued = [
+            asyncio.create_task(executor.execute(_build_context("ctx-1", f"task-{index}", text), EventQueue()))
+            for index, text in ((2, "two"), (3, "three"))
+        ]
+        await asyncio.sleep(0.05)
+        assert agent.queries == ["one"]
+
+        agent.gate.set()
+        await asyncio.gather(first, *queued)
+
+        assert agent.queries == ["one", "two\n\nthree"]
+        assert [message["content"] for message in store.load_chat_messages("ctx-1")] == [
+            "one",
+            "answer to one",
+            "two",
+            "three",
+            "answer to two\n\nthree",
+        ]
+        final_states = [event["status"]["state"] for event in store.load_events("ctx-1") if event.get("final")]
+        assert final_states.count(TaskState.completed.value) == 3
+        assert executor.stats()["context_turns"]["merged"] == 1
+
+    asyncio.run(run_test())
+
+
+def test_merged_turn_reports_failure_of_absorbing_turn(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("buddy.runtime.a2a.executor.get_client", lambda: _FakeLangfuseClient())
+
+    async def run_test() -> None:
+        store = SessionStore(tmp_path / "sessions.db")
+        agent = _GatedAgent(fail_on="two\n\nthree")
+        executor = PyAIAgentExecutor(cast(Any, agent), store, context_turns=ContextTurns(coalesce=True))
+
+        first = asyncio.create_task(executor.execute(_build_context("ctx-1", "task-1", "one"), EventQueue()))
+        while not agent.queries:
+            await asyncio.sleep(0.01)
+        absorbing = asyncio.create_task(executor.execute(_build_context("ctx-1", "task-2", "two"), EventQueue()))
+        merged = asyncio.create_task(executor.execute(_build_context("ctx-1", "task-3", "three"), EventQueue()))
+        await asyncio.sleep(0.05)
+
+        agent.gate.set()
+        await first
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            await absorbing
+        await merged
+
+        final_states = {
+            event["taskId"]: event["status"]["state"] for event in store.load_events("ctx-1") if event.get("final")
+        }
+        assert final_states == {
+            "task-1": TaskState.completed.value,
+            "task-2": TaskState.failed.value,
+            "task-3": TaskState.failed.value,
+        }
+
+    asyncio.run(run_test())
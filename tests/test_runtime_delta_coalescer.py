@@ -0,0 +1,96 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Message, MessageSendParams, Part, Role, TextPart
+from buddy.runtime.a2a.delta_coalescer import DeltaCoalescer
+from buddy.runtime.a2a.executor import PyAIAgentExecutor
+from buddy.session_store import SessionStore
+from pydantic_ai import PartDeltaEvent, PartEndEvent, PartStartEvent, TextPartDelta
+from pydantic_ai import TextPart as AgentTextPart
+
+
+class _FakeTraceSpan:
+    def update_trace(self, **_kwargs: Any) -> None:
+        return
+
+    def end(self) -> None:
+        return
+
+
+class _FakeLangfuseClient:
+    def start_span(self, **_kwargs: Any) -> _FakeTraceSpan:
+        return _FakeTraceSpan()
+
+    def flush(self) -> None:
+        return
+
+
+class _StreamingAgent:
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+
+    async def run(self, *_args: Any, event_stream_handler: Any, **_kwargs: Any) -> Any:
+        async def events() -> Any:
+            yield PartStartEvent(index=0, part=AgentTextPart(content=""))
+            for chunk in self.chunks:
+                yield PartDeltaEvent(index=0, delta=TextPartDelta(content_delta=chunk))
+            yield PartEndEvent(index=0, part=AgentTextPart(content="".join(self.chunks)))
+
+        await event_stream_handler(None, events())
+        return SimpleNamespace(output="".join(self.chunks), all_messages=list)
+
+
+def test_coalescer_releases_on_size_and_artifact_change() -> None:
+    coalescer = DeltaCoalescer(max_chars=4)
+    assert coalescer.add("a", "output_delta", "ab") == []
+    assert [delta.text for delta in coalescer.add("a", "output_delta", "cd")] == ["abcd"]
+    assert coalescer.add("a", "output_delta", "e") == []
+    assert [delta.text for delta in coalescer.add("b", "thinking_delta", "f")] == ["e"]
+    drained = coalescer.drain()
+    assert drained is not None and (drained.artifact_id, drained.text) == ("b", "f")
+    assert coalescer.drain() is None
+    assert (coalescer.received, coalescer.emitted) == (4, 3)
+
+    assert [delta.text for delta in DeltaCoalescer().add("a", "output_delta", "x")] == ["x"]
+
+
+def test_execute_coalesces_text_deltas(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("buddy.runtime.a2a.executor.get_client", lambda: _FakeLangfuseClient())
+    chunks = [f"{index} " for index in range(40)]
+
+    async def run_test() -> None:
+        store = SessionStore(tmp_path / "sessions.db")
+        executor = PyAIAgentExecutor(
+            cast(Any, _StreamingAgent(chunks)), store, delta_window_s=60, delta_max_chars=30, event_buffer_size=8
+        )
+        context = RequestContext(
+            MessageSendParams(
+                message=Message(
+                    messageId="message-1",
+                    contextId="ctx-1",
+                    taskId="task-1",
+                    role=Role.user,
+                    parts=[Part(root=TextPart(text="count"))],
+                )
+            ),
+            task_id="task-1",
+            context_id="ctx-1",
+        )
+        await executor.execute(context, EventQueue())
+
+        deltas = [
+            event["artifact"]["parts"][0]["text"]
+            for event in store.load_events("ctx-1")
+            if event.get("artifact", {}).get("name") == "output_delta"
+        ]
+        assert "".join(deltas) == "".join(chunks)
+        assert 1 < len(deltas) < len(chunks) // 4
+        assert executor.stats()["deltas"] == {"received": len(chunks), "emitted": len(deltas)}
+        event_buffer = executor.stats()["event_buffer"]
+        assert 0 < event_buffer["high_water"] <= 8
+
+    asyncio.run(run_test())
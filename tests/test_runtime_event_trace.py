@@ -0,0 +1,36 @@
+import json
+import logging
+
+from buddy.shared.logging import SampledTrace
+
+
+class _CaptureHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(level=logging.DEBUG)
+        self.events: list[dict[str, object]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.events.append(json.loads(record.getMessage()))
+
+
+def test_sampled_trace_is_gated_by_rate_and_debug_level() -> None:
+    logger = logging.getLogger("buddy.tests.event_trace")
+    handler = _CaptureHandler()
+    logger.addHandler(handler)
+    try:
+        logger.setLevel(logging.INFO)
+        assert not SampledTrace(logger, "agent_stream_event", sample_rate=1).sample()
+
+        logger.setLevel(logging.DEBUG)
+        assert not SampledTrace(logger, "agent_stream_event", sample_rate=0).sample()
+        trace = SampledTrace(logger, "agent_stream_event", sample_rate=1)
+        assert trace.sample()
+        trace.emit(event_kind="PartDeltaEvent", context_id="ctx-1")
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+
+    assert len(handler.events) == 1
+    assert handler.events[0]["event"] == "agent_stream_event"
+    assert handler.events[0]["event_kind"] == "PartDeltaEvent"
+    assert handler.events[0]["sample_rate"] == 1.0
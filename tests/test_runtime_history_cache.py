@@ -0,0 +1,73 @@
+from pathlib import Path
+from typing import Any, cast
+
+from buddy.runtime.a2a.executor import PyAIAgentExecutor
+from buddy.runtime.a2a.history_cache import MessageHistoryCache
+from buddy.session_store import SessionStore
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+
+def test_history_cache_evicts_by_entry_count_and_bytes() -> None:
+    cache = MessageHistoryCache(max_entries=2, max_bytes=100)
+
+    cache.put("ctx-1", ["a"], 40)
+    cache.put("ctx-2", ["b"], 40)
+    assert cache.get("ctx-1") == ["a"]
+
+    cache.put("ctx-3", ["c"], 40)
+    assert cache.get("ctx-2") is None
+    assert cache.get("ctx-1") == ["a"]
+
+    cache.put("ctx-4", ["d"], 90)
+    assert cache.get("ctx-1") is None
+    assert cache.get("ctx-3") is None
+    assert cache.get("ctx-4") == ["d"]
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["size_bytes"] == 90
+    assert stats["hits"] == 3
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 3
+    assert stats["stale"] == 0
+
+
+def test_history_cache_returns_copies_and_skips_oversized_histories() -> None:
+    cache = MessageHistoryCache(max_entries=4, max_bytes=10)
+    cache.put("ctx-1", ["a"], 5)
+
+    cached = cache.get("ctx-1")
+    assert cached is not None
+    cached.append("mutated")
+    assert cache.get("ctx-1") == ["a"]
+
+    cache.put("ctx-1", ["a", "b"], 50)
+    assert cache.get("ctx-1") is None
+
+
+def test_history_cache_drops_entries_whose_store_version_changed() -> None:
+    cache = MessageHistoryCache()
+    cache.put("ctx-1", ["a"], 5, "1:7")
+
+    assert cache.get("ctx-1", "1:7") == ["a"]
+    assert cache.get("ctx-1", None) is None
+    assert cache.get("ctx-1", "1:7") is None
+    assert cache.stats()["stale"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_executor_does_not_serve_history_of_a_deleted_session(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    executor = PyAIAgentExecutor(cast(Any, object()), store)
+    turn = [ModelRequest(parts=[UserPromptPart(content="hello")]), ModelResponse(parts=[TextPart(content="hi")])]
+    store.save_messages("ctx-1", turn)
+
+    assert len(executor._load_history("ctx-1")) == 2
+    assert len(executor._load_history("ctx-1")) == 2
+    assert executor.history_cache.hits == 1
+
+    store.delete_sessions(["ctx-1"])
+    assert executor._load_history("ctx-1") == []
+
+    store.save_messages("ctx-1", turn[:1])
+    assert len(executor._load_history("ctx-1")) == 1
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+from buddy.runtime.tools import todo_store
+from buddy.session_store import SessionStore
+
+
+def test_todos_are_scoped_to_the_active_context(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    monkeypatch.setattr(todo_store, "_store", lambda: store)
+    item: todo_store.TodoItem = {"id": "t", "content": "Write tests", "status": "pending", "priority": "high"}
+
+    with todo_store.todo_scope("ctx-1"):
+        assert [todo["id"] for todo in todo_store.add_todos([item, item])] == ["t", "t-2"]
+        result = todo_store.update_todo("t", {"status": "completed"})
+        assert result["before"]["status"] == "pending"
+        assert [todo["status"] for todo in result["todos"]] == ["completed", "pending"]
+    with todo_store.todo_scope("ctx-2"):
+        assert todo_store.get_todos() == []
+        todo_store.add_todos([item])
+
+    with todo_store.todo_scope("ctx-1"):
+        assert [todo["id"] for todo in todo_store.delete_todos(["t"])] == ["t-2"]
+    assert store.load_todos("ctx-2") == [item]
+    assert todo_store.get_todos() == []
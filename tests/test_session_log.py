@@ -0,0 +1,104 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from buddy.session_backend import open_session_backend
+from buddy.session_log import SegmentedLogStore
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+
+def test_log_store_replays_segments_on_reopen(tmp_path: Path) -> None:
+    root = tmp_path / "sessions-log"
+    store = SegmentedLogStore(root, segment_bytes=512)
+    store.append_chat_message("ctx-1", "user", "hello")
+    first_turn = [ModelRequest(parts=[UserPromptPart(content="hello")]), ModelResponse(parts=[TextPart(content="hi")])]
+    store.save_messages("ctx-1", first_turn)
+    first_version = store.messages_version("ctx-1")
+    store.save_messages("ctx-1", [first_turn[0], ModelResponse(parts=[TextPart(content="retried")])])
+    for _ in range(20):
+        index = store.allocate_event_indexes("ctx-1")
+        store.append_events("ctx-1", [(index, {"kind": "status-update", "n": index})])
+    store.save_todos("ctx-1", [{"id": "a", "content": "A", "status": "pending", "priority": "low"}])
+    store.append_todos("ctx-1", [{"id": "b", "content": "B", "status": "pending", "priority": "high"}])
+    assert store.update_todo("ctx-1", "a", {"status": "completed"})
+    assert store.delete_todos("ctx-1", ["b", "missing"]) == 1
+    size = store.messages_size("ctx-1")
+    version = store.messages_version("ctx-1")
+    assert version is not None and version != first_version
+    store.close()
+    assert len(list(root.glob("segment-*.jsonl"))) > 1
+
+    reopened = SegmentedLogStore(root, segment_bytes=512)
+    assert reopened.load_chat_messages("ctx-1") == [{"id": "1", "role": "user", "content": "hello"}]
+    messages = reopened.load_messages("ctx-1")
+    assert [part.content for message in messages for part in message.parts] == ["hello", "retried"]
+    assert reopened.messages_size("ctx-1") == size
+    assert reopened.messages_version("ctx-1") == version
+    assert [event["n"] for event in reopened.load_events("ctx-1", after_index=15, limit=3)] == [16, 17, 18]
+    assert reopened.allocate_event_indexes("ctx-1") == 20
+    assert reopened.load_todos("ctx-1") == [{"id": "a", "content": "A", "status": "completed", "priority": "low"}]
+
+
+def test_log_store_drops_torn_trailing_record(tmp_path: Path) -> None:
+    root = tmp_path / "sessions-log"
+    store = SegmentedLogStore(root)
+    store.append_events("ctx-1", [(0, {"kind": "status-update"})])
+    store.close()
+    segment = next(root.glob("segment-*.jsonl"))
+    with segment.open("ab") as torn:
+        torn.write(b'{"op":"event","session":"ctx-1","ind')
+
+    reopened = SegmentedLogStore(root)
+    reopened.append_events("ctx-1", [(1, {"kind": "artifact-update"})])
+    assert reopened.load_events("ctx-1") == [{"kind": "status-update"}, {"kind": "artifact-update"}]
+
+
+def test_log_store_skips_corrupt_record_mid_segment(tmp_path: Path) -> None:
+    root = tmp_path / "sessions-log"
+    store = SegmentedLogStore(root)
+    for index in range(3):
+        store.append_events("ctx-1", [(index, {"kind": "status-update", "n": index})])
+    store.close()
+    segment = next(root.glob("segment-*.jsonl"))
+    lines = segment.read_bytes().splitlines(keepends=True)
+    lines[1] = b"{not json" + b" " * (len(lines[1]) - 10) + b"\n"
+    segment.write_bytes(b"".join(lines))
+
+    reopened = SegmentedLogStore(root)
+    assert [event["n"] for event in reopened.load_events("ctx-1")] == [0, 2]
+    assert segment.stat().st_size == sum(len(line) for line in lines)
+
+
+def test_log_store_concurrent_todo_updates_keep_each_others_fields(tmp_path: Path) -> None:
+    store = SegmentedLogStore(tmp_path / "sessions-log")
+    todos = [{"id": str(index), "content": "task", "status": "pending", "priority": "low"} for index in range(200)]
+    store.save_todos("ctx-1", todos)
+    barrier = threading.Barrier(2)
+
+    def update(fields: dict[str, str]) -> None:
+        barrier.wait()
+        for todo in todos:
+            store.update_todo("ctx-1", todo["id"], fields)
+
+    workers = [
+        threading.Thread(target=update, args=(fields,)) for fields in ({"status": "completed"}, {"priority": "high"})
+    ]
+    # Switch threads often so unsynchronized read-modify-writes would interleave.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert {(todo["status"], todo["priority"]) for todo in store.load_todos("ctx-1")} == {("completed", "high")}
+
+
+def test_open_session_backend_rejects_unknown_kind(tmp_path: Path) -> None:
+    assert isinstance(open_session_backend("log", tmp_path / "log"), SegmentedLogStore)
+    with pytest.raises(ValueError, match="Unknown session backend"):
+        open_session_backend("rocksdb", tmp_path / "db")
@@ -0,0 +1,588 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+from buddy.session_migrations import MIGRATIONS, schema_version
+from buddy.session_store import RetentionPolicy, SessionStore
+from buddy.session_summary import refresh_session_summaries
+from buddy.session_transfer import encode_ndjson, read_ndjson
+
+
+def test_session_store_reuses_connection_per_thread(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    main_connection = store._connect()
+    assert store._connect() is main_connection
+
+    thread_connections = []
+    worker = threading.Thread(target=lambda: thread_connections.append(store._connect()))
+    worker.start()
+    worker.join()
+    assert thread_connections[0] is not main_connection
+
+    store.append_event("ctx-1", 0, {"kind": "status-update"})
+    store.close()
+    assert store._connect() is not main_connection
+    assert store.load_events("ctx-1") == [{"kind": "status-update"}]
+
+
+def test_session_store_upgrades_unversioned_database_in_place(tmp_path: Path) -> None:
+    db_path = tmp_path / "sessions.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE sessions(session_id TEXT PRIMARY KEY, created_at TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL, metadata_json TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE events(id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,"
+            " event_index INTEGER NOT NULL, event_type TEXT NOT NULL, payload_json TEXT NOT NULL,"
+            " created_at TEXT NOT NULL)"
+        )
+        conn.execute("INSERT INTO sessions VALUES('ctx-1', 't0', 't0', '{}')")
+        conn.execute(
+            "INSERT INTO events(session_id, event_index, event_type, payload_json, created_at)"
+            " VALUES('ctx-1', 0, 'status-update', ?, 't0')",
+            ('{"kind": "status-update"}',),
+        )
+
+    store = SessionStore(db_path)
+    conn = store._connect()
+    assert schema_version(conn) == len(MIGRATIONS)
+    assert store.load_events("ctx-1") == [{"kind": "status-update"}]
+
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT payload_json FROM events WHERE session_id = ? ORDER BY event_index", ("ctx-1",)
+    ).fetchall()
+    assert any("idx_events_session_event" in row[-1] for row in plan)
+
+
+def test_todo_lists_migrate_to_per_item_rows(tmp_path: Path) -> None:
+    db_path = tmp_path / "sessions.db"
+    with sqlite3.connect(db_path) as conn:
+        for migration in MIGRATIONS[:9]:
+            migration(conn)
+        conn.execute("PRAGMA user_version = 9")
+        conn.execute(
+            "INSERT INTO todo_lists(scope, todos_json, updated_at) VALUES('default', ?, 't0')",
+            (
+                '[{"id": "a", "content": "A", "status": "pending", "priority": "low"},'
+                ' {"id": "b", "content": "B", "status": "completed", "priority": "high"}, "junk"]',
+            ),
+        )
+
+    store = SessionStore(db_path)
+    assert [todo["id"] for todo in store.load_todos("default")] == ["a", "b"]
+
+    store.append_todos("default", [{"id": "c", "content": "C", "status": "pending", "priority": "medium"}])
+    assert store.update_todo("default", "a", {"status": "in_progress"})
+    assert not store.update_todo("default", "missing", {"status": "completed"})
+    assert store.delete_todos("default", ["b"]) == 1
+    assert store.load_todos("default") == [
+        {"id": "a", "content": "A", "status": "in_progress", "priority": "low"},
+        {"id": "c", "content": "C", "status": "pending", "priority": "medium"},
+    ]
+    assert store.load_todos("ctx-1") == []
+
+
+def test_migration_rehashes_messages_for_compact_json(tmp_path: Path) -> None:
+    db_path = tmp_path / "sessions.db"
+    history = [{"kind": "request", "parts": [{"content": "hi"}]}, {"kind": "response", "parts": []}]
+    with sqlite3.connect(db_path) as conn:
+        for migration in MIGRATIONS[:10]:
+            migration(conn)
+        conn.execute("PRAGMA user_version = 10")
+        conn.execute(
+            "INSERT INTO sessions(session_id, created_at, updated_at, metadata_json) VALUES('ctx-1', 't0', 't0', '{}')"
+        )
+        for index, message in enumerate(history):
+            legacy_json = json.dumps(message)
+            conn.execute(
+                "INSERT INTO messages(session_id, message_index, message_json, content_hash, created_at)"
+                " VALUES('ctx-1', ?, ?, ?, 't0')",
+                (index, legacy_json, hashlib.sha256(legacy_json.encode("utf-8")).hexdigest()),
+            )
+
+    store = SessionStore(db_path)
+    conn = store._connect()
+    original_ids = [row[0] for row in conn.execute("SELECT id FROM messages ORDER BY message_index")]
+    store.save_messages("ctx-1", history)
+    assert [row[0] for row in conn.execute("SELECT id FROM messages ORDER BY message_index")] == original_ids
+    assert store.load_messages_payload("ctx-1") == history
+
+
+def test_save_messages_appends_new_suffix_and_rewrites_on_divergence(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    first_turn = [{"kind": "request", "index": 0}, {"kind": "response", "index": 1}]
+    store.save_messages("ctx-1", first_turn)
+
+    conn = store._connect()
+    original_ids = [row[0] for row in conn.execute("SELECT id FROM messages ORDER BY message_index")]
+
+    second_turn = [*first_turn, {"kind": "request", "index": 2}]
+    store.save_messages("ctx-1", second_turn)
+    ids = [row[0] for row in conn.execute("SELECT id FROM messages ORDER BY message_index")]
+    assert ids[:2] == original_ids
+    assert store.load_messages_payload("ctx-1") == second_turn
+
+    diverged = [first_turn[0], {"kind": "response", "index": "retried"}]
+    store.save_messages("ctx-1", diverged)
+    ids = [row[0] for row in conn.execute("SELECT id FROM messages ORDER BY message_index")]
+    assert ids[0] == original_ids[0]
+    assert store.load_messages_payload("ctx-1") == diverged
+
+
+def test_load_session_snapshot_pages_events_and_messages(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    for index in range(5):
+        store.append_event("ctx-1", index, {"kind": "artifact-update", "n": index})
+    for content in ["one", "two", "three"]:
+        store.append_chat_message("ctx-1", "user", content)
+
+    first = store.load_session_snapshot("ctx-1", events_limit=2, messages_limit=2)
+    assert first is not None
+    assert [event["n"] for event in first["events"]] == [0, 1]
+    assert [message["content"] for message in first["messages"]] == ["one", "two"]
+    assert first["next_events_after_index"] == 1
+
+    last = store.load_session_snapshot(
+        "ctx-1",
+        events_after_index=first["next_events_after_index"],
+        events_limit=3,
+        messages_after_id=first["next_messages_after_id"],
+    )
+    assert last is not None
+    assert [event["n"] for event in last["events"]] == [2, 3, 4]
+    assert [message["content"] for message in last["messages"]] == ["three"]
+    assert last["next_events_after_index"] is None
+    assert last["next_messages_after_id"] is None
+
+    assert store.load_session_snapshot("missing") is None
+
+
+def test_event_pages_do_not_skip_events_sharing_an_index(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    # Databases written before event indexes were allocated can repeat them.
+    for index, name in [(0, "a"), (1, "b"), (1, "c"), (2, "d")]:
+        store.append_event("ctx-1", index, {"kind": "status-update", "name": name})
+
+    names: list[str] = []
+    after: tuple[int | None, int | None] = (None, None)
+    while True:
+        page = store.load_session_snapshot(
+            "ctx-1", events_after_index=after[0], events_after_seq=after[1], events_limit=2
+        )
+        assert page is not None
+        names.extend(event["name"] for event in page["events"])
+        after = (page["next_events_after_index"], page["next_events_after_seq"])
+        if after[0] is None:
+            break
+    assert names == ["a", "b", "c", "d"]
+    assert [event["name"] for event in store.load_events("ctx-1", after_index=1)] == ["d"]
+
+
+def test_compact_task_materializes_streamed_artifacts(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+
+    def artifact_event(name: str, text: str, *, append: bool = False) -> dict[str, object]:
+        payload: dict[str, object] = {
+            "kind": "artifact-update",
+            "contextId": "ctx-1",
+            "taskId": "task-1",
+            "artifact": {"artifactId": "art-1", "name": name, "parts": [{"kind": "text", "text": text}]},
+        }
+        if append:
+            payload["append"] = True
+        return payload
+
+    store.append_events(
+        "ctx-1",
+        [
+            (0, {"kind": "status-update", "taskId": "task-1", "status": {"state": "working"}}),
+            (1, artifact_event("output_start", "")),
+            (2, artifact_event("output_delta", "Hel", append=True)),
+            (3, artifact_event("output_delta", "lo", append=True)),
+            (4, {"kind": "status-update", "taskId": "task-1", "final": True, "status": {"state": "completed"}}),
+        ],
+    )
+
+    assert store.compact_task("ctx-1", "task-1") == 1
+    compact = store.load_events("ctx-1", view="compact")
+    assert [event["kind"] for event in compact] == ["status-update", "artifact-update", "status-update"]
+    assert compact[1]["artifact"]["parts"] == [{"kind": "text", "text": "Hello"}]
+    assert "append" not in compact[1]
+    assert len(store.load_events("ctx-1")) == 5
+    assert store.compact_task("ctx-1", "task-1") == 1
+    conn = store._connect()
+    incremental = conn.execute("SELECT byte_size FROM sessions").fetchone()[0]
+    refresh_session_summaries(conn)
+    assert conn.execute("SELECT byte_size FROM sessions").fetchone()[0] == incremental
+
+    assert store.prune_compacted_events(older_than_s=-1) == 3
+    assert store.load_events("ctx-1") == compact
+
+
+def test_compressed_payloads_round_trip_and_recompress(tmp_path: Path) -> None:
+    db_path = tmp_path / "sessions.db"
+    plain_store = SessionStore(db_path, compress=False)
+    large_text = "fetched page " * 50
+    plain_store.append_event("ctx-1", 0, {"kind": "artifact-update", "text": large_text})
+    plain_store.save_messages("ctx-1", [{"kind": "request", "content": large_text}])
+    plain_store.close()
+
+    store = SessionStore(db_path, compress=True)
+    assert store.recompress(compress=True) == 2
+    conn = store._connect()
+    assert isinstance(conn.execute("SELECT payload_json FROM events").fetchone()[0], bytes)
+    assert isinstance(conn.execute("SELECT message_json FROM messages").fetchone()[0], bytes)
+
+    store.append_event("ctx-1", 1, {"kind": "status-update", "text": large_text})
+    assert [event["text"] for event in store.load_events("ctx-1")] == [large_text, large_text]
+    assert store.load_messages_payload("ctx-1") == [{"kind": "request", "content": large_text}]
+
+
+def test_large_strings_are_stored_once_in_blob_store(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db", blob_threshold=100)
+    page = "<html>" + "x" * 500 + "</html>"
+    tool_result = {"kind": "artifact-update", "artifact": {"parts": [{"kind": "data", "data": {"result": page}}]}}
+
+    store.append_event("ctx-1", 0, tool_result)
+    store.append_event("ctx-2", 0, tool_result)
+    store.save_messages("ctx-1", [{"kind": "request", "parts": [{"content": page}]}])
+
+    blob_files = [path for path in (tmp_path / "blobs").rglob("*") if path.is_file()]
+    assert len(blob_files) == 1
+
+    assert store.load_events("ctx-2") == [tool_result]
+    assert store.load_messages_payload("ctx-1") == [{"kind": "request", "parts": [{"content": page}]}]
+
+    unresolved = store.load_events("ctx-1", resolve_blobs=False)[0]
+    reference = unresolved["artifact"]["parts"][0]["data"]["result"]
+    assert store.load_blob(reference["$buddy_blob"]) == page
+
+    stored = store._connect().execute("SELECT COUNT(*) FROM blob_refs").fetchone()[0]
+    assert stored == 2
+
+
+def test_enforce_retention_deletes_sessions_and_orphaned_blobs(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db", blob_threshold=100)
+    shared_page = "x" * 500
+    store.append_event("old", 0, {"kind": "artifact-update", "text": shared_page, "only": "y" * 500})
+    store.append_event("keep", 0, {"kind": "artifact-update", "text": shared_page})
+    conn = store._connect()
+    with conn:
+        conn.execute("UPDATE sessions SET updated_at = '2000-01-01T00:00:00+00:00' WHERE session_id = 'old'")
+
+    counts = store.enforce_retention(RetentionPolicy(max_age_s=3600))
+    assert counts["deleted_sessions"] == 1
+    assert [session["session_id"] for session in store.list_sessions()] == ["keep"]
+    assert conn.execute("SELECT COUNT(*) FROM events WHERE session_id = 'old'").fetchone()[0] == 0
+    blob_files = [path for path in (tmp_path / "blobs").rglob("*") if path.is_file()]
+    assert len(blob_files) == 1
+    assert store.load_events("keep") == [{"kind": "artifact-update", "text": shared_page}]
+
+    store.incremental_vacuum()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_existing_database_converts_to_incremental_vacuum_only_on_request(tmp_path: Path) -> None:
+    db_path = tmp_path / "sessions.db"
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE legacy(x)")
+    legacy.commit()
+    legacy.close()
+
+    store = SessionStore(db_path)
+    store.append_event("ctx-1", 0, {"kind": "status-update"})
+    conn = store._connect()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    assert store.enable_incremental_vacuum()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert store.load_events("ctx-1") == [{"kind": "status-update"}]
+
+
+def test_enforce_retention_trims_oldest_events_of_oversized_sessions(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_event("ctx-2", 0, {"kind": "status-update"})
+    for index in range(10):
+        store.append_event("ctx-1", index, {"kind": "status-update", "n": index, "pad": "p" * 100})
+
+    counts = store.enforce_retention(RetentionPolicy(max_sessions=1, max_bytes_per_session=600))
+    assert counts["deleted_sessions"] == 1
+    remaining = [event["n"] for event in store.load_events("ctx-1")]
+    assert remaining == list(range(10 - len(remaining), 10))
+    assert 0 < len(remaining) <= 5
+
+
+def test_trimming_through_a_compacted_artifact_keeps_its_text_once(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+
+    def artifact_event(name: str, text: str, *, append: bool = False) -> dict[str, object]:
+        payload: dict[str, object] = {
+            "kind": "artifact-update",
+            "taskId": "task-1",
+            "artifact": {"artifactId": "art-1", "name": name, "parts": [{"kind": "text", "text": text}]},
+        }
+        if append:
+            payload["append"] = True
+        return payload
+
+    chunks = [f"{index:02d}" * 25 for index in range(9)]
+    store.append_events(
+        "ctx-1",
+        [
+            (0, {"kind": "status-update", "taskId": "task-1", "pad": "p" * 300}),
+            (1, artifact_event("output_start", "")),
+            *((2 + index, artifact_event("output_delta", chunk, append=True)) for index, chunk in enumerate(chunks)),
+            (11, artifact_event("output_end", "".join(chunks))),
+            (12, {"kind": "status-update", "taskId": "task-1", "final": True}),
+        ],
+    )
+    store.compact_task("ctx-1", "task-1")
+    size = store._connect().execute("SELECT byte_size FROM sessions").fetchone()[0]
+
+    # Frees the first status update, the start event and a few deltas.
+    store.enforce_retention(RetentionPolicy(max_bytes_per_session=size - 500))
+    texts = [
+        part["text"]
+        for event in store.load_events("ctx-1")
+        for part in event.get("artifact", {}).get("parts", [])
+        if part.get("text")
+    ]
+    assert texts == ["".join(chunks)]
+
+
+def test_event_index_allocation_is_unique_across_threads(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_event("ctx-1", 41, {"kind": "status-update"})
+    allocated: list[int] = []
+    lock = threading.Lock()
+
+    def allocate() -> None:
+        for _ in range(100):
+            index = store.allocate_event_indexes("ctx-1")
+            with lock:
+                allocated.append(index)
+
+    workers = [threading.Thread(target=allocate) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(set(allocated)) == 400
+    assert min(allocated) == 42
+    assert SessionStore(tmp_path / "sessions.db").allocate_event_indexes("ctx-1") > max(allocated)
+
+
+def test_single_writer_groups_concurrent_writes(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db", single_writer=True)
+
+    def write(worker: int) -> None:
+        for position in range(50):
+            store.append_chat_message(f"ctx-{worker}", "user", str(position))
+
+    workers = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [len(store.load_chat_messages(f"ctx-{worker}")) for worker in range(4)] == [50, 50, 50, 50]
+    failed = store.submit_write(store.append_todos, "ctx-0", [{"id": "b", "content": "B"}])
+    saved = store.submit_write(
+        store.append_todos, "ctx-0", [{"id": "a", "content": "A", "status": "pending", "priority": "low"}]
+    )
+    assert saved.result() is None
+    with pytest.raises(KeyError):
+        failed.result()
+    store.close()
+    assert [todo["id"] for todo in SessionStore(tmp_path / "sessions.db").load_todos("ctx-0")] == ["a"]
+
+
+def test_search_ranks_chat_messages_and_compacted_artifacts(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_chat_message("ctx-1", "user", "Please fetch the quarterly report")
+    store.append_chat_message("ctx-2", "user", "Something unrelated")
+
+    def delta(text: str) -> dict[str, object]:
+        return {
+            "kind": "artifact-update",
+            "taskId": "task-1",
+            "artifact": {"artifactId": "art-1", "name": "output_delta", "parts": [{"kind": "text", "text": text}]},
+            "append": True,
+        }
+
+    store.append_events("ctx-2", [(0, delta("The weather in Pa")), (1, delta("ris is sunny"))])
+    assert store.search("Paris")["results"] == []
+    assert (
+        store
+        ._connect()
+        .execute("SELECT COUNT(*) FROM search_documents WHERE artifact_id = ?", ("art-1",))
+        .fetchone()[0]
+        == 0
+    )
+
+    store.compact_task("ctx-2", "task-1")
+    hits = store.search("paris sunny")["results"]
+    assert [(hit["session_id"], hit["source"]) for hit in hits] == [("ctx-2", "artifact")]
+    assert "[Paris]" in hits[0]["snippet"]
+
+    first_page = store.search("quarterly", limit=1)
+    assert first_page["results"][0]["session_id"] == "ctx-1"
+    assert first_page["next_cursor"] is None
+    assert [hit["session_id"] for hit in store.search('report" OR')["results"]] == []
+    assert [hit["session_id"] for hit in store.search('"report')["results"]] == ["ctx-1"]
+
+    store.delete_sessions(["ctx-1", "ctx-2"])
+    assert store._connect().execute("SELECT COUNT(*) FROM search_index").fetchone()[0] == 0
+
+
+def test_list_sessions_returns_maintained_summaries(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_chat_message("ctx-1", "user", "Find flights")
+    store.append_events(
+        "ctx-1",
+        [
+            (0, {"kind": "status-update", "status": {"state": "working"}}),
+            (1, {"kind": "artifact-update", "artifact": {"artifactId": "a", "name": "tool_call", "parts": []}}),
+            (2, {"kind": "status-update", "status": {"state": "completed"}, "final": True}),
+        ],
+    )
+    store.save_messages("ctx-1", [{"kind": "request"}, {"kind": "response"}])
+    store.append_chat_message("ctx-1", "assistant", "Found 3 flights")
+
+    [session] = store.list_sessions()
+    summary = session["summary"]
+    assert summary["message_count"] == 2
+    assert summary["event_count"] == 3
+    assert summary["last_preview"] == "Found 3 flights"
+    assert summary["last_task_state"] == "completed"
+    assert summary["tool_call_count"] == 1
+
+    store.save_messages("ctx-1", [{"kind": "request"}])
+    conn = store._connect()
+    incremental = conn.execute("SELECT byte_size FROM sessions").fetchone()[0]
+    refresh_session_summaries(conn)
+    assert conn.execute("SELECT byte_size FROM sessions").fetchone()[0] == incremental
+
+
+def test_fork_session_inherits_history_without_copying(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    history = [{"kind": "request", "n": index} for index in range(4)]
+    store.save_messages("parent", history)
+    for index in range(3):
+        store.append_event("parent", index, {"kind": "status-update", "n": index})
+
+    fork_id = store.fork_session("parent", message_index=2, event_index=2)
+    conn = store._connect()
+    assert conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (fork_id,)).fetchone()[0] == 0
+    assert store.load_messages_payload(fork_id) == history[:2]
+    assert [event["n"] for event in store.load_events(fork_id)] == [0, 1]
+
+    store.save_messages(fork_id, [*history[:2], {"kind": "request", "n": "retry"}])
+    store.append_event(fork_id, store.allocate_event_indexes(fork_id), {"kind": "status-update", "n": "retry"})
+    grandchild = store.fork_session(fork_id)
+    assert store.load_messages_payload(grandchild) == [*history[:2], {"kind": "request", "n": "retry"}]
+    assert [event["n"] for event in store.load_events(grandchild)] == [0, 1, "retry"]
+    assert store.load_messages_payload("parent") == history
+
+    store.save_messages(grandchild, [history[0]])
+    assert store.load_messages_payload(grandchild) == [history[0]]
+    assert store.load_messages_payload(fork_id)[-1] == {"kind": "request", "n": "retry"}
+
+    store.delete_sessions(["parent", fork_id])
+    assert store.load_messages_payload(grandchild) == [history[0]]
+    assert [event["n"] for event in store.load_events(grandchild)] == [0, 1, "retry"]
+    session = store.get_session(grandchild)
+    assert session is not None
+    assert session["parent"] is None
+
+
+def test_export_and_import_round_trip_through_gzip_ndjson(tmp_path: Path) -> None:
+    source = SessionStore(tmp_path / "source" / "sessions.db", blob_threshold=100)
+    source.append_chat_message("ctx-1", "user", "hello")
+    source.save_messages("ctx-1", [{"kind": "request", "content": "x" * 500}])
+    source.append_event("ctx-1", 0, {"kind": "status-update", "status": {"state": "completed"}})
+    for index, text in [(1, "wombat "), (2, "burrow")]:
+        source.append_event(
+            "ctx-1",
+            index,
+            {
+                "kind": "artifact-update",
+                "append": True,
+                "artifact": {"artifactId": "art-1", "parts": [{"kind": "text", "text": text}]},
+            },
+        )
+    fork_id = source.fork_session("ctx-1")
+    source.append_event("other", 0, {"kind": "status-update"})
+
+    export_path = tmp_path / "sessions.ndjson.gz"
+    export_path.write_bytes(b"".join(encode_ndjson(source.export_records([fork_id]), compress=True)))
+
+    target = SessionStore(tmp_path / "target" / "sessions.db", compress=True)
+    counts = target.import_records(read_ndjson(export_path), batch_size=2)
+    assert counts["session"] == 2
+    assert sorted(session["session_id"] for session in target.list_sessions()) == sorted(["ctx-1", fork_id])
+    assert target.load_messages_payload(fork_id) == source.load_messages_payload(fork_id)
+    assert target.load_events("ctx-1") == source.load_events("ctx-1")
+    assert target.load_chat_messages("ctx-1")[0]["content"] == "hello"
+    assert target.search("hello")["results"][0]["session_id"] == "ctx-1"
+    for query in ["hello", "wombat", "burrow"]:
+        assert target.search(query)["results"] == source.search(query)["results"]
+    search_rows = "SELECT COUNT(*) FROM search_documents WHERE artifact_id = 'art-1'"
+    assert target._connect().execute(search_rows).fetchone() == source._connect().execute(search_rows).fetchone()
+
+    assert target.import_records(read_ndjson(export_path))["session"] == 0
+    assert len(target.load_events("ctx-1")) == 3
+
+
+def test_export_analytics_is_incremental(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    from buddy.session_analytics import export_analytics
+    from pyarrow import dataset
+
+    store = SessionStore(tmp_path / "sessions.db")
+
+    def tool_events(call_id: str, ok: bool) -> list[tuple[int, dict[str, object]]]:
+        data = {"toolName": "fetch", "toolCallId": call_id, "args": {"url": "https://example.com"}}
+        return [
+            (
+                0,
+                {
+                    "kind": "artifact-update",
+                    "artifact": {"name": "tool_call", "parts": [{"kind": "data", "data": data}]},
+                },
+            ),
+            (
+                1,
+                {
+                    "kind": "artifact-update",
+                    "artifact": {
+                        "name": "tool_result",
+                        "parts": [{"kind": "data", "data": {**data, "result": "ok", "ok": ok}}],
+                    },
+                },
+            ),
+            (2, {"kind": "status-update", "final": True, "status": {"state": "completed"}}),
+        ]
+
+    store.append_events("ctx-1", tool_events("call-1", ok=True))
+    store.save_messages(
+        "ctx-1", [{"kind": "response", "model_name": "m", "usage": {"input_tokens": 7, "output_tokens": 3}}]
+    )
+    output = tmp_path / "analytics"
+    assert export_analytics(store, output) == {"events": 3, "model_responses": 1}
+
+    store.append_events("ctx-2", tool_events("call-2", ok=False))
+    assert export_analytics(store, output, batch_size=2) == {"events": 3, "model_responses": 0}
+
+    events = dataset.dataset(output / "events").to_table().to_pylist()
+    results = [row for row in events if row["kind"] == "tool_result"]
+    assert [row["ok"] for row in results] == [True, False]
+    assert all(row["latency_ms"] is not None and row["result_chars"] == 2 for row in results)
+    usage = dataset.dataset(output / "model_responses").to_table().to_pylist()
+    assert [(row["input_tokens"], row["output_tokens"]) for row in usage] == [(7, 3)]
@@ -0,0 +1,100 @@
+import gzip
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
+
+from buddy.control_plane.routes.sessions import build_sessions_router
+from buddy.session_store import SessionStore
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def _client(store: SessionStore) -> TestClient:
+    app = FastAPI()
+    app.include_router(build_sessions_router(cast(Any, SimpleNamespace(session_store=store))))
+    return TestClient(app)
+
+
+def test_get_session_paginates_events_with_cursor(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    for index in range(3):
+        store.append_event("ctx-1", index, {"kind": "status-update", "n": index})
+    client = _client(store)
+
+    first = client.get("/sessions/ctx-1", params={"limit": 2})
+    assert first.status_code == 200
+    assert [event["n"] for event in first.json()["events"]] == [0, 1]
+    cursors = first.json()["cursors"]
+
+    second = client.get(
+        "/sessions/ctx-1", params={"limit": 2, "after_index": cursors["after_index"], "after_seq": cursors["after_seq"]}
+    )
+    assert [event["n"] for event in second.json()["events"]] == [2]
+    assert second.json()["cursors"]["after_index"] is None
+
+    assert client.get("/sessions/ctx-1", params={"limit": "0"}).status_code == 400
+    assert client.get("/sessions/ctx-1", params={"after_index": 0, "after_seq": "x"}).status_code == 400
+    assert client.get("/sessions/missing").status_code == 404
+
+
+def test_delete_sessions_single_and_bulk(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    for session_id in ["ctx-1", "ctx-2", "ctx-3"]:
+        store.append_event(session_id, 0, {"kind": "status-update"})
+    client = _client(store)
+
+    assert client.delete("/sessions/ctx-1").json() == {"deleted": 1}
+    assert client.delete("/sessions/ctx-1").status_code == 404
+
+    response = client.post("/sessions/delete", json={"session_ids": ["ctx-2", "ctx-3", "missing"]})
+    assert response.json() == {"deleted": 2}
+    assert store.list_sessions() == []
+    assert client.post("/sessions/delete", json={"session_ids": []}).status_code == 422
+
+
+def test_search_sessions_route(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_chat_message("ctx-1", "user", "fetch example.com")
+    store.append_chat_message("ctx-2", "user", "fetch example.org")
+    client = _client(store)
+
+    response = client.get("/sessions/search", params={"q": "fetch", "limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 1
+    cursor = response.json()["next_cursor"]
+
+    second = client.get("/sessions/search", params={"q": "fetch", "limit": 1, "cursor": cursor})
+    assert len(second.json()["results"]) == 1
+    assert second.json()["next_cursor"] is None
+    assert client.get("/sessions/search").status_code == 400
+
+
+def test_fork_session_route(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    for index in range(3):
+        store.append_event("ctx-1", index, {"kind": "status-update", "n": index})
+    client = _client(store)
+
+    response = client.post("/sessions/ctx-1/fork", json={"event_index": 1})
+    assert response.status_code == 201
+    fork = response.json()["session"]
+    assert fork["parent"] == {"session_id": "ctx-1", "message_index": 0, "event_index": 1}
+    assert [event["n"] for event in client.get(f"/sessions/{fork['session_id']}").json()["events"]] == [0]
+    assert client.post("/sessions/missing/fork", json={}).status_code == 404
+
+
+def test_export_sessions_streams_ndjson(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    store.append_event("ctx-1", 0, {"kind": "status-update"})
+    store.append_event("ctx-2", 0, {"kind": "status-update"})
+    client = _client(store)
+
+    response = client.get("/sessions/export", params={"session_id": "ctx-2"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["header", "session", "event"]
+    assert records[1]["session_id"] == "ctx-2"
+
+    compressed = client.get("/sessions/export", params={"gzip": "true"})
+    assert len(gzip.decompress(compressed.content).splitlines()) == 5